@@ -1,4 +1,5 @@
-import sys, time, hmac, hashlib, base64, urllib.parse, requests, json, os, argparse
+import sys, time, hmac, hashlib, base64, urllib.parse, requests, json, os, argparse, threading, queue
+from collections import deque
 
 # 从环境变量读取配置（必须配置）
 WEBHOOK = os.environ.get("DINGTALK_WEBHOOK", "")
@@ -9,6 +10,19 @@ SECRET = os.environ.get("DINGTALK_SECRET", "")
 IMGBB_API_KEY = os.environ.get("IMGBB_API_KEY", "")
 # 备用图床（敖武的图床）
 BACKUP_IMAGE_HOST = "https://playground.z.wiki/img-cloud/upload"
+# 已上传图片缓存：文件 SHA-256 -> 图片地址，相同内容不重复上传
+UPLOAD_CACHE_FILE = os.environ.get("DINGTALK_UPLOAD_CACHE",
+                                   os.path.join(os.path.expanduser("~"), ".cache", "dingtalk-push", "uploads.json"))
+UPLOAD_TIMEOUT = 30
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# 钉钉自定义机器人每分钟最多 20 条消息，超过会被限流（errcode 130101）
+RATE_PER_MINUTE = 20
+RATE_LIMITED_ERRCODE = 130101
+# 单条 Markdown 消息的大小上限（字节），钉钉限制约 20000，留出标题等余量
+MAX_MARKDOWN_BYTES = 18000
+# 签名有效期 1 小时，复用 30 分钟后重新签名
+SIGN_TTL = 1800
 
 def check_config():
     """检查必要配置是否存在"""
@@ -19,49 +33,173 @@ def check_config():
         print("错误：未配置 DINGTALK_SECRET 环境变量", file=sys.stderr)
         sys.exit(1)
 
-def get_sign():
+def get_sign(secret=None):
     """生成钉钉签名"""
+    secret = secret or SECRET
     timestamp = str(round(time.time() * 1000))
-    secret_enc = SECRET.encode('utf-8')
-    string_to_sign = f'{timestamp}\n{SECRET}'.encode('utf-8')
+    secret_enc = secret.encode('utf-8')
+    string_to_sign = f'{timestamp}\n{secret}'.encode('utf-8')
     hmac_code = hmac.new(secret_enc, string_to_sign, digestmod=hashlib.sha256).digest()
     sign = urllib.parse.quote_plus(base64.b64encode(hmac_code))
     return timestamp, sign
 
+class SlidingWindowLimiter:
+    """
+    滑动窗口限流：任意 window 秒内最多 limit 次，acquire() 超出时阻塞到最早的一次移出窗口
+
+    窗口默认比一分钟多 1 秒，抵消请求到达钉钉时的网络延迟差异
+    """
+
+    def __init__(self, limit=RATE_PER_MINUTE, window=61.0):
+        self.limit = max(1, int(limit))
+        self.window = window
+        self.sent = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """登记一次发送，返回等待的秒数"""
+        waited = 0.0
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                while self.sent and now - self.sent[0] >= self.window:
+                    self.sent.popleft()
+                if len(self.sent) < self.limit:
+                    self.sent.append(now)
+                    return waited
+                wait = self.sent[0] + self.window - now
+                time.sleep(wait)
+                waited += wait
+
+def pack_digest(sections, max_bytes=MAX_MARKDOWN_BYTES, header=""):
+    """
+    将多段 Markdown 合并为尽量少的消息，每条不超过 max_bytes 字节
+    sections 为 [(分组标题, 段落)]，分组标题为空表示不分组；同一消息内连续的同组段落只在第一段前加分组标题，
+    换到下一条消息时重新加上。每条消息都以 header 开头；单段超过上限时截断，空段落跳过
+    返回 [(消息内容, [段落序号])]
+    """
+    header_size = len(header.encode('utf-8'))
+    messages = []
+
+    def start():
+        return ([header] if header else []), [], header_size, None
+
+    parts, members, size, group = start()
+    for index, (heading, section) in enumerate(sections):
+        heading, section = heading or "", section.strip()
+        if not section:
+            continue
+        budget = max_bytes - header_size - len(heading.encode('utf-8')) - 4
+        if len(section.encode('utf-8')) > budget:
+            section = section.encode('utf-8')[:max(0, budget - 3)].decode('utf-8', errors='ignore') + "..."
+        block = f"{heading}\n\n{section}" if heading and heading != group else section
+        block_size = len(block.encode('utf-8')) + (2 if parts else 0)
+        if members and size + block_size > max_bytes:
+            messages.append(("\n\n".join(parts), members))
+            parts, members, size, group = start()
+            block = f"{heading}\n\n{section}" if heading else section
+            block_size = len(block.encode('utf-8')) + (2 if parts else 0)
+        parts.append(block)
+        members.append(index)
+        size += block_size
+        group = heading
+    if members:
+        messages.append(("\n\n".join(parts), members))
+    return messages
+
+class DingTalkClient:
+    """
+    钉钉机器人客户端：复用 keep-alive 连接和签名，按滑动窗口限制发送速率
+    """
+
+    def __init__(self, webhook=None, secret=None, rate_per_minute=RATE_PER_MINUTE, timeout=10):
+        self.webhook = webhook or WEBHOOK
+        self.secret = secret or SECRET
+        if not self.webhook or not self.secret:
+            raise ValueError("未配置 DINGTALK_WEBHOOK / DINGTALK_SECRET 环境变量")
+        self.timeout = timeout
+        self.limiter = SlidingWindowLimiter(rate_per_minute)
+        self.session = requests.Session()
+        self.session.headers["Content-Type"] = "application/json"
+        self._signed = None
+        self._signed_at = 0.0
+
+    def _url(self):
+        """带签名的 Webhook 地址（签名在有效期内复用）"""
+        now = time.time()
+        if self._signed is None or now - self._signed_at > SIGN_TTL:
+            timestamp, sign = get_sign(self.secret)
+            self._signed = f"{self.webhook}&timestamp={timestamp}&sign={sign}"
+            self._signed_at = now
+        return self._signed
+
+    def deliver(self, data):
+        """
+        发送一条消息（经过限流），不做重试
+        返回 (HTTP 状态码, 响应 JSON)，响应不是 JSON 时为 None；网络错误时抛出 requests.RequestException
+        """
+        self.limiter.acquire()
+        resp = self.session.post(self._url(), json=data, timeout=self.timeout)
+        try:
+            return resp.status_code, resp.json()
+        except ValueError:
+            return resp.status_code, None
+
+    def post(self, data):
+        """
+        发送一条消息，返回响应 JSON，不做重试
+        被钉钉限流（errcode 130101）时直接返回，由调用方决定何时重发；需要可靠投递时使用监控器的发件箱
+        """
+        _, result = self.deliver(data)
+        result = result or {}
+        if result.get("errcode") == RATE_LIMITED_ERRCODE:
+            print("钉钉机器人限流，消息未发送", file=sys.stderr)
+        return result
+
+    def send_markdown(self, content, title="消息通知"):
+        """发送 Markdown 消息"""
+        return self.post({"msgtype": "markdown", "markdown": {"title": title, "text": content}})
+
+    def send_link(self, title, text, pic_url, message_url):
+        """发送 Link 消息（带图片预览）"""
+        return self.post({
+            "msgtype": "link",
+            "link": {"title": title, "text": text, "picUrl": pic_url, "messageUrl": message_url}
+        })
+
+    def send_digest(self, title, sections, max_bytes=MAX_MARKDOWN_BYTES, header=""):
+        """将多段内容合并为摘要消息发送，返回各条消息的发送结果"""
+        messages = pack_digest([("", section) for section in sections], max_bytes, header)
+        results = []
+        for i, (content, _) in enumerate(messages, 1):
+            suffix = f" ({i}/{len(messages)})" if len(messages) > 1 else ""
+            results.append(self.send_markdown(content, title + suffix))
+        return results
+
+    def close(self):
+        self.session.close()
+
+_default_client = None
+
+def _client():
+    """命令行使用的默认客户端"""
+    global _default_client
+    if _default_client is None:
+        _default_client = DingTalkClient()
+    return _default_client
+
 def send_markdown(content, title="消息通知"):
     """发送 Markdown 消息"""
-    timestamp, sign = get_sign()
-    url = f"{WEBHOOK}&timestamp={timestamp}&sign={sign}"
-    data = {
-        "msgtype": "markdown",
-        "markdown": {
-            "title": title,
-            "text": content
-        }
-    }
-    resp = requests.post(url, json=data, headers={"Content-Type": "application/json"})
-    return resp.json()
+    return _client().send_markdown(content, title)
 
 def send_link(title, text, pic_url, message_url):
     """发送 Link 消息（带图片预览）"""
-    timestamp, sign = get_sign()
-    url = f"{WEBHOOK}&timestamp={timestamp}&sign={sign}"
-    data = {
-        "msgtype": "link",
-        "link": {
-            "title": title,
-            "text": text,
-            "picUrl": pic_url,
-            "messageUrl": message_url
-        }
-    }
-    resp = requests.post(url, json=data, headers={"Content-Type": "application/json"})
-    return resp.json()
+    return _client().send_link(title, text, pic_url, message_url)
 
 def send_image_with_markdown(image_path, caption=""):
     """
     上传图片并发送 Markdown 消息
-    支持本地图片路径或 URL
+    支持本地图片路径或 URL；内容相同的本地图片只上传一次
     """
     # 如果是 URL，直接使用
     if image_path.startswith("http://") or image_path.startswith("https://"):
@@ -70,20 +208,18 @@ def send_image_with_markdown(image_path, caption=""):
         # 本地图片，上传到图床
         if not os.path.exists(image_path):
             return {"error": f"图片文件不存在: {image_path}"}
-        
+
+        digest = file_sha256(image_path)
+        image_url = cached_upload(digest)
+        if image_url:
+            print(f"图片已上传过，使用缓存地址: {image_url}", file=sys.stderr)
+            return send_markdown(_image_markdown(image_url, caption), title=caption or "图片消息")
+
         print(f"正在上传图片: {image_path}", file=sys.stderr)
-        
-        # 尝试 imgbb 图床（优先）
-        if IMGBB_API_KEY:
-            image_url = upload_to_imgbb(image_path)
-        else:
-            image_url = None
-        
-        # 如果 imgbb 失败，尝试备用图床
-        if not image_url:
-            print("imgbb 上传失败或未配置 API 密钥，尝试备用图床...", file=sys.stderr)
-            image_url = upload_to_backup_host(image_path)
-        
+        image_url = upload_image(image_path)
+        if image_url:
+            remember_upload(digest, image_url)
+
         if not image_url:
             # 所有图床都失败，发送描述性消息
             print("所有图床上传失败，发送描述性消息", file=sys.stderr)
@@ -96,52 +232,153 @@ def send_image_with_markdown(image_path, caption=""):
         
         print(f"图片上传成功: {image_url}", file=sys.stderr)
     
-    # 构建 Markdown 内容
+    return send_markdown(_image_markdown(image_url, caption), title=caption or "图片消息")
+
+def _image_markdown(image_url, caption=""):
+    """构建图片 Markdown 内容"""
     md_content = f"![图片]({image_url})"
     if caption:
         md_content = f"{caption}\n\n{md_content}"
-    
-    return send_markdown(md_content, title=caption or "图片消息")
+    return md_content
+
+def file_sha256(image_path):
+    """分块计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-def upload_to_imgbb(image_path):
-    """上传图片到 imgbb 图床"""
+def _load_upload_cache():
     try:
-        with open(image_path, 'rb') as f:
-            files = {'image': f}
-            data = {'key': IMGBB_API_KEY}
-            resp = requests.post('https://api.imgbb.com/1/upload', files=files, data=data, timeout=30)
-            result = resp.json()
-            
-            if result.get("success"):
-                return result["data"]["url"]
-            else:
-                print(f"imgbb 上传失败: {result.get('error', {}).get('message', '未知错误')}", file=sys.stderr)
-                return None
-    except Exception as e:
-        print(f"imgbb 上传异常: {e}", file=sys.stderr)
+        with open(UPLOAD_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def cached_upload(digest):
+    """内容哈希对应的已上传地址，没有时返回 None"""
+    entry = _load_upload_cache().get(digest)
+    return entry.get("url") if isinstance(entry, dict) else None
+
+def remember_upload(digest, url):
+    """记录内容哈希对应的图片地址（重新读取后合并，原子替换写入）"""
+    try:
+        os.makedirs(os.path.dirname(UPLOAD_CACHE_FILE) or '.', exist_ok=True)
+        cache = _load_upload_cache()
+        cache[digest] = {"url": url, "uploaded_at": int(time.time())}
+        tmp_file = f"{UPLOAD_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_file, UPLOAD_CACHE_FILE)
+    except OSError as e:
+        print(f"保存上传缓存失败: {e}", file=sys.stderr)
+
+class UploadCancelled(Exception):
+    """另一个图床已上传成功，停止发送剩余内容"""
+
+class _MultipartBody:
+    """
+    流式 multipart/form-data 请求体，文件按块读取，不整个读入内存
+
+    同时提供 __iter__ 和 __len__：requests 据此设置 Content-Length 并按原样发送，不使用分块传输编码
+    """
+
+    def __init__(self, image_path, file_field, fields=None, cancel=None):
+        boundary = f"dingtalk-push-{os.urandom(12).hex()}"
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self.head = b"".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8')
+            for name, value in (fields or {}).items()
+        )
+        self.head += (f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+                      f'filename="{os.path.basename(image_path)}"\r\n'
+                      f'Content-Type: application/octet-stream\r\n\r\n').encode('utf-8')
+        self.tail = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+        self.image_path = image_path
+        self.size = os.path.getsize(image_path)
+        self.cancel = cancel
+
+    def __len__(self):
+        return len(self.head) + self.size + len(self.tail)
+
+    def __iter__(self):
+        yield self.head
+        with open(self.image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b''):
+                if self.cancel is not None and self.cancel.is_set():
+                    raise UploadCancelled()
+                yield chunk
+        yield self.tail
+
+def _post_file(url, image_path, file_field, fields=None, cancel=None):
+    """流式上传文件，返回响应"""
+    body = _MultipartBody(image_path, file_field, fields, cancel)
+    return requests.post(url, data=body, headers={"Content-Type": body.content_type}, timeout=UPLOAD_TIMEOUT)
+
+def upload_image(image_path):
+    """
+    上传图片，返回图片地址，全部失败时返回 None
+
+    配置了 imgbb 时与备用图床同时上传，采用最先成功的结果并取消另一个，
+    因此主图床不可用时不再额外等待它超时
+    """
+    if not IMGBB_API_KEY:
+        print("未配置 imgbb API 密钥，使用备用图床...", file=sys.stderr)
+        return upload_to_backup_host(image_path)
+
+    # 守护线程：落选的上传在发送下一块时中止，已发完请求体时也不会阻塞进程退出
+    cancel = threading.Event()
+    results = queue.Queue()
+    uploaders = (upload_to_imgbb, upload_to_backup_host)
+    for upload in uploaders:
+        threading.Thread(target=lambda upload=upload: results.put(upload(image_path, cancel)),
+                         name='image-upload', daemon=True).start()
+    try:
+        for _ in uploaders:
+            image_url = results.get()
+            if image_url:
+                return image_url
         return None
+    finally:
+        cancel.set()
 
-def upload_to_backup_host(image_path):
-    """上传图片到备用图床（敖武的图床）"""
+def upload_to_imgbb(image_path, cancel=None):
+    """上传图片到 imgbb 图床，cancel 被设置时中止上传"""
     try:
-        with open(image_path, 'rb') as f:
-            files = {'file': f}
-            resp = requests.post(BACKUP_IMAGE_HOST, files=files, timeout=30)
-            
-            # 尝试解析响应
-            try:
-                result = resp.json()
-                if result.get("success") or result.get("url"):
-                    return result.get("url") or result.get("data", {}).get("url")
-            except:
-                # 如果不是 JSON，尝试从 HTML 中提取 URL
-                if resp.status_code == 200:
-                    # 这里需要根据实际响应调整
-                    print("备用图床返回非JSON响应，可能已变更", file=sys.stderr)
-            
+        resp = _post_file('https://api.imgbb.com/1/upload', image_path, 'image', {'key': IMGBB_API_KEY}, cancel)
+        result = resp.json()
+
+        if result.get("success"):
+            return result["data"]["url"]
+        else:
+            print(f"imgbb 上传失败: {result.get('error', {}).get('message', '未知错误')}", file=sys.stderr)
             return None
     except Exception as e:
-        print(f"备用图床上传异常: {e}", file=sys.stderr)
+        if not (cancel and cancel.is_set()):
+            print(f"imgbb 上传异常: {e}", file=sys.stderr)
+        return None
+
+def upload_to_backup_host(image_path, cancel=None):
+    """上传图片到备用图床（敖武的图床），cancel 被设置时中止上传"""
+    try:
+        resp = _post_file(BACKUP_IMAGE_HOST, image_path, 'file', cancel=cancel)
+
+        # 尝试解析响应
+        try:
+            result = resp.json()
+            if result.get("success") or result.get("url"):
+                return result.get("url") or result.get("data", {}).get("url")
+        except:
+            # 如果不是 JSON，尝试从 HTML 中提取 URL
+            if resp.status_code == 200:
+                # 这里需要根据实际响应调整
+                print("备用图床返回非JSON响应，可能已变更", file=sys.stderr)
+
+        return None
+    except Exception as e:
+        if not (cancel and cancel.is_set()):
+            print(f"备用图床上传异常: {e}", file=sys.stderr)
         return None
 
 def main():
@@ -172,8 +409,9 @@ def main():
     # 默认：从标准输入读取 Markdown 内容
     content = sys.stdin.read().strip()
     if content:
-        result = send_markdown(content, args.title)
-        print(json.dumps(result, ensure_ascii=False, indent=2))
+        # 超过单条消息上限时按段落拆成多条发送
+        results = _client().send_digest(args.title, content.split("\n\n"))
+        print(json.dumps(results[0] if len(results) == 1 else results, ensure_ascii=False, indent=2))
     else:
         print("错误：请通过标准输入传入内容，或使用 --image/--link 参数", file=sys.stderr)
         sys.exit(1)
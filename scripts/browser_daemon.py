@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+浏览器守护进程 - 常驻一个 Chromium，短时运行的监控通过 CDP 连接复用
+
+    python scripts/taptap_monitor.py serve-browser
+
+守护进程只监听 127.0.0.1，定期检查 CDP 端点和内存，浏览器退出或内存超过阈值时自动重启。
+监控运行时先探测端点，可达则 connect_over_cdp，不可达则自行启动浏览器。
+"""
+import json
+import time
+import urllib.parse
+import urllib.request
+from typing import List
+
+from browser_lifecycle import MB, chromium_memory, format_memory
+
+DEFAULT_ENDPOINT = "http://127.0.0.1:9333"
+
+
+def daemon_reachable(endpoint: str, timeout: float = 0.5) -> bool:
+    """CDP 端点是否可用"""
+    try:
+        with urllib.request.urlopen(endpoint.rstrip('/') + '/json/version', timeout=timeout) as resp:
+            return 'webSocketDebuggerUrl' in json.loads(resp.read().decode('utf-8'))
+    except Exception:
+        return False
+
+
+def serve_browser(endpoint: str = DEFAULT_ENDPOINT, headless: bool = True, args: List[str] = None,
+                  check_interval: float = 30, max_rss_mb: float = 2048):
+    """
+    启动并守护浏览器，直到收到 Ctrl+C
+
+    Args:
+        endpoint: 对外提供的 CDP 地址，只支持本机
+        headless: 是否无头模式
+        args: 额外的 Chromium 启动参数
+        check_interval: 健康检查间隔（秒）
+        max_rss_mb: Chromium 进程内存合计超过该值（MB）时重启，0 表示不检查
+    """
+    from playwright.sync_api import sync_playwright
+
+    parsed = urllib.parse.urlparse(endpoint)
+    if parsed.hostname not in ('127.0.0.1', 'localhost'):
+        raise ValueError(f"浏览器守护进程只监听本机地址: {endpoint}")
+    launch_args = list(args or []) + [
+        f'--remote-debugging-port={parsed.port or 9333}',
+        '--remote-debugging-address=127.0.0.1',
+    ]
+
+    with sync_playwright() as p:
+        browser = None
+        try:
+            while True:
+                browser = p.chromium.launch(headless=headless, args=launch_args)
+                started = time.monotonic()
+                print(f"🖥️ 浏览器守护进程已启动: {endpoint}")
+                while True:
+                    time.sleep(check_interval)
+                    if not daemon_reachable(endpoint, timeout=5):
+                        print("⚠️ CDP 端点无响应，重启浏览器")
+                        break
+                    usage = chromium_memory()
+                    uptime = (time.monotonic() - started) / 60
+                    print(f"浏览器守护进程运行 {uptime:.0f} 分钟，{format_memory(usage)}")
+                    if usage and max_rss_mb and usage['total'] >= max_rss_mb * MB:
+                        print(f"♻️ 内存超过 {max_rss_mb:.0f} MB，重启浏览器")
+                        break
+                try:
+                    browser.close()
+                except Exception:
+                    pass
+        except KeyboardInterrupt:
+            print("\n✋ 浏览器守护进程已停止")
+        finally:
+            if browser is not None:
+                try:
+                    browser.close()
+                except Exception:
+                    pass
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+浏览器生命周期 - 长时间运行时定期回收浏览器上下文和页面
+
+达到导航次数上限、存活时间上限，或渲染进程内存 (RSS) 超过阈值时需要回收。
+监控器在两轮抓取之间先创建好新的上下文和页面，再关闭旧的，回收不占用抓取时间。
+内存读取 Linux 下使用 /proc（只统计本进程启动的 Chromium 子进程），其他平台在安装了 psutil 时使用 psutil。
+"""
+import os
+import time
+from typing import Dict, Optional
+
+MB = 1024 * 1024
+
+
+def _proc_children() -> Dict[int, list]:
+    """读取 /proc，返回 父进程ID -> [子进程ID]"""
+    children: Dict[int, list] = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', 'rb') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 进程名可能包含空格和括号，从最后一个 ')' 之后解析
+        fields = stat[stat.rfind(b')') + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(name))
+    return children
+
+
+def _proc_memory(root_pid: int) -> Dict[str, int]:
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    children = _proc_children()
+    usage = {'renderer': 0, 'total': 0, 'processes': 0}
+    stack = list(children.get(root_pid, []))
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                cmdline = f.read()
+            with open(f'/proc/{pid}/statm', 'rb') as f:
+                rss = int(f.read().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            continue
+        if b'chrom' not in cmdline.lower() and b'headless_shell' not in cmdline:
+            continue
+        usage['total'] += rss
+        usage['processes'] += 1
+        if b'--type=renderer' in cmdline:
+            usage['renderer'] += rss
+    return usage
+
+
+def _psutil_memory(root_pid: int) -> Optional[Dict[str, int]]:
+    try:
+        import psutil
+    except ImportError:
+        return None
+    usage = {'renderer': 0, 'total': 0, 'processes': 0}
+    for proc in psutil.Process(root_pid).children(recursive=True):
+        try:
+            cmdline = ' '.join(proc.cmdline())
+            if 'chrom' not in cmdline.lower() and 'headless_shell' not in cmdline:
+                continue
+            rss = proc.memory_info().rss
+        except psutil.Error:
+            continue
+        usage['total'] += rss
+        usage['processes'] += 1
+        if '--type=renderer' in cmdline:
+            usage['renderer'] += rss
+    return usage
+
+
+def chromium_memory() -> Optional[Dict[str, int]]:
+    """
+    本进程启动的 Chromium 进程内存
+
+    Returns:
+        {"renderer": 渲染进程 RSS 字节数, "total": 全部 Chromium 进程 RSS 字节数, "processes": 进程数}，
+        无法读取时返回 None
+    """
+    try:
+        if os.path.isdir('/proc'):
+            return _proc_memory(os.getpid())
+        return _psutil_memory(os.getpid())
+    except Exception:
+        return None
+
+
+def format_memory(usage: Optional[Dict[str, int]]) -> str:
+    """内存读数的可读形式"""
+    if not usage:
+        return "内存未知"
+    return (f"渲染进程 {usage['renderer'] / MB:.0f} MB / "
+            f"Chromium 共 {usage['total'] / MB:.0f} MB ({usage['processes']} 个进程)")
+
+
+class BrowserLifecycle:
+    def __init__(self, max_navigations: int = 200, max_age_minutes: float = 360, max_renderer_rss_mb: float = 1024):
+        """
+        Args:
+            max_navigations: 上下文累计导航次数上限，0 表示不限
+            max_age_minutes: 上下文存活时间上限（分钟），0 表示不限
+            max_renderer_rss_mb: 渲染进程 RSS 阈值（MB），0 表示不检查
+        """
+        self.max_navigations = max_navigations
+        self.max_age = max_age_minutes * 60
+        self.max_renderer_rss = max_renderer_rss_mb * MB
+        self.recycles = 0
+        self.reset()
+
+    def reset(self):
+        """新上下文创建后重新计数"""
+        self.navigations = 0
+        self.created_at = time.monotonic()
+
+    def record_navigation(self):
+        """记录一次页面导航"""
+        self.navigations += 1
+
+    def recycle_reason(self, usage: Optional[Dict[str, int]] = None) -> Optional[str]:
+        """
+        判断是否需要回收
+
+        Args:
+            usage: chromium_memory() 的读数，None 表示不检查内存
+
+        Returns:
+            回收原因，不需要回收时返回 None
+        """
+        if self.max_navigations and self.navigations >= self.max_navigations:
+            return f"导航 {self.navigations} 次"
+        age = time.monotonic() - self.created_at
+        if self.max_age and age >= self.max_age:
+            return f"已运行 {age / 60:.0f} 分钟"
+        if usage and self.max_renderer_rss and usage['renderer'] >= self.max_renderer_rss:
+            return f"渲染进程内存 {usage['renderer'] / MB:.0f} MB"
+        return None
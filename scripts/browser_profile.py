@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+持久化浏览器配置 - 跨运行复用用户数据目录中的 HTTP 缓存
+
+每个工作进程独占一个 worker-N 目录（文件锁保护），同一主机上的多个进程会各自取得空闲的目录，
+cron 单次运行通常会重新拿到上次用过的目录，TapTap 的 JS/CSS 直接从磁盘缓存加载。
+目录大小超过上限时，启动前先清理缓存目录；长期无人使用的目录在持有锁的前提下删除。
+
+Playwright 的路由拦截会禁用 HTTP 缓存，因此持久化配置下请求拦截改用 CDP 的 Network.setBlockedURLs
+按扩展名拦截，缓存命中情况同样从 CDP 的 Network 事件统计。
+"""
+import os
+import shutil
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl，每个进程使用独立目录
+    fcntl = None
+
+MB = 1024 * 1024
+
+# 超过大小上限时按顺序清理的目录（相对用户数据目录）
+CACHE_DIRS = (
+    'Default/Code Cache',
+    'Default/GPUCache',
+    'Default/Service Worker/CacheStorage',
+    'Default/Cache',
+)
+
+# 按资源类型拦截时对应的 URL 模式
+BLOCKED_URL_PATTERNS = {
+    'image': ('*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.ico*', '*.bmp*'),
+    'font': ('*.woff*', '*.ttf*', '*.otf*', '*.eot*'),
+    'media': ('*.mp4*', '*.webm*', '*.m3u8*', '*.mp3*', '*.m4a*'),
+}
+
+# 统计缓存命中率的静态资源类型（CDP Network.ResourceType）
+STATIC_TYPES = ('Script', 'Stylesheet', 'Font', 'Image', 'Media')
+
+
+def blocked_url_patterns(block_types: Iterable[str]) -> List[str]:
+    """资源类型对应的 Network.setBlockedURLs 模式"""
+    patterns = []
+    for resource_type in block_types:
+        patterns.extend(BLOCKED_URL_PATTERNS.get(resource_type, ()))
+    return patterns
+
+
+def dir_size(path: str) -> int:
+    """目录总字节数"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class BrowserProfiles:
+    def __init__(self, root_dir: str, max_mb: float = 512, max_idle_days: float = 7, max_workers: int = 32):
+        """
+        Args:
+            root_dir: 存放各工作进程用户数据目录的根目录
+            max_mb: 单个用户数据目录的大小上限（MB）
+            max_idle_days: 超过该天数未被使用的目录会被删除，0 表示不删除
+            max_workers: 最多同时存在的工作目录数
+        """
+        self.root_dir = root_dir
+        self.max_bytes = int(max_mb * MB)
+        self.max_idle = max_idle_days * 86400
+        self.max_workers = max_workers
+        self.path: Optional[str] = None
+        self._lock_file = None
+
+    def launch_args(self) -> List[str]:
+        """限制磁盘缓存大小的启动参数（预留部分空间给其他数据）"""
+        return [f'--disk-cache-size={int(self.max_bytes * 0.8)}']
+
+    def acquire(self) -> str:
+        """
+        取得一个空闲的用户数据目录并加锁，直到 release() 为止
+
+        Returns:
+            用户数据目录路径
+        """
+        if self.path:
+            return self.path
+        os.makedirs(self.root_dir, exist_ok=True)
+        if fcntl is None:
+            self.path = os.path.join(self.root_dir, f'worker-pid{os.getpid()}')
+        else:
+            for slot in range(self.max_workers):
+                lock_file = self._try_lock(slot)
+                if lock_file:
+                    self._lock_file = lock_file
+                    self.path = os.path.join(self.root_dir, f'worker-{slot}')
+                    break
+            else:
+                raise RuntimeError(f"没有空闲的浏览器配置目录（上限 {self.max_workers} 个）: {self.root_dir}")
+        os.makedirs(self.path, exist_ok=True)
+        self._enforce_cap(self.path)
+        self._cleanup_idle()
+        return self.path
+
+    def release(self):
+        """释放目录锁（浏览器关闭之后调用）"""
+        if self._lock_file:
+            os.utime(self._lock_file.name)
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+        self.path = None
+
+    def _try_lock(self, slot: int):
+        """非阻塞地锁定某个目录，已被其他进程占用时返回 None"""
+        lock_file = open(os.path.join(self.root_dir, f'worker-{slot}.lock'), 'a+')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+        os.utime(lock_file.name)
+        return lock_file
+
+    def _enforce_cap(self, path: str):
+        """目录超过上限时依次清理缓存目录，仍然超过则整个重建"""
+        size = dir_size(path)
+        if size <= self.max_bytes:
+            return
+        before = size
+        for cache_dir in CACHE_DIRS:
+            shutil.rmtree(os.path.join(path, cache_dir), ignore_errors=True)
+            size = dir_size(path)
+            if size <= self.max_bytes:
+                break
+        else:
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path, exist_ok=True)
+            size = 0
+        print(f"🧹 浏览器配置目录超过 {self.max_bytes / MB:.0f} MB，已清理: "
+              f"{before / MB:.0f} MB -> {size / MB:.0f} MB ({path})")
+
+    def _cleanup_idle(self):
+        """删除长期未使用的其他目录（只处理能加锁的，正在使用的目录不受影响）"""
+        if fcntl is None or not self.max_idle:
+            return
+        now = time.time()
+        for slot in range(self.max_workers):
+            path = os.path.join(self.root_dir, f'worker-{slot}')
+            if path == self.path or not os.path.isdir(path):
+                continue
+            lock_file = self._try_lock_stale(slot, now)
+            if lock_file is None:
+                continue
+            try:
+                shutil.rmtree(path, ignore_errors=True)
+                print(f"🧹 已删除长期未使用的浏览器配置目录: {path}")
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+    def _try_lock_stale(self, slot: int, now: float):
+        """锁定最后使用时间早于 max_idle 的目录，否则返回 None"""
+        lock_path = os.path.join(self.root_dir, f'worker-{slot}.lock')
+        try:
+            if now - os.path.getmtime(lock_path) < self.max_idle:
+                return None
+        except OSError:
+            return None
+        lock_file = open(lock_path, 'a+')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+        return lock_file
+
+
+class CacheStats:
+    """
+    从 CDP Network 事件统计静态资源的缓存命中率
+
+    每个页面创建 CDP 会话后调用 events() 中的处理函数注册事件，
+    同一会话也用于按 URL 拦截请求，被拦截的请求计入 RouteProfile 的拦截统计。
+    """
+
+    def __init__(self, route_profile=None):
+        self.route_profile = route_profile
+        self._served_from_cache = set()
+        self._reset_cycle()
+
+    def _reset_cycle(self):
+        self.hits = 0
+        self.misses = 0
+        self.downloaded_bytes = 0
+        self._miss_ids = set()
+
+    def events(self) -> Dict[str, Callable[[Dict], None]]:
+        """CDP 事件名 -> 处理函数"""
+        return {
+            'Network.requestServedFromCache': self._on_served_from_cache,
+            'Network.responseReceived': self._on_response,
+            'Network.loadingFinished': self._on_finished,
+            'Network.loadingFailed': self._on_failed,
+        }
+
+    def blocked_patterns(self) -> List[str]:
+        """当前拦截档位对应的 URL 模式"""
+        if self.route_profile is None:
+            return []
+        return blocked_url_patterns(self.route_profile.block_types)
+
+    def _on_served_from_cache(self, params: Dict):
+        self._served_from_cache.add(params.get('requestId'))
+
+    def _on_response(self, params: Dict):
+        if params.get('type') not in STATIC_TYPES:
+            return
+        request_id = params.get('requestId')
+        response = params.get('response') or {}
+        if request_id in self._served_from_cache or response.get('fromDiskCache') or response.get('fromPrefetchCache'):
+            self._served_from_cache.discard(request_id)
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._miss_ids.add(request_id)
+
+    def _on_finished(self, params: Dict):
+        request_id = params.get('requestId')
+        if request_id in self._miss_ids:
+            self._miss_ids.discard(request_id)
+            self.downloaded_bytes += int(params.get('encodedDataLength') or 0)
+
+    def _on_failed(self, params: Dict):
+        self._miss_ids.discard(params.get('requestId'))
+        if params.get('blockedReason') == 'inspector' and self.route_profile is not None:
+            resource_type = (params.get('type') or 'other').lower()
+            self.route_profile.record_blocked(resource_type, resource_type)
+
+    def report(self) -> Dict:
+        """输出并重置本轮缓存命中统计"""
+        total = self.hits + self.misses
+        stats = {
+            "hits": self.hits,
+            "requests": total,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+            "downloaded_bytes": self.downloaded_bytes,
+        }
+        if total:
+            print(f"💾 静态资源缓存命中 {self.hits}/{total} ({self.hits / total:.0%})，"
+                  f"未命中下载 {self.downloaded_bytes / 1024:.0f}KB")
+        self._served_from_cache.clear()
+        self._reset_cycle()
+        return stats
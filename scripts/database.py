@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+SQLite 存储 - 以去重键为主键增量写入帖子和评价
+
+数据库使用 WAL 模式，每轮只插入新记录，写入开销不随历史数据增长。
+附带一次性导入工具，可将已有的 data/{app_id}_data.json 导入数据库：
+
+    python scripts/database.py import data/236096_data.json --db data/taptap.db
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    app_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    title TEXT,
+    link TEXT,
+    author TEXT,
+    time TEXT,
+    likes TEXT,
+    comments TEXT,
+    fetched_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (app_id, key)
+);
+CREATE TABLE IF NOT EXISTS reviews (
+    app_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    rating TEXT,
+    content TEXT,
+    author TEXT,
+    time TEXT,
+    likes TEXT,
+    fetched_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (app_id, key)
+);
+CREATE TABLE IF NOT EXISTS engagement (
+    app_id TEXT NOT NULL,
+    feed TEXT NOT NULL,
+    key TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    likes INTEGER NOT NULL,
+    comments INTEGER NOT NULL,
+    PRIMARY KEY (app_id, feed, key, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS aliases (
+    app_id TEXT NOT NULL,
+    feed TEXT NOT NULL,
+    alias TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (app_id, feed, alias)
+) WITHOUT ROWID;
+"""
+
+# PRAGMA user_version: 1 = 已为评价补写别名
+SCHEMA_VERSION = 1
+
+# 信息流 -> 表名
+FEED_TABLES = {'topic': 'topics', 'review': 'reviews'}
+
+
+def topic_key(topic: Dict) -> str:
+    """帖子去重键：链接"""
+    return topic.get('link', '')
+
+
+def review_key(review: Dict) -> str:
+    """评价去重键：优先使用评价ID，缺失时使用内容+作者的哈希"""
+    if review.get('id'):
+        return f"id:{review['id']}"
+    source = f"{review.get('content', '')}\0{review.get('author', '')}\0{review.get('user_id') or ''}"
+    return "h:" + hashlib.blake2b(source.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def legacy_review_key(review: Dict) -> str:
+    """旧版评价去重键：内容前100字符+作者（用于识别升级前保存的评价）"""
+    return f"{review.get('content', '')[:100]}_{review.get('author', '')}"
+
+
+def review_aliases(review: Dict) -> List[str]:
+    """
+    评价的其他可能去重键（不含其主键），用于识别此前以这些键保存的同一条评价:
+    不含ID的内容哈希键（带和不带用户ID，升级前的评价没有这两个字段）和旧版键
+    """
+    keys = [
+        review_key(dict(review, id=None)),
+        review_key(dict(review, id=None, user_id=None)),
+        legacy_review_key(review),
+    ]
+    primary = review_key(review)
+    return [k for k in dict.fromkeys(keys) if k != primary]
+
+
+class SqliteStore:
+    def __init__(self, db_path: str = "data/taptap.db"):
+        """
+        Args:
+            db_path: 数据库文件路径，多个游戏可共用一个数据库
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """为升级前写入的评价补写别名，之后以旧版键或不含ID的键出现时仍能识别"""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        with self.conn:
+            rows = self.conn.execute("SELECT app_id, key, data FROM reviews").fetchall()
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO aliases (app_id, feed, alias, key) VALUES (?, 'review', ?, ?)",
+                [(app_id, alias, key) for app_id, key, data in rows for alias in review_aliases(json.loads(data))],
+            )
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        if rows:
+            print(f"已为 {len(rows)} 条评价补写去重别名")
+
+    def close(self):
+        self.conn.close()
+
+    def count(self, app_id: str) -> Tuple[int, int]:
+        """返回 (帖子数, 评价数)"""
+        topics = self.conn.execute("SELECT COUNT(*) FROM topics WHERE app_id = ?", (app_id,)).fetchone()[0]
+        reviews = self.conn.execute("SELECT COUNT(*) FROM reviews WHERE app_id = ?", (app_id,)).fetchone()[0]
+        return topics, reviews
+
+    def existing_keys(self, app_id: str, feed: str, keys: List[str]) -> Set[str]:
+        """
+        按主键和别名查询哪些去重键已存在
+
+        Args:
+            app_id: 游戏ID
+            feed: 信息流 (topic/review)
+            keys: 待查询的去重键
+
+        Returns:
+            已存在的去重键
+        """
+        table = FEED_TABLES[feed]
+        found = set()
+        # 分批查询，避免超出 SQLite 的参数数量上限
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT key FROM {table} WHERE app_id = ? AND key IN ({','.join('?' * len(batch))})",
+                (app_id, *batch),
+            )
+            found.update(key for key, in rows)
+            rows = self.conn.execute(
+                f"SELECT alias FROM aliases WHERE app_id = ? AND feed = ? AND alias IN ({','.join('?' * len(batch))})",
+                (app_id, feed, *batch),
+            )
+            found.update(alias for alias, in rows)
+        return found
+
+    def rekey(self, app_id: str, feed: str, mapping: Dict[str, str]) -> int:
+        """
+        修改记录的去重键（用于旧版键迁移）
+
+        Args:
+            app_id: 游戏ID
+            feed: 信息流 (topic/review)
+            mapping: 旧键（记录的主键或别名） -> 新键
+
+        Returns:
+            修改的记录数
+        """
+        table = FEED_TABLES[feed]
+        changed = 0
+        with self.conn:
+            for old, new in mapping.items():
+                row = self.conn.execute(
+                    "SELECT key FROM aliases WHERE app_id = ? AND feed = ? AND alias = ?", (app_id, feed, old),
+                ).fetchone()
+                target = row[0] if row else old
+                cur = self.conn.execute(
+                    f"UPDATE OR IGNORE {table} SET key = ? WHERE app_id = ? AND key = ?", (new, app_id, target))
+                changed += max(cur.rowcount, 0)
+                self.conn.execute(
+                    "UPDATE aliases SET key = ? WHERE app_id = ? AND feed = ? AND key = ?", (new, app_id, feed, target))
+        return changed
+
+    def append_engagement(self, app_id: str, feed: str, observations: Iterable[Tuple[str, int, int, int]]) -> int:
+        """
+        追加互动数据观测
+
+        Args:
+            app_id: 游戏ID
+            feed: 信息流 (topic/review)
+            observations: [(去重键, 时间戳, 点赞数, 评论数)]
+
+        Returns:
+            写入的记录数
+        """
+        with self.conn:
+            cur = self.conn.executemany(
+                "INSERT OR REPLACE INTO engagement (app_id, feed, key, ts, likes, comments) VALUES (?, ?, ?, ?, ?, ?)",
+                [(app_id, feed, key, ts, likes, comments) for key, ts, likes, comments in observations],
+            )
+        return max(cur.rowcount, 0)
+
+    def engagement_series(self, app_id: str, feed: str, key: str) -> List[Tuple[int, int, int]]:
+        """某个条目的 [(时间戳, 点赞数, 评论数)]"""
+        return self.conn.execute(
+            "SELECT ts, likes, comments FROM engagement WHERE app_id = ? AND feed = ? AND key = ? ORDER BY ts",
+            (app_id, feed, key),
+        ).fetchall()
+
+    def iter_topics(self, app_id: str) -> Iterator[Tuple[str, Dict]]:
+        """遍历 (去重键, 帖子)"""
+        for key, data in self.conn.execute("SELECT key, data FROM topics WHERE app_id = ? ORDER BY rowid", (app_id,)):
+            yield key, json.loads(data)
+
+    def iter_reviews(self, app_id: str) -> Iterator[Tuple[str, Dict]]:
+        """遍历 (去重键, 评价)"""
+        for key, data in self.conn.execute("SELECT key, data FROM reviews WHERE app_id = ? ORDER BY rowid", (app_id,)):
+            yield key, json.loads(data)
+
+    def insert(self, app_id: str, topics: Iterable[Tuple[str, Dict]], reviews: Iterable[Tuple[str, Dict]]) -> Tuple[int, int]:
+        """
+        插入新记录（已存在的键忽略）并登记评价的别名，在一个事务中完成
+
+        Args:
+            app_id: 游戏ID
+            topics: [(去重键, 帖子)]
+            reviews: [(去重键, 评价)]
+
+        Returns:
+            实际插入的 (帖子数, 评价数)
+        """
+        reviews = list(reviews)
+        with self.conn:
+            cur = self.conn.executemany(
+                "INSERT OR IGNORE INTO topics (app_id, key, title, link, author, time, likes, comments, fetched_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (app_id, key, t.get('title'), t.get('link'), t.get('author'), t.get('time'),
+                     t.get('likes'), t.get('comments'), t.get('fetched_at'), json.dumps(t, ensure_ascii=False))
+                    for key, t in topics
+                ],
+            )
+            inserted_topics = max(cur.rowcount, 0)
+            cur = self.conn.executemany(
+                "INSERT OR IGNORE INTO reviews (app_id, key, rating, content, author, time, likes, fetched_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (app_id, key, r.get('rating'), r.get('content'), r.get('author'), r.get('time'),
+                     r.get('likes'), r.get('fetched_at'), json.dumps(r, ensure_ascii=False))
+                    for key, r in reviews
+                ],
+            )
+            inserted_reviews = max(cur.rowcount, 0)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO aliases (app_id, feed, alias, key) VALUES (?, 'review', ?, ?)",
+                [(app_id, alias, key) for key, r in reviews for alias in review_aliases(r)],
+            )
+        return inserted_topics, inserted_reviews
+
+
+def import_json(store: SqliteStore, json_file: str, app_id: str = None) -> Tuple[int, int]:
+    """
+    将 JSON 数据文件导入数据库
+
+    Args:
+        store: 目标数据库
+        json_file: data/{app_id}_data.json 格式的数据文件
+        app_id: 游戏ID，默认读取文件中的 app_id 字段
+
+    Returns:
+        实际插入的 (帖子数, 评价数)
+    """
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    app_id = app_id or str(data.get('app_id', ''))
+    if not app_id:
+        raise ValueError(f"{json_file} 中没有 app_id，请通过 --app-id 指定")
+    topics = [(topic_key(t), t) for t in data.get('topics', []) if topic_key(t)]
+    reviews = [(review_key(r), r) for r in data.get('reviews', [])]
+    return store.insert(app_id, topics, reviews)
+
+
+def main():
+    """命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="TapTap 监控数据库工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="导入已有的 JSON 数据文件")
+    imp.add_argument("files", nargs='+', help="JSON 数据文件路径")
+    imp.add_argument("--db", default="data/taptap.db", help="数据库文件路径（默认: data/taptap.db）")
+    imp.add_argument("--app-id", default=None, help="游戏ID（默认读取文件中的 app_id）")
+
+    args = parser.parse_args()
+
+    store = SqliteStore(args.db)
+    try:
+        for json_file in args.files:
+            try:
+                topics, reviews = import_json(store, json_file, args.app_id)
+                print(f"{json_file}: 导入 {topics} 个帖子, {reviews} 条评价")
+            except Exception as e:
+                print(f"{json_file}: 导入失败: {e}", file=sys.stderr)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
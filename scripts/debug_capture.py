@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+调试快照 - 按采样率或解析失败时保存页面数据，用于排查提取逻辑
+
+快照按 游戏ID/信息流 分目录，以时间戳命名并 gzip 压缩，每个目录只保留最近 keep 份。
+"""
+import gzip
+import json
+import os
+import random
+from datetime import datetime
+from typing import Any, Optional
+
+
+class DebugCapture:
+    def __init__(self, directory: str = "data/debug", sample_rate: float = 0.0, keep: int = 20):
+        """
+        Args:
+            directory: 快照根目录
+            sample_rate: 成功抓取时的采样率 (0~1)，0 表示只在解析失败时保存
+            keep: 每个游戏/信息流保留的快照数量
+        """
+        self.directory = directory
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.keep = max(1, keep)
+
+    def should_sample(self) -> bool:
+        """本次成功抓取是否需要采样保存"""
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def save(self, app_id: str, feed: str, payload: Any, reason: str) -> Optional[str]:
+        """
+        保存一份快照
+
+        Args:
+            app_id: 游戏ID
+            feed: 信息流 (topic/review)
+            payload: 快照内容，字符串视为已序列化的 JSON 直接写入
+            reason: 保存原因，写入文件名 (sample/empty 等)
+
+        Returns:
+            快照文件路径，保存失败返回 None
+        """
+        folder = os.path.join(self.directory, str(app_id), feed)
+        path = os.path.join(folder, f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}_{reason}.json.gz")
+        try:
+            os.makedirs(folder, exist_ok=True)
+            with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as f:
+                if isinstance(payload, str):
+                    f.write(payload)
+                else:
+                    json.dump(payload, f, ensure_ascii=False, separators=(',', ':'), default=str)
+            self._prune(folder)
+            print(f"调试快照已保存到: {path}")
+            return path
+        except Exception as e:
+            print(f"保存调试快照失败: {e}")
+            return None
+
+    def _prune(self, folder: str):
+        """只保留最近 keep 份快照"""
+        snapshots = sorted(f for f in os.listdir(folder) if f.endswith('.json.gz'))
+        for name in snapshots[:-self.keep]:
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+去重索引 - 数据文件旁的紧凑侧车文件，保存所有去重键的 64 位哈希
+
+冷启动时只需内存映射索引文件，不必解析完整的历史数据；查找在有序数组上二分完成。
+文件格式（本机字节序）:
+    头部 56 字节: 魔数(8) + 数据文件大小(8) + 数据文件修改时间ns(8) + 帖子数(8) + 评价数(8) + 帖子别名数(8) + 评价别名数(8)
+    之后依次为帖子、评价、帖子别名、评价别名的有序 uint64 哈希数组
+别名是同一条记录的其他可能去重键（如评价的旧版键），只用于查询，不计入记录数。
+头部记录的数据文件大小/修改时间与实际不符时视为过期，需要重建。
+"""
+import hashlib
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from typing import Dict, Iterable, Optional, Tuple
+
+FEEDS = ('topic', 'review')
+# 文件中的哈希数组：每个信息流的去重键，之后是各自的别名
+SECTIONS = FEEDS + tuple(f"{feed}:alias" for feed in FEEDS)
+MAGIC = b'TTIDX\x00\x00\x02'
+HEADER = struct.Struct('=8sQQ' + 'Q' * len(SECTIONS))
+ITEM = struct.Struct('=Q')
+
+
+def key_hash(key: str) -> int:
+    """去重键的 64 位哈希"""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def file_stamp(path: str) -> Tuple[int, int]:
+    """数据文件的 (大小, 修改时间ns)，文件不存在时为 (0, 0)"""
+    try:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+    except OSError:
+        return 0, 0
+
+
+class DedupIndex:
+    def __init__(self, index_file: str):
+        """
+        Args:
+            index_file: 索引文件路径
+        """
+        self.index_file = index_file
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._arrays: Dict[str, memoryview] = {section: memoryview(b'').cast('Q') for section in SECTIONS}
+        # 本次运行新增、尚未写入索引文件的哈希
+        self._pending: Dict[str, set] = {section: set() for section in SECTIONS}
+
+    def open(self, source_file: str) -> bool:
+        """
+        映射索引文件
+
+        Args:
+            source_file: 索引对应的数据文件，用于判断索引是否过期
+
+        Returns:
+            索引存在且未过期时返回 True
+        """
+        self.close()
+        if not os.path.exists(self.index_file):
+            return False
+        f = open(self.index_file, 'rb')
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            f.close()
+            return False
+        if len(mm) < HEADER.size:
+            mm.close()
+            f.close()
+            return False
+        magic, size, mtime_ns, *counts = HEADER.unpack_from(mm, 0)
+        expected = HEADER.size + sum(counts) * ITEM.size
+        if magic != MAGIC or (size, mtime_ns) != file_stamp(source_file) or len(mm) != expected:
+            mm.close()
+            f.close()
+            return False
+        self._file, self._mmap = f, mm
+        view = memoryview(mm)
+        offset = HEADER.size
+        for section, count in zip(SECTIONS, counts):
+            end = offset + count * ITEM.size
+            self._arrays[section] = view[offset:end].cast('Q')
+            offset = end
+        view.release()
+        return True
+
+    def close(self):
+        """释放内存映射"""
+        for section in SECTIONS:
+            self._arrays[section].release()
+            self._arrays[section] = memoryview(b'').cast('Q')
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+            self._file = None
+
+    def _in_array(self, section: str, h: int) -> bool:
+        arr = self._arrays[section]
+        pos = bisect_left(arr, h)
+        return pos < len(arr) and arr[pos] == h
+
+    def contains(self, feed: str, key: str) -> bool:
+        """去重键是否已作为去重键或别名登记"""
+        h = key_hash(key)
+        return any(h in self._pending[section] or self._in_array(section, h)
+                   for section in (feed, f"{feed}:alias"))
+
+    def add(self, feed: str, key: str, alias: bool = False):
+        """
+        登记新的去重键（flush 后写入文件）
+
+        Args:
+            alias: 登记为已有记录的别名，不计入记录数
+        """
+        if self.contains(feed, key):
+            return
+        self._pending[f"{feed}:alias" if alias else feed].add(key_hash(key))
+
+    def count(self, feed: str) -> int:
+        """已登记的去重键数量（不含别名）"""
+        return len(self._arrays[feed]) + len(self._pending[feed])
+
+    def _merged(self, section: str) -> Tuple[bytes, int]:
+        """将新增哈希按序插入已有数组，只在插入点切分原始字节"""
+        arr = self._arrays[section]
+        raw = arr.cast('B')
+        parts = []
+        prev = 0
+        new = sorted(self._pending[section])
+        for h in new:
+            pos = bisect_left(arr, h)
+            parts.append(raw[prev * ITEM.size:pos * ITEM.size].tobytes())
+            parts.append(ITEM.pack(h))
+            prev = pos
+        parts.append(raw[prev * ITEM.size:].tobytes())
+        raw.release()
+        return b''.join(parts), len(arr) + len(new)
+
+    def flush(self, source_file: str):
+        """
+        写入索引文件（先写临时文件再替换）并重新映射
+
+        Args:
+            source_file: 索引对应的数据文件，需在数据文件写完之后调用
+        """
+        merged = [self._merged(section) for section in SECTIONS]
+        self._write(source_file, merged)
+
+    def build(self, source_file: str, keys: Dict[str, Iterable[str]],
+              aliases: Optional[Dict[str, Iterable[str]]] = None):
+        """
+        由完整的去重键重建索引
+
+        Args:
+            source_file: 索引对应的数据文件
+            keys: 信息流 -> 去重键
+            aliases: 信息流 -> 别名（已是去重键的会被忽略）
+        """
+        hashes = {feed: {key_hash(k) for k in keys.get(feed, ())} for feed in FEEDS}
+        for feed in FEEDS:
+            alias_hashes = {key_hash(k) for k in (aliases or {}).get(feed, ())}
+            hashes[f"{feed}:alias"] = alias_hashes - hashes[feed]
+        merged = []
+        for section in SECTIONS:
+            ordered = sorted(hashes[section])
+            merged.append((b''.join(ITEM.pack(h) for h in ordered), len(ordered)))
+        self._pending = {section: set() for section in SECTIONS}
+        self._write(source_file, merged)
+
+    def _write(self, source_file: str, merged):
+        size, mtime_ns = file_stamp(source_file)
+        os.makedirs(os.path.dirname(self.index_file) or '.', exist_ok=True)
+        tmp_file = self.index_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, size, mtime_ns, *(count for _, count in merged)))
+            for data, _ in merged:
+                f.write(data)
+        self.close()
+        os.replace(tmp_file, self.index_file)
+        self._pending = {section: set() for section in SECTIONS}
+        self.open(source_file)
+
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+互动数据时间序列 - 记录帖子/评价每次被抓取到时的点赞数和评论数
+
+JSON 后端使用数据文件旁的追加写二进制日志，每次观测只追加一条定长记录:
+    去重键哈希(8) + 信息流(1) + 时间戳(4) + 点赞数(4) + 评论数(4)
+读取时按条目聚合为 array 存储的 (时间戳, 点赞数, 评论数) 序列。
+SQLite 后端使用 engagement 表，见 database.py。
+"""
+import os
+import re
+import struct
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+from dedup_index import FEEDS, key_hash
+
+RECORD = struct.Struct('=QBIii')
+
+# (去重键, 时间戳, 点赞数, 评论数)
+Observation = Tuple[str, int, int, int]
+
+
+def parse_count(value) -> int:
+    """解析页面上的计数（支持 1.2万 / 3k 等写法），无法解析时返回 0"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.search(r'(\d+(?:\.\d+)?)\s*([万wWkK]?)', str(value or ''))
+    if not match:
+        return 0
+    number = float(match.group(1))
+    unit = match.group(2).lower()
+    if unit in ('万', 'w'):
+        number *= 10000
+    elif unit == 'k':
+        number *= 1000
+    return int(number)
+
+
+class EngagementLog:
+    def __init__(self, log_file: str):
+        """
+        Args:
+            log_file: 日志文件路径
+        """
+        self.log_file = log_file
+
+    def append(self, feed: str, observations: Iterable[Observation]) -> int:
+        """
+        追加观测记录
+
+        Returns:
+            写入的记录数
+        """
+        feed_id = FEEDS.index(feed)
+        data = b''.join(
+            RECORD.pack(key_hash(key), feed_id, ts, likes, comments)
+            for key, ts, likes, comments in observations
+        )
+        if not data:
+            return 0
+        os.makedirs(os.path.dirname(self.log_file) or '.', exist_ok=True)
+        with open(self.log_file, 'ab') as f:
+            f.write(data)
+        return len(data) // RECORD.size
+
+    def load(self, feed: str) -> Dict[int, array]:
+        """
+        读取某个信息流的全部序列
+
+        Returns:
+            去重键哈希 -> array('q')，依次存放 时间戳, 点赞数, 评论数
+        """
+        feed_id = FEEDS.index(feed)
+        series: Dict[int, array] = {}
+        if not os.path.exists(self.log_file):
+            return series
+        with open(self.log_file, 'rb') as f:
+            data = f.read()
+        # 忽略写入中断留下的不完整尾部
+        usable = len(data) - len(data) % RECORD.size
+        for h, fid, ts, likes, comments in RECORD.iter_unpack(memoryview(data)[:usable]):
+            if fid == feed_id:
+                series.setdefault(h, array('q')).extend((ts, likes, comments))
+        return series
+
+    def series(self, feed: str, key: str) -> List[Tuple[int, int, int]]:
+        """某个条目的 [(时间戳, 点赞数, 评论数)]"""
+        values = self.load(feed).get(key_hash(key), array('q'))
+        return [tuple(values[i:i + 3]) for i in range(0, len(values), 3)]
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+关键词告警规则 - 用 Aho-Corasick 自动机一次扫描匹配全部关键词
+
+规则文件为 JSON，修改后下一轮自动重新加载（解析失败时继续使用旧规则）:
+
+    {
+      "rules": [
+        {"name": "闪退差评", "keywords": ["闪退", "崩溃"], "feeds": ["review"], "max_rating": 2},
+        {"name": "充值问题", "keywords": ["充值", "扣款"], "regex": "没(到账|收到)"},
+        {"name": "竞品", "keywords": ["蛋仔派对", "元梦之星"]}
+      ]
+    }
+
+    name        规则名称（必填）
+    keywords    任一关键词出现即命中（不区分大小写）
+    regex       还需满足的正则；没有 keywords 时单独作为条件
+    min_rating  评分下限（含），没有评分的记录不命中
+    max_rating  评分上限（含），没有评分的记录不命中
+    feeds       适用的信息流 topic/review，默认全部
+
+所有规则的关键词编译进同一个自动机，每条记录的文本只扫描一遍，耗时与文本长度成正比，与规则数量无关；
+只有关键词命中的规则才继续检查正则和评分。只有 regex 的规则无法走自动机，会对每条记录单独匹配。
+"""
+import json
+import os
+import re
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+FEEDS = ('topic', 'review')
+
+# 参与匹配的记录字段
+TEXT_FIELDS = {
+    'topic': ('title', 'content_preview'),
+    'review': ('content',),
+}
+
+
+class AhoCorasick:
+    """多模式字符串匹配自动机"""
+
+    def __init__(self, patterns: List[str]):
+        """
+        Args:
+            patterns: 模式串列表（空串被忽略），find() 返回其下标
+        """
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # 以该状态结尾的模式下标
+        self.out: List[List[int]] = [[]]
+        # 沿失败链最近的、有输出的状态（字典后缀链接），保证匹配耗时与输出数量线性相关
+        self.dict_link: List[int] = [0]
+        for index, pattern in enumerate(patterns):
+            if pattern:
+                self._insert(pattern, index)
+        self._build()
+
+    def _insert(self, pattern: str, index: int):
+        state = 0
+        for char in pattern:
+            nxt = self.goto[state].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+                self.dict_link.append(0)
+            state = nxt
+        self.out[state].append(index)
+
+    def _build(self):
+        """按广度优先计算失败链接和字典后缀链接"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                link = self.fail[nxt]
+                self.dict_link[nxt] = link if self.out[link] else self.dict_link[link]
+
+    def find(self, text: str) -> Set[int]:
+        """文本中出现过的模式下标"""
+        goto, fail, out, dict_link = self.goto, self.fail, self.out, self.dict_link
+        found: Set[int] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            match = state if out[state] else dict_link[state]
+            while match:
+                found.update(out[match])
+                match = dict_link[match]
+        return found
+
+
+def parse_rating(value) -> Optional[float]:
+    """解析评分（如 "5"、4、"4.0"），无法解析时返回 None"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r'\d+(?:\.\d+)?', str(value or ''))
+    return float(match.group()) if match else None
+
+
+class Rule:
+    def __init__(self, spec: Dict):
+        """
+        Args:
+            spec: 规则文件中的一条规则，字段见模块说明
+
+        Raises:
+            ValueError: 规则缺少名称或条件、信息流无效、正则无法编译
+        """
+        self.name = str(spec.get('name') or '').strip()
+        if not self.name:
+            raise ValueError(f"规则缺少 name: {spec}")
+        self.keywords = [str(k).lower() for k in spec.get('keywords') or [] if str(k).strip()]
+        try:
+            self.regex = re.compile(spec['regex'], re.IGNORECASE) if spec.get('regex') else None
+        except re.error as e:
+            raise ValueError(f"规则 {self.name} 的正则无效: {e}")
+        if not self.keywords and self.regex is None:
+            raise ValueError(f"规则 {self.name} 需要 keywords 或 regex")
+        self.min_rating = spec.get('min_rating')
+        self.max_rating = spec.get('max_rating')
+        self.feeds = tuple(spec.get('feeds') or FEEDS)
+        unknown = set(self.feeds) - set(FEEDS)
+        if unknown:
+            raise ValueError(f"规则 {self.name} 的 feeds 无效: {sorted(unknown)}")
+
+    def accepts(self, text: str, record: Dict) -> bool:
+        """正则和评分条件（关键词已由自动机判断）"""
+        if self.min_rating is not None or self.max_rating is not None:
+            rating = parse_rating(record.get('rating'))
+            if rating is None:
+                return False
+            if self.min_rating is not None and rating < self.min_rating:
+                return False
+            if self.max_rating is not None and rating > self.max_rating:
+                return False
+        return self.regex is None or self.regex.search(text) is not None
+
+
+class KeywordRules:
+    def __init__(self, rules_file: str):
+        """
+        Args:
+            rules_file: 规则文件路径（JSON），修改后自动重新加载
+        """
+        self.rules_file = rules_file
+        self.rules: List[Rule] = []
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._build([])
+        self.reload()
+
+    def _build(self, rules: List[Rule]):
+        """把所有规则的关键词编译进一个自动机（按信息流分别编译）"""
+        self.rules = rules
+        self._automata: Dict[str, AhoCorasick] = {}
+        # 信息流 -> 关键词下标 -> [(规则下标, 关键词)]
+        self._keyword_rules: Dict[str, List[List[Tuple[int, str]]]] = {}
+        # 信息流 -> 只有正则的规则下标
+        self._regex_only: Dict[str, List[int]] = {}
+        for feed in FEEDS:
+            patterns: Dict[str, int] = {}
+            owners: List[List[Tuple[int, str]]] = []
+            regex_only = []
+            for i, rule in enumerate(rules):
+                if feed not in rule.feeds:
+                    continue
+                if not rule.keywords:
+                    regex_only.append(i)
+                for keyword in rule.keywords:
+                    if keyword not in patterns:
+                        patterns[keyword] = len(owners)
+                        owners.append([])
+                    owners[patterns[keyword]].append((i, keyword))
+            self._automata[feed] = AhoCorasick(list(patterns))
+            self._keyword_rules[feed] = owners
+            self._regex_only[feed] = regex_only
+
+    def reload(self) -> bool:
+        """
+        规则文件有变化时重新加载
+
+        Returns:
+            是否重新加载了规则
+        """
+        try:
+            stat = os.stat(self.rules_file)
+        except OSError:
+            if self._stamp is not None or self.rules:
+                print(f"⚠️ 规则文件不存在，已停用关键词规则: {self.rules_file}")
+                self._stamp = None
+                self._build([])
+            return False
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            with open(self.rules_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            specs = data.get('rules', []) if isinstance(data, dict) else data
+            rules = [Rule(spec) for spec in specs]
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            print(f"⚠️ 加载规则文件失败，继续使用之前的 {len(self.rules)} 条规则: {e}")
+            return False
+        self._build(rules)
+        keywords = sum(len(rule.keywords) for rule in rules)
+        print(f"🔍 已加载 {len(rules)} 条关键词规则（{keywords} 个关键词）: {self.rules_file}")
+        return True
+
+    def match(self, feed: str, record: Dict) -> List[Dict]:
+        """
+        匹配单条记录
+
+        Returns:
+            [{"rule": 规则名称, "keywords": [命中的关键词]}]，按规则文件中的顺序
+        """
+        text = '\n'.join(str(record.get(field) or '') for field in TEXT_FIELDS[feed]).lower()
+        hits: Dict[int, List[str]] = {}
+        owners = self._keyword_rules[feed]
+        for keyword_index in self._automata[feed].find(text):
+            for rule_index, keyword in owners[keyword_index]:
+                hits.setdefault(rule_index, []).append(keyword)
+        for rule_index in self._regex_only[feed]:
+            hits.setdefault(rule_index, [])
+        return [
+            {"rule": self.rules[i].name, "keywords": sorted(keywords)}
+            for i, keywords in sorted(hits.items())
+            if self.rules[i].accepts(text, record)
+        ]
+
+    def annotate(self, feed: str, records: List[Dict]) -> int:
+        """
+        匹配一批记录，命中的记录写入 matches 字段（随记录一起保存）
+
+        Returns:
+            命中至少一条规则的记录数
+        """
+        self.reload()
+        if not self.rules:
+            return 0
+        matched = 0
+        for record in records:
+            matches = self.match(feed, record)
+            if matches:
+                record['matches'] = matches
+                matched += 1
+        return matched
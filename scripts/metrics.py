@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+监控指标 - 各阶段耗时直方图与计数器
+
+指标以 Prometheus 文本格式通过可选的本地 /metrics 接口暴露，
+每轮抓取结束时另外把本轮的增量写成一行 JSON，便于离线分析和设置新鲜度 SLO。
+
+    taptap_stage_seconds{app_id, feed, stage}       阶段耗时直方图（goto/ready/scroll/evaluate/parse/dom/save）
+    taptap_items_total{app_id, feed, result}        抓取条目数（fetched/new/deduped）
+    taptap_extract_path_total{app_id, feed, path}   提取方式（http/network/projection/nuxt/dom/empty）
+    taptap_errors_total{app_id, feed, stage, type}  按异常类型统计的错误数
+    taptap_keyword_matches_total{app_id, feed, rule} 关键词规则命中的新记录数
+    taptap_near_dup_waves_total{app_id, feed}      一轮内大量新增相似内容（疑似刷帖/刷评）的次数
+    taptap_last_fetch_timestamp_seconds             最近一次抓取到数据的时间
+    taptap_last_new_item_timestamp_seconds          最近一次发现新条目的时间
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+PREFIX = 'taptap_'
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRIC_HELP = {
+    'stage_seconds': '各抓取阶段耗时（秒）',
+    'items': '抓取条目数（fetched=抓取, new=新增, deduped=已记录）',
+    'extract_path': '成功提取数据所用的方式',
+    'errors': '按异常类型统计的错误数',
+    'keyword_matches': '关键词规则命中的新记录数',
+    'near_dup_waves': '一轮内大量新增相似内容（疑似刷帖/刷评）的次数',
+    'last_fetch_timestamp_seconds': '最近一次抓取到数据的 Unix 时间',
+    'last_new_item_timestamp_seconds': '最近一次发现新条目的 Unix 时间',
+}
+
+# 标签的规范形式: 按名称排序的 ((名称, 值), ...)
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels, extra: str = '') -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Histogram:
+    """固定分桶的直方图"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+
+class Metrics:
+    def __init__(self, cycle_file: str = None, buckets: Tuple[float, ...] = STAGE_BUCKETS):
+        """
+        Args:
+            cycle_file: 每轮指标 JSON 行的追加文件，None 表示不写入
+            buckets: 阶段耗时直方图的分桶上界（秒）
+        """
+        self.cycle_file = cycle_file
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.gauges: Dict[str, Dict[Labels, float]] = {}
+        self.stages: Dict[Labels, Histogram] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._reset_cycle()
+
+    def _reset_cycle(self):
+        self._cycle_started = time.time()
+        self._cycle_counters: Dict[str, Dict[Labels, float]] = {}
+        self._cycle_stages: Dict[Labels, List[float]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """计数器加 value"""
+        key = _labels(labels)
+        with self._lock:
+            for counters in (self.counters, self._cycle_counters):
+                series = counters.setdefault(name, {})
+                series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """设置仪表值"""
+        with self._lock:
+            self.gauges.setdefault(name, {})[_labels(labels)] = value
+
+    def observe(self, seconds: float, **labels):
+        """记录一次阶段耗时"""
+        key = _labels(labels)
+        with self._lock:
+            histogram = self.stages.get(key)
+            if histogram is None:
+                histogram = self.stages[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            self._cycle_stages.setdefault(key, []).append(seconds)
+
+    @contextmanager
+    def timer(self, **labels):
+        """记录代码块耗时（出错时同样记录）"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start, **labels)
+
+    def error(self, exc: BaseException, **labels):
+        """按异常类型记录错误"""
+        self.inc('errors', type=type(exc).__name__, **labels)
+
+    def prometheus_text(self) -> str:
+        """Prometheus 文本格式"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                metric = f'{PREFIX}{name}_total'
+                lines.append(f'# HELP {metric} {METRIC_HELP.get(name, name)}')
+                lines.append(f'# TYPE {metric} counter')
+                lines.extend(f'{metric}{_format_labels(k)} {v:g}' for k, v in sorted(series.items()))
+            for name, series in sorted(self.gauges.items()):
+                metric = f'{PREFIX}{name}'
+                lines.append(f'# HELP {metric} {METRIC_HELP.get(name, name)}')
+                lines.append(f'# TYPE {metric} gauge')
+                lines.extend(f'{metric}{_format_labels(k)} {v:.3f}' for k, v in sorted(series.items()))
+            if self.stages:
+                metric = f'{PREFIX}stage_seconds'
+                lines.append(f'# HELP {metric} {METRIC_HELP["stage_seconds"]}')
+                lines.append(f'# TYPE {metric} histogram')
+                for key, histogram in sorted(self.stages.items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets + (float('inf'),), histogram.counts):
+                        cumulative += count
+                        le = 'le="+Inf"' if bound == float('inf') else f'le="{bound:g}"'
+                        lines.append(f'{metric}_bucket{_format_labels(key, le)} {cumulative}')
+                    lines.append(f'{metric}_sum{_format_labels(key)} {histogram.sum:.6f}')
+                    lines.append(f'{metric}_count{_format_labels(key)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def end_cycle(self, **extra) -> Dict:
+        """
+        结束一轮：汇总本轮增量，追加到 cycle_file 并重置
+
+        Returns:
+            本轮指标
+        """
+        now = time.time()
+        with self._lock:
+            record = {
+                "ts": datetime.fromtimestamp(now).isoformat(timespec='seconds'),
+                "cycle_seconds": round(now - self._cycle_started, 3),
+                **extra,
+                "stages": [
+                    dict(key, count=len(values), sum=round(sum(values), 3), max=round(max(values), 3))
+                    for key, values in sorted(self._cycle_stages.items())
+                ],
+            }
+            for name, series in sorted(self._cycle_counters.items()):
+                record[name] = [dict(key, value=value) for key, value in sorted(series.items())]
+            self._reset_cycle()
+        if self.cycle_file:
+            try:
+                os.makedirs(os.path.dirname(self.cycle_file) or '.', exist_ok=True)
+                with open(self.cycle_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            except OSError as e:
+                print(f"写入指标文件失败: {e}")
+        return record
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """在后台线程中启动 /metrics 接口"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        print(f"📈 指标接口: http://{host}:{port}/metrics")
+        return self._server
+
+    def close(self):
+        """停止 /metrics 接口"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+近似重复检测 - 用 MinHash + LSH 发现文字略有改动的刷帖/刷评
+
+每条新记录的文本（帖子标题和正文摘要、评价内容）去掉空白和标点后切成字符 2-gram（中文短评改动几个字仍有较高重合），计算 64 个 MinHash 值，
+分成 16 段 × 4 行写入 LSH 桶。只有至少一段完全相同的记录才会成为候选，再用 MinHash 估计相似度，
+达到阈值即归入同一个簇；同时与多个簇相似时合并这些簇（并查集），改动较多的变体也能汇聚到一起。
+每个桶只保留最近的若干条，单条记录的查找开销有固定上限，与历史数据量无关。
+
+草图追加写入数据文件旁的二进制日志，每条为定长记录:
+    去重键哈希(8) + 信息流(1) + 簇ID(8) + 时间戳(4) + MinHash(64 × 4)
+信息流字节带 MERGE_FLAG 的记录表示簇合并（去重键哈希位置存被合并的簇ID，MinHash 为空）。
+启动时只加载每个信息流最近的 max_items 条，日志超过两倍时压缩重写。
+"""
+import hashlib
+import os
+import random
+import re
+import struct
+import time
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from dedup_index import FEEDS, key_hash
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE = 2
+# 去掉空白和标点后不足该长度的文本（如"好玩"）太常见，不参与检测
+MIN_CHARS = 8
+# 每个 LSH 桶保留的最近记录数
+MAX_BUCKET = 32
+
+RECORD = struct.Struct('=QBQI')
+MERGE_FLAG = 0x80
+SIGNATURE_BYTES = NUM_PERM * 4
+RECORD_SIZE = RECORD.size + SIGNATURE_BYTES
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(0x7A97A9)
+# 固定种子生成的哈希置换 (a*x + b) mod p，保证不同运行之间的签名一致
+PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+
+# 参与检测的记录字段
+TEXT_FIELDS = {
+    'topic': ('title', 'content_preview'),
+    'review': ('content',),
+}
+
+
+def shingles(text: str) -> List[int]:
+    """规范化文本的字符 2-gram 哈希，文本过短时返回空列表"""
+    text = re.sub(r'[\W_]+', '', text.lower())
+    if len(text) < MIN_CHARS:
+        return []
+    return list({
+        int.from_bytes(hashlib.blake2b(text[i:i + SHINGLE].encode('utf-8'), digest_size=8).digest(), 'little')
+        for i in range(len(text) - SHINGLE + 1)
+    })
+
+
+def minhash(hashes: List[int]) -> array:
+    """MinHash 签名（每个值截断为 32 位）"""
+    return array('I', (min((a * h + b) % _MERSENNE for h in hashes) & 0xFFFFFFFF for a, b in PERMUTATIONS))
+
+
+def similarity(sig_a, sig_b) -> float:
+    """由 MinHash 签名估计的 Jaccard 相似度"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def _band_keys(signature) -> List[int]:
+    # 整数元组的哈希不受 PYTHONHASHSEED 影响，可用作桶键
+    return [hash((band,) + tuple(signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+class _FeedIndex:
+    """单个信息流的 LSH 索引"""
+
+    def __init__(self):
+        self.signatures: List[array] = []
+        self.clusters: List[int] = []
+        self.buckets: Dict[int, List[int]] = {}
+        # 按根簇统计的大小
+        self.sizes: Counter = Counter()
+        # 被合并的簇 -> 合并到的簇
+        self.parent: Dict[int, int] = {}
+
+    def find(self, cluster: int) -> int:
+        """簇合并后的根簇ID"""
+        root = cluster
+        while root in self.parent:
+            root = self.parent[root]
+        while cluster != root:
+            self.parent[cluster], cluster = root, self.parent[cluster]
+        return root
+
+    def merge(self, cluster: int, into: int) -> bool:
+        """合并两个簇，已是同一个簇时返回 False"""
+        cluster, into = self.find(cluster), self.find(into)
+        if cluster == into:
+            return False
+        self.parent[cluster] = into
+        self.sizes[into] += self.sizes.pop(cluster, 0)
+        return True
+
+    def query(self, signature, threshold: float) -> Tuple[Optional[int], float, List[int]]:
+        """
+        与已有记录比较
+
+        Returns:
+            (最相似的根簇, 相似度, 其他相似度达到阈值的根簇)，没有候选时为 (None, 0, [])
+        """
+        scores: Dict[int, float] = {}
+        seen = set()
+        for band_key in _band_keys(signature):
+            for i in self.buckets.get(band_key, ()):
+                if i in seen:
+                    continue
+                seen.add(i)
+                score = similarity(signature, self.signatures[i])
+                root = self.find(self.clusters[i])
+                if score > scores.get(root, 0.0):
+                    scores[root] = score
+        if not scores:
+            return None, 0.0, []
+        best = max(scores, key=scores.get)
+        return best, scores[best], [c for c, score in scores.items() if c != best and score >= threshold]
+
+    def add(self, signature, cluster: int):
+        i = len(self.signatures)
+        self.signatures.append(signature)
+        self.clusters.append(cluster)
+        self.sizes[self.find(cluster)] += 1
+        for band_key in _band_keys(signature):
+            bucket = self.buckets.setdefault(band_key, [])
+            bucket.append(i)
+            if len(bucket) > MAX_BUCKET:
+                del bucket[0]
+
+
+class NearDupIndex:
+    def __init__(self, log_file: str, threshold: float = 0.5, max_items: int = 20000, wave_size: int = 5):
+        """
+        Args:
+            log_file: 草图日志文件路径
+            threshold: 归入同一簇的最低相似度（0~1）
+            max_items: 每个信息流加载的最近记录数
+            wave_size: 同一簇在一轮内新增多少条时视为疑似刷帖/刷评
+        """
+        self.log_file = log_file
+        self.threshold = threshold
+        self.max_items = max_items
+        self.wave_size = wave_size
+        self.feeds: Dict[str, _FeedIndex] = {feed: _FeedIndex() for feed in FEEDS}
+        self._pending: List[bytes] = []
+        self._cycle: Counter = Counter()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.log_file):
+            return
+        with open(self.log_file, 'rb') as f:
+            data = f.read()
+        # 忽略写入中断留下的不完整尾部
+        count = len(data) // RECORD_SIZE
+        rows: Dict[str, List[Tuple[int, array]]] = {feed: [] for feed in FEEDS}
+        for n in range(count):
+            offset = n * RECORD_SIZE
+            h, feed_id, cluster, _ = RECORD.unpack_from(data, offset)
+            if feed_id & MERGE_FLAG and feed_id & ~MERGE_FLAG < len(FEEDS):
+                self.feeds[FEEDS[feed_id & ~MERGE_FLAG]].merge(h, cluster)
+            elif feed_id < len(FEEDS):
+                signature = array('I')
+                signature.frombytes(data[offset + RECORD.size:offset + RECORD_SIZE])
+                rows[FEEDS[feed_id]].append((cluster, signature))
+        for feed, items in rows.items():
+            for cluster, signature in items[-self.max_items:]:
+                self.feeds[feed].add(signature, cluster)
+        if count > 2 * self.max_items * len(FEEDS):
+            self._compact(data, count)
+
+    def _compact(self, data: bytes, count: int):
+        """只保留每个信息流最近的 max_items 条（簇合并记录全部保留）"""
+        merges: List[bytes] = []
+        kept: Dict[int, List[bytes]] = {i: [] for i in range(len(FEEDS))}
+        for n in range(count):
+            record = data[n * RECORD_SIZE:(n + 1) * RECORD_SIZE]
+            if record[8] & MERGE_FLAG:
+                merges.append(record)
+            elif record[8] < len(FEEDS):
+                kept[record[8]].append(record)
+        tmp_file = self.log_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(b''.join(merges))
+            for records in kept.values():
+                f.write(b''.join(records[-self.max_items:]))
+        os.replace(tmp_file, self.log_file)
+
+    def label(self, feed: str, key: str, record: Dict) -> Optional[Dict]:
+        """
+        检测一条新记录并写入 near_dup 字段：{"cluster": 簇ID, "similarity": 与最相似记录的相似度, "size": 簇大小}
+
+        Returns:
+            标签，文本过短时返回 None
+        """
+        hashes = shingles(' '.join(str(record.get(field) or '') for field in TEXT_FIELDS[feed]))
+        if not hashes:
+            return None
+        signature = minhash(hashes)
+        index = self.feeds[feed]
+        feed_id = FEEDS.index(feed)
+        now = int(time.time())
+        cluster, score, others = index.query(signature, self.threshold)
+        if cluster is None or score < self.threshold:
+            cluster, score = key_hash(key), 0.0
+        for other in others:
+            if index.merge(other, cluster):
+                self._pending.append(RECORD.pack(other, feed_id | MERGE_FLAG, cluster, now) + bytes(SIGNATURE_BYTES))
+        index.add(signature, cluster)
+        self._cycle[(feed, cluster)] += 1
+        self._pending.append(RECORD.pack(key_hash(key), feed_id, cluster, now) + signature.tobytes())
+        record['near_dup'] = {"cluster": f"{cluster:016x}", "similarity": round(score, 3),
+                              "size": index.sizes[cluster]}
+        return record['near_dup']
+
+    def waves(self) -> List[Tuple[str, str, int, int]]:
+        """
+        结束一轮：本轮新增达到 wave_size 的簇，并重置本轮计数
+
+        Returns:
+            [(信息流, 簇ID, 本轮新增数, 簇大小)]，按本轮新增数从多到少
+        """
+        added: Counter = Counter()
+        for (feed, cluster), count in self._cycle.items():
+            added[(feed, self.feeds[feed].find(cluster))] += count
+        found = [
+            (feed, f"{cluster:016x}", count, self.feeds[feed].sizes[cluster])
+            for (feed, cluster), count in added.most_common()
+            if count >= self.wave_size
+        ]
+        self._cycle.clear()
+        return found
+
+    def flush(self):
+        """追加写入本次新增的草图"""
+        if not self._pending:
+            return
+        os.makedirs(os.path.dirname(self.log_file) or '.', exist_ok=True)
+        with open(self.log_file, 'ab') as f:
+            f.write(b''.join(self._pending))
+        self._pending = []
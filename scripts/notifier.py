@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+新内容推送 - 把每轮发现的新帖子/新评价合并为钉钉摘要消息
+
+监控器每轮在保存数据之前调用 add()，每条新内容写入磁盘上的发件箱（见 outbox.py），一轮结束时调用 flush() 唤醒后台线程。
+后台线程把同一时间待发送的所有条目合并为不超过大小上限的几条消息，
+通过 dingtalk-push/notify.py 的 DingTalkClient（keep-alive 连接 + 滑动窗口限流）发送，失败时按指数退避重试。
+钉钉变慢或不可用只会让发件箱积压，不会阻塞监控。
+"""
+import hashlib
+import os
+import sys
+from typing import Dict, List
+
+from database import review_key, topic_key
+from outbox import NotificationOutbox, OutboxWorker
+
+# dingtalk-push 目录名带连字符，不能作为包导入
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dingtalk-push'))
+from notify import MAX_MARKDOWN_BYTES, RATE_PER_MINUTE, DingTalkClient  # noqa: E402
+
+REVIEW_PREVIEW_CHARS = 200
+
+
+def _match_tag(item: Dict) -> str:
+    """命中的关键词规则（见 keyword_rules.py）和近似重复簇大小（见 near_dup.py）"""
+    tags = []
+    rules = [m['rule'] for m in item.get('matches') or []]
+    if rules:
+        tags.append(f"🔔 **{'、'.join(rules)}**")
+    near_dup = item.get('near_dup')
+    if near_dup and near_dup.get('similarity'):
+        tags.append(f"♻️ 相似×{near_dup['size']}")
+    return ''.join(f"{tag} · " for tag in tags)
+
+
+def _topic_section(topic: Dict) -> str:
+    title = topic.get('title') or '(无标题)'
+    line = f"[{title}]({topic['link']})" if topic.get('link') else title
+    return (f"- {_match_tag(topic)}**{line}**  \n"
+            f"  {topic.get('author', '')} · {topic.get('time', '')} · 👍 {topic.get('likes', 0)} 💬 {topic.get('comments', 0)}")
+
+
+def _review_section(review: Dict) -> str:
+    content = (review.get('content') or '').replace('\n', ' ')
+    if len(content) > REVIEW_PREVIEW_CHARS:
+        content = content[:REVIEW_PREVIEW_CHARS] + '...'
+    return (f"- {_match_tag(review)}**{review.get('rating', '')}** · {review.get('author', '')} · {review.get('time', '')}  \n"
+            f"  {content}")
+
+
+def _idempotency_key(app_id: str, feed: str, key: str, section: str) -> str:
+    """幂等键：游戏ID:信息流:去重键（去重键为空时使用内容哈希）"""
+    if not key:
+        key = "h:" + hashlib.blake2b(section.encode('utf-8'), digest_size=12).hexdigest()
+    return f"{app_id}:{feed}:{key}"
+
+
+class DigestNotifier:
+    def __init__(self, outbox_file: str, client: DingTalkClient = None, max_bytes: int = MAX_MARKDOWN_BYTES):
+        """
+        Args:
+            outbox_file: 发件箱数据库路径
+            client: 钉钉客户端，默认按环境变量 DINGTALK_WEBHOOK / DINGTALK_SECRET 创建
+            max_bytes: 单条消息的大小上限（字节）
+        """
+        os.makedirs(os.path.dirname(outbox_file) or '.', exist_ok=True)
+        self.client = client or DingTalkClient()
+        self.outbox = NotificationOutbox(outbox_file)
+        self.worker = OutboxWorker(outbox_file, self.client, max_bytes=max_bytes)
+        self.worker.start()
+        pending = self.outbox.pending_count()
+        if pending:
+            print(f"📮 发件箱中有 {pending} 条未发送的新内容，继续发送")
+
+    def add(self, app_id: str, new_topics: List[Dict], new_reviews: List[Dict]) -> int:
+        """
+        写入一轮的新内容（只落盘，由后台线程发送）
+
+        Returns:
+            新入队的条目数（已入队过的条目被忽略）
+        """
+        entries = []
+        for feed, items, heading, key_func, section_func in (
+            ('topic', new_topics, f"#### 🆕 游戏 {app_id} 新帖子", topic_key, _topic_section),
+            ('review', new_reviews, f"#### ⭐ 游戏 {app_id} 新评价", review_key, _review_section),
+        ):
+            for item in items:
+                section = section_func(item)
+                entries.append((_idempotency_key(app_id, feed, key_func(item), section), heading, section))
+        return self.outbox.enqueue(entries) if entries else 0
+
+    def flush(self):
+        """一轮结束时唤醒后台线程发送"""
+        self.worker.wake()
+
+    def close(self, drain_timeout: float = 10):
+        """等待最多 drain_timeout 秒发送剩余条目，未发送的留在发件箱中"""
+        self.worker.stop(drain_timeout)
+        pending = self.outbox.pending_count()
+        if pending:
+            print(f"📮 发件箱中还有 {pending} 条未发送，下次运行时继续")
+        self.outbox.close()
+        self.client.close()
+
+
+def create_notifier(outbox_file: str, rate_per_minute: float = RATE_PER_MINUTE) -> DigestNotifier:
+    """按环境变量创建钉钉摘要推送"""
+    return DigestNotifier(outbox_file, DingTalkClient(rate_per_minute=rate_per_minute))
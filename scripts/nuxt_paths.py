@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+NUXT 列表路径缓存 - 记住信息流列表在 NUXT 状态树中的位置
+
+页面结构很少变化，优先按上次找到列表的路径直接取值，只有路径失效时才遍历整棵树。
+遍历使用显式栈迭代完成，只在命中时复制路径，不在每一层构造结果列表。
+"""
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 路径由字典键 (str) 和列表下标 (int) 组成
+Path = List[Any]
+# 匹配函数：节点是包含目标列表的字典时返回列表所在的键，否则返回 None
+Matcher = Callable[[dict], Optional[str]]
+
+_MISSING = object()
+
+
+def match_moment_list(node: dict) -> Optional[str]:
+    """帖子列表: list 字段的元素包含 moment"""
+    items = node.get('list')
+    if isinstance(items, list) and items and isinstance(items[0], dict) and 'moment' in items[0]:
+        return 'list'
+    return None
+
+
+def match_review_list(node: dict) -> Optional[str]:
+    """评价列表: 非空的 reviews 字段，或元素包含 rating/score/review 的 list 字段"""
+    reviews = node.get('reviews')
+    if isinstance(reviews, list) and reviews:
+        return 'reviews'
+    items = node.get('list')
+    if isinstance(items, list) and items and isinstance(items[0], dict):
+        if any(k in items[0] for k in ('rating', 'score', 'review')):
+            return 'list'
+    return None
+
+
+def resolve_path(root: Any, path: Path) -> Any:
+    """按路径取值，路径失效时返回 _MISSING"""
+    obj = root
+    for key in path:
+        try:
+            obj = obj[key]
+        except (KeyError, IndexError, TypeError):
+            return _MISSING
+    return obj
+
+
+def find_lists(root: Any, match: Matcher, max_depth: int, first_only: bool = False) -> List[Tuple[Path, list]]:
+    """
+    迭代深度优先（先序）查找目标列表
+
+    Args:
+        root: NUXT 状态树
+        match: 匹配函数
+        max_depth: 最大遍历深度（根为 0）
+        first_only: 找到第一个即返回
+
+    Returns:
+        [(路径, 列表)]，按遍历顺序排列
+    """
+    found = []
+    path: Path = []
+    stack = []
+    node = root
+    while True:
+        if isinstance(node, dict):
+            key = match(node)
+            if key is not None:
+                found.append((path + [key], node[key]))
+                if first_only:
+                    return found
+        if len(path) < max_depth:
+            if isinstance(node, dict):
+                stack.append(iter(node.items()))
+                path.append(None)
+            elif isinstance(node, list):
+                stack.append(enumerate(node))
+                path.append(None)
+        # 取下一个待访问节点
+        while stack:
+            step = next(stack[-1], _MISSING)
+            if step is _MISSING:
+                stack.pop()
+                path.pop()
+                continue
+            path[-1], node = step
+            break
+        else:
+            return found
+
+
+class NuxtPathCache:
+    """按 信息流:来源 记住列表路径，并统计命中/未命中次数"""
+
+    def __init__(self, path_file: str = None):
+        """
+        Args:
+            path_file: 持久化文件路径，None 表示只保存在内存中
+        """
+        self.path_file = path_file
+        self.paths: Dict[str, List[Path]] = {}
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self._load()
+
+    def _load(self):
+        if self.path_file and os.path.exists(self.path_file):
+            try:
+                with open(self.path_file, 'r', encoding='utf-8') as f:
+                    self.paths = json.load(f)
+            except Exception as e:
+                print(f"加载 NUXT 路径缓存失败: {e}")
+
+    def _save(self):
+        if not self.path_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path_file) or '.', exist_ok=True)
+            with open(self.path_file, 'w', encoding='utf-8') as f:
+                json.dump(self.paths, f, ensure_ascii=False)
+        except Exception as e:
+            print(f"保存 NUXT 路径缓存失败: {e}")
+
+    def get(self, key: str) -> List[Path]:
+        """获取缓存的路径列表"""
+        return self.paths.get(key, [])
+
+    def record(self, key: str, hit: bool, paths: List[Path] = None):
+        """记录一次查找结果；未命中时用新找到的路径更新缓存"""
+        if hit:
+            self.hits[key] = self.hits.get(key, 0) + 1
+            return
+        if key in self.paths:
+            self.misses[key] = self.misses.get(key, 0) + 1
+            print(f"⚠️ NUXT 列表路径缓存未命中 ({key})，累计 {self.misses[key]} 次，页面结构可能已变化")
+        if paths is not None and paths != self.paths.get(key):
+            if paths:
+                self.paths[key] = paths
+            else:
+                self.paths.pop(key, None)
+            self._save()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """各键的命中/未命中次数"""
+        return {
+            key: {"hits": self.hits.get(key, 0), "misses": self.misses.get(key, 0)}
+            for key in sorted(set(self.hits) | set(self.misses) | set(self.paths))
+        }
+
+    def find(self, root: Any, key: str, match: Matcher, max_depth: int, first_only: bool = False) -> List[list]:
+        """
+        查找目标列表：先尝试缓存路径，失效时完整遍历并更新缓存
+
+        Returns:
+            找到的列表
+        """
+        cached = self.get(key)
+        if cached:
+            lists = []
+            for path in cached:
+                parent = resolve_path(root, path[:-1])
+                if not isinstance(parent, dict) or match(parent) != path[-1]:
+                    break
+                lists.append(parent[path[-1]])
+            else:
+                self.record(key, True)
+                return lists
+
+        found = find_lists(root, match, max_depth, first_only)
+        self.record(key, False, [path for path, _ in found])
+        return [items for _, items in found]
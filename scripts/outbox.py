@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+推送发件箱 - 先落盘再发送，钉钉变慢或不可用时不阻塞监控
+
+监控器把每条新内容以 (幂等键, 分组标题, Markdown 段落) 写入 SQLite 发件箱（INSERT OR IGNORE，常数时间），
+后台线程取出待发送的条目，用 dingtalk-push/notify.py 的 pack_digest 合并为摘要消息发送。HTTP 状态非 200、响应不是 JSON 或 errcode 非 0 时，
+按指数退避重新安排发送，超过最大次数后标记为放弃。
+
+幂等键为 游戏ID:信息流:去重键。监控器在保存数据之前入队，进程在入队后、保存前退出时，
+重启后同一条目会再次入队但被主键忽略；已发送成功但未来得及标记时会重发一次（至少一次投递）。
+"""
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+import requests
+
+# dingtalk-push 目录名带连字符，不能作为包导入
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dingtalk-push'))
+from notify import MAX_MARKDOWN_BYTES, pack_digest  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    key TEXT PRIMARY KEY,
+    grp TEXT NOT NULL,
+    section TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    sent_at REAL,
+    failed_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (next_attempt) WHERE sent_at IS NULL AND failed_at IS NULL;
+"""
+
+# (幂等键, 分组标题, Markdown 段落)
+Entry = Tuple[str, str, str]
+
+# 已发送记录保留天数（用于幂等判断）
+KEEP_SENT_DAYS = 30
+
+
+class NotificationOutbox:
+    def __init__(self, db_file: str):
+        """
+        Args:
+            db_file: 发件箱数据库路径（每个线程使用各自的实例）
+        """
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def enqueue(self, entries: Iterable[Entry]) -> int:
+        """
+        写入待发送条目，幂等键已存在的条目被忽略
+
+        Returns:
+            新写入的条目数
+        """
+        now = time.time()
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO outbox (key, grp, section, created_at, next_attempt) VALUES (?, ?, ?, ?, ?)",
+                ((key, group, section, now, now) for key, group, section in entries),
+            )
+            return self.conn.total_changes - before
+
+    def due(self, limit: int = 500) -> List[Tuple[str, str, str, int]]:
+        """到期待发送的条目 [(键, 分组, 段落, 已尝试次数)]，按分组和入队时间排序"""
+        return self.conn.execute(
+            "SELECT key, grp, section, attempts FROM outbox "
+            "WHERE sent_at IS NULL AND failed_at IS NULL AND next_attempt <= ? "
+            "ORDER BY grp, created_at, key LIMIT ?",
+            (time.time(), limit),
+        ).fetchall()
+
+    def next_due(self) -> Optional[float]:
+        """最早的下次发送时间，没有待发送条目时返回 None"""
+        row = self.conn.execute(
+            "SELECT MIN(next_attempt) FROM outbox WHERE sent_at IS NULL AND failed_at IS NULL"
+        ).fetchone()
+        return row[0] if row else None
+
+    def pending_count(self) -> int:
+        """待发送条目数"""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM outbox WHERE sent_at IS NULL AND failed_at IS NULL"
+        ).fetchone()[0]
+
+    def mark_sent(self, keys: List[str]):
+        with self.conn:
+            self.conn.executemany("UPDATE outbox SET sent_at = ?, last_error = NULL WHERE key = ?",
+                                  ((time.time(), key) for key in keys))
+
+    def mark_retry(self, keys: List[str], error: str, delay: float):
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt = ?, last_error = ? WHERE key = ?",
+                ((time.time() + delay, error, key) for key in keys),
+            )
+
+    def mark_failed(self, keys: List[str], error: str):
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, failed_at = ?, last_error = ? WHERE key = ?",
+                ((time.time(), error, key) for key in keys),
+            )
+
+    def prune(self, keep_days: float = KEEP_SENT_DAYS) -> int:
+        """删除过期的已发送/已放弃记录"""
+        cutoff = time.time() - keep_days * 86400
+        with self.conn:
+            return self.conn.execute(
+                "DELETE FROM outbox WHERE COALESCE(sent_at, failed_at) < ?", (cutoff,)
+            ).rowcount
+
+
+class OutboxWorker(threading.Thread):
+    """后台发送线程：取出到期条目，合并发送，失败时按指数退避重试"""
+
+    def __init__(self, db_file: str, client, title: str = "TapTap 新内容", max_bytes: int = MAX_MARKDOWN_BYTES,
+                 base_delay: float = 5, max_delay: float = 900, max_attempts: int = 12):
+        """
+        Args:
+            db_file: 发件箱数据库路径
+            client: 提供 deliver(data) -> (状态码, 响应JSON) 的钉钉客户端
+            title: 消息标题
+            max_bytes: 单条消息的大小上限（字节）
+            base_delay: 首次重试的等待秒数，之后每次翻倍
+            max_delay: 重试等待的上限（秒）
+            max_attempts: 最多尝试次数，超过后标记为放弃
+        """
+        super().__init__(name='outbox-worker', daemon=True)
+        self.db_file = db_file
+        self.client = client
+        self.title = title
+        self.max_bytes = max_bytes
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._idle = threading.Event()
+
+    def wake(self):
+        """有新条目入队时唤醒"""
+        self._idle.clear()
+        self._wake.set()
+
+    def stop(self, drain_timeout: float = 10):
+        """
+        停止线程：先等待最多 drain_timeout 秒把到期条目发完，未发完的留在发件箱中下次启动继续
+        """
+        if self.is_alive():
+            self.wake()
+            self._idle.wait(drain_timeout)
+            self._stopping.set()
+            self._wake.set()
+            self.join(timeout=self.client.timeout + 5 if hasattr(self.client, 'timeout') else 15)
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** attempts))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _send(self, content: str, count: int) -> Optional[str]:
+        """发送一条消息，成功返回 None，否则返回错误描述"""
+        title = f"{self.title} ({count} 条)"
+        try:
+            status, result = self.client.deliver({"msgtype": "markdown", "markdown": {"title": title, "text": content}})
+        except requests.RequestException as e:
+            return f"{type(e).__name__}: {e}"
+        if status != 200:
+            return f"HTTP {status}"
+        if result is None:
+            return "响应不是 JSON"
+        if result.get("errcode", 0) != 0:
+            return f"errcode {result.get('errcode')}: {result.get('errmsg')}"
+        return None
+
+    def drain(self, outbox: NotificationOutbox) -> int:
+        """发送所有到期条目，返回成功发送的条目数"""
+        sent = 0
+        rows = outbox.due()
+        for content, indexes in pack_digest([(grp, section) for _, grp, section, _ in rows], self.max_bytes):
+            if self._stopping.is_set():
+                break
+            members = [rows[i] for i in indexes]
+            keys = [key for key, _, _, _ in members]
+            error = self._send(content, len(keys))
+            if error is None:
+                outbox.mark_sent(keys)
+                sent += len(keys)
+                continue
+            attempts = max(a for _, _, _, a in members) + 1
+            if attempts >= self.max_attempts:
+                outbox.mark_failed(keys, error)
+                print(f"❌ 推送 {len(keys)} 条失败 {attempts} 次，已放弃: {error}")
+            else:
+                delay = self._backoff(attempts - 1)
+                outbox.mark_retry(keys, error, delay)
+                print(f"⚠️ 推送 {len(keys)} 条失败，{delay:.0f} 秒后重试: {error}")
+        return sent
+
+    def run(self):
+        outbox = NotificationOutbox(self.db_file)
+        try:
+            outbox.prune()
+            while not self._stopping.is_set():
+                self._wake.clear()
+                try:
+                    sent = self.drain(outbox)
+                    if sent:
+                        print(f"📢 已推送 {sent} 条新内容，发件箱剩余 {outbox.pending_count()} 条")
+                    next_due = outbox.next_due()
+                except sqlite3.Error as e:
+                    print(f"读取发件箱失败: {e}")
+                    next_due = time.time() + self.base_delay
+                if next_due is None or next_due > time.time():
+                    self._idle.set()
+                wait = self.max_delay if next_due is None else max(0.0, next_due - time.time())
+                self._wake.wait(wait)
+        finally:
+            outbox.close()
+
+
+def self_check() -> bool:
+    """
+    用本地替身 Webhook 验证发件箱：依次返回 HTTP 500、errcode 130101、成功，
+    确认按指数退避重试，且模拟重启（重新入队、新的后台线程）后每个幂等键只投递一次
+
+    Returns:
+        全部检查通过时返回 True
+    """
+    import json
+    import tempfile
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from notify import DingTalkClient
+
+    replies = [(500, {"errcode": -1, "errmsg": "server error"}),
+               (200, {"errcode": 130101, "errmsg": "send too fast"})]
+    # (收到时间, HTTP 状态, errcode, 消息内容)
+    received: List[Tuple[float, int, int, str]] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            status, reply = replies.pop(0) if replies else (200, {"errcode": 0, "errmsg": "ok"})
+            received.append((time.monotonic(), status, reply["errcode"], body["markdown"]["text"]))
+            data = json.dumps(reply).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = DingTalkClient(webhook=f"http://127.0.0.1:{server.server_address[1]}/robot/send?access_token=check",
+                            secret="check", timeout=5)
+    entries = [(f"check:topic:{i}", "#### 帖子", f"- 帖子 {i}") for i in range(3)]
+    entries += [(f"check:review:{i}", "#### 评价", f"- 评价 {i}") for i in range(2)]
+    failures = []
+
+    def wait_for(condition, timeout: float = 10) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if condition():
+                return True
+            time.sleep(0.02)
+        return False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, 'outbox.db')
+        outbox = NotificationOutbox(db_file)
+        try:
+            # 第一次运行: 500 与 130101 都按失败处理，退避后重试
+            outbox.enqueue(entries)
+            worker = OutboxWorker(db_file, client, base_delay=0.2)
+            worker.start()
+            if not wait_for(lambda: len(received) >= 2):
+                failures.append(f"失败后没有重试，只收到 {len(received)} 次请求")
+            worker.stop(drain_timeout=0)
+            attempts = {row[0] for row in outbox.conn.execute("SELECT DISTINCT attempts FROM outbox")}
+            if attempts != {2}:
+                failures.append(f"两次失败后的尝试次数应为 2，实际为 {sorted(attempts)}")
+
+            # 模拟重启: 监控器重新入队同一批条目，新的后台线程继续发送
+            if outbox.enqueue(entries) != 0:
+                failures.append("重启后重新入队的条目没有被幂等键忽略")
+            worker = OutboxWorker(db_file, client, base_delay=0.2)
+            worker.start()
+            if not wait_for(lambda: outbox.pending_count() == 0):
+                failures.append(f"重启后没有发完，剩余 {outbox.pending_count()} 条")
+            worker.stop()
+
+            # 再次重启: 已发送的条目不再投递
+            outbox.enqueue(entries)
+            worker = OutboxWorker(db_file, client, base_delay=0.2)
+            worker.start()
+            worker.wake()
+            worker.stop()
+        finally:
+            outbox.close()
+            client.close()
+            server.shutdown()
+            server.server_close()
+
+    print("替身 Webhook 收到的请求: " + ", ".join(
+        f"HTTP {status}/errcode {errcode} @{at - received[0][0]:.2f}s" for at, status, errcode, _ in received))
+    if [(status, errcode) for _, status, errcode, _ in received] != [(500, -1), (200, 130101), (200, 0)]:
+        failures.append("请求序列应为 HTTP 500、errcode 130101、成功各一次")
+    elif not received[2][0] - received[1][0] > received[1][0] - received[0][0]:
+        failures.append("重试间隔没有按指数增长")
+    delivered = "\n".join(text for _, status, errcode, text in received if status == 200 and errcode == 0)
+    for _, _, section in entries:
+        count = delivered.count(section + "\n") + delivered.endswith(section)
+        if count != 1:
+            failures.append(f"{section!r} 成功投递 {count} 次，应为 1 次")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ 退避重试、重启后不丢失、每个幂等键只投递一次")
+    return not failures
+
+
+def main():
+    """命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="钉钉推送发件箱")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("check", help="用本地替身 Webhook 验证退避重试和幂等投递")
+
+    args = parser.parse_args()
+    if args.command == "check":
+        sys.exit(0 if self_check() else 1)
+
+
+if __name__ == "__main__":
+    main()
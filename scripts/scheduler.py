@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+自适应轮询调度 - 按每个 (游戏, 信息流) 的新内容到达速率调整轮询间隔
+
+到达速率用指数加权平均估计，间隔取 期望每次抓到的新条目数 / 速率，限制在 [最小间隔, 最大间隔] 内并加随机抖动。
+到期任务由优先队列（按到期时间排序的堆）取出；所有任务共享请求预算，
+任意 base_interval 时间窗口内的轮询次数不超过任务数，即不超过固定间隔轮询的请求量。
+"""
+import heapq
+import itertools
+import random
+import time
+from collections import deque
+from typing import Dict, Hashable, List, Optional
+
+
+class FeedRate:
+    """单个任务的到达速率估计"""
+
+    def __init__(self):
+        self.rate: Optional[float] = None  # 新条目数/秒
+        self.last_poll: Optional[float] = None
+        self.interval: float = 0.0
+
+
+class AdaptiveScheduler:
+    def __init__(self, base_interval: float, min_interval: float = None, max_interval: float = None,
+                 jitter: float = 0.1, target_per_poll: float = 5, alpha: float = 0.3):
+        """
+        Args:
+            base_interval: 固定轮询时的间隔（秒），也是请求预算的时间窗口
+            min_interval: 最小轮询间隔（秒），默认 base_interval / 3
+            max_interval: 最大轮询间隔（秒），默认 base_interval * 4
+            jitter: 随机抖动比例，避免多个任务同时到期
+            target_per_poll: 期望每次轮询抓到的新条目数
+            alpha: 速率指数加权平均的权重
+        """
+        self.base_interval = base_interval
+        self.min_interval = min_interval or base_interval / 3
+        self.max_interval = max(max_interval or base_interval * 4, self.min_interval)
+        self.jitter = max(0.0, jitter)
+        self.target_per_poll = target_per_poll
+        self.alpha = alpha
+        self.rates: Dict[Hashable, FeedRate] = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._polls = deque()
+
+    def add(self, job: Hashable, due: float = None):
+        """加入任务，默认立即到期"""
+        self.rates.setdefault(job, FeedRate())
+        heapq.heappush(self._heap, (time.monotonic() if due is None else due, next(self._seq), job))
+
+    def _budget_wait(self, now: float) -> float:
+        """请求预算用完时需要等待的秒数"""
+        while self._polls and now - self._polls[0] >= self.base_interval:
+            self._polls.popleft()
+        if len(self._polls) < len(self.rates):
+            return 0.0
+        return self.base_interval - (now - self._polls[0])
+
+    def wait_time(self) -> float:
+        """距离下一个任务可以执行的秒数"""
+        if not self._heap:
+            return self.max_interval
+        now = time.monotonic()
+        return max(self._heap[0][0] - now, self._budget_wait(now), 0.0)
+
+    def pop_due(self) -> List[Hashable]:
+        """取出所有已到期且在请求预算内的任务"""
+        now = time.monotonic()
+        jobs = []
+        while self._heap and self._heap[0][0] <= now and self._budget_wait(now) <= 0:
+            _, _, job = heapq.heappop(self._heap)
+            self._polls.append(now)
+            jobs.append(job)
+        return jobs
+
+    def record(self, job: Hashable, new_items: int) -> float:
+        """
+        记录一次轮询结果并安排下次轮询
+
+        Args:
+            job: 任务
+            new_items: 本次抓到的新条目数
+
+        Returns:
+            下次轮询的间隔（秒）
+        """
+        now = time.monotonic()
+        state = self.rates.setdefault(job, FeedRate())
+        if state.last_poll is not None:
+            sample = new_items / max(now - state.last_poll, 1.0)
+            state.rate = sample if state.rate is None else self.alpha * sample + (1 - self.alpha) * state.rate
+        state.last_poll = now
+        if state.rate is None:
+            interval = self.base_interval
+        elif state.rate > 0:
+            interval = self.target_per_poll / state.rate
+        else:
+            interval = self.max_interval
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        interval *= 1 + random.uniform(-self.jitter, self.jitter)
+        state.interval = interval
+        self.add(job, now + interval)
+        return interval
+
+    def rate_per_hour(self, job: Hashable) -> float:
+        """任务当前估计的每小时新条目数"""
+        state = self.rates.get(job)
+        return (state.rate or 0.0) * 3600 if state else 0.0
@@ -3,17 +3,534 @@
 TapTap 监控脚本 - 使用 Playwright 模拟真人浏览器获取动态渲染内容
 监控《盲盒派对》社区的最新帖子和评价
 """
+from __future__ import annotations
+
+import asyncio
 import json
 import time
 import re
 import sys
 import os
+import urllib.parse
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
-from playwright.sync_api import sync_playwright, Page, Browser
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple, Union
+import requests
+from requests.adapters import HTTPAdapter
+
+if TYPE_CHECKING:
+    # playwright 导入耗时较长，只在需要启动浏览器时导入
+    from playwright.sync_api import Page, Browser
+    from playwright.async_api import Page as AsyncPage, Browser as AsyncBrowser, BrowserContext as AsyncBrowserContext
+    # 推送模块会把 dingtalk-push 加入 sys.path，只在开启推送时导入
+    from notifier import DigestNotifier
+
+from browser_daemon import DEFAULT_ENDPOINT, daemon_reachable, serve_browser
+from browser_lifecycle import BrowserLifecycle, chromium_memory, format_memory
+from browser_profile import BrowserProfiles, CacheStats
+from database import SqliteStore, import_json, review_aliases, review_key, topic_key
+from debug_capture import DebugCapture
+from engagement import EngagementLog, parse_count
+from keyword_rules import KeywordRules
+from metrics import Metrics
+from dedup_index import DedupIndex
+from near_dup import NearDupIndex
+from nuxt_paths import NuxtPathCache, find_lists, match_moment_list, match_review_list
+from scheduler import AdaptiveScheduler
+from watermark import FeedWatermarks, epoch_seconds
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# 抓取引擎: browser=Playwright 渲染, http=直接解析服务端渲染的 NUXT 数据（失败时回退到浏览器）
+ENGINES = ("browser", "http")
+
+# 读取页面 NUXT 状态的脚本
+NUXT_STATE_JS = '''() => {
+    if (window.__NUXT__) return JSON.stringify(window.__NUXT__);
+    return null;
+}'''
+
+# NUXT 列表查找规则: 信息流 -> (匹配函数, 最大深度, 是否只取第一个)
+NUXT_LIST_RULES = {
+    'topic': (match_moment_list, 15, False),
+    'review': (match_review_list, 10, True),
+}
+
+# 页面内 NUXT 投影脚本：在浏览器中查找列表并只返回需要的字段，避免序列化整棵状态树。
+# 参数 [数量上限（null 表示不限）, 缓存的列表路径]；先按缓存路径取列表，失效时再遍历，返回 {hit, paths, items}。
+# 查找规则与 NUXT_LIST_RULES 保持一致，items 与 _project_moment / _project_review 的输出相同
+NUXT_FIND_LISTS_JS = '''
+    const root = window.__NUXT__;
+    if (!root) return null;
+    const resolve = (path) => {
+        let o = root;
+        for (const k of path) {
+            if (o === null || typeof o !== 'object') return undefined;
+            o = o[k];
+        }
+        return o;
+    };
+    let lists = [];
+    let paths = [];
+    let hit = false;
+    if (cachedPaths && cachedPaths.length) {
+        const resolved = [];
+        for (const p of cachedPaths) {
+            const parent = resolve(p.slice(0, -1));
+            if (!parent || typeof parent !== 'object' || Array.isArray(parent) || match(parent) !== p[p.length - 1]) break;
+            resolved.push(parent[p[p.length - 1]]);
+        }
+        if (resolved.length === cachedPaths.length) {
+            lists = resolved;
+            paths = cachedPaths;
+            hit = true;
+        }
+    }
+    if (!hit) {
+        const path = [];
+        const walk = (obj) => {
+            if (path.length > maxDepth || obj === null || typeof obj !== 'object') return false;
+            if (Array.isArray(obj)) {
+                for (let i = 0; i < obj.length; i++) {
+                    path.push(i);
+                    const done = walk(obj[i]);
+                    path.pop();
+                    if (done) return true;
+                }
+                return false;
+            }
+            const key = match(obj);
+            if (key !== null) {
+                lists.push(obj[key]);
+                paths.push(path.concat([key]));
+                if (firstOnly) return true;
+            }
+            for (const k in obj) {
+                path.push(k);
+                const done = walk(obj[k]);
+                path.pop();
+                if (done) return true;
+            }
+            return false;
+        };
+        walk(root);
+    }
+    const str = (v, n) => (typeof v === 'string' ? v.slice(0, n) : '');
+'''
+
+NUXT_TOPICS_PROJECTION_JS = '''([maxPosts, cachedPaths]) => {
+    const maxDepth = 15;
+    const firstOnly = false;
+    const match = (node) => {
+        const list = node.list;
+        return Array.isArray(list) && list.length && list[0] && typeof list[0] === 'object' && 'moment' in list[0]
+            ? 'list' : null;
+    };
+''' + NUXT_FIND_LISTS_JS + '''
+    const items = [];
+    for (const list of lists) {
+        for (const item of list.slice(0, maxPosts ?? list.length)) {
+            const m = item && item.moment;
+            if (!m) continue;
+            const topic = m.topic || {};
+            const stat = m.stat || {};
+            const user = (m.author && m.author.user) || {};
+            items.push({
+                id: m.id_str || m.id || null,
+                title: str(topic.title, 300),
+                summary: str(topic.summary, 300),
+                author: str(user.name, 50) || '未知',
+                created_time: m.created_time || m.publish_time || 0,
+                ups: stat.ups || 0,
+                comments: stat.comments || 0,
+            });
+        }
+    }
+    return { hit, paths, items };
+}'''
+
+NUXT_REVIEWS_PROJECTION_JS = '''([maxReviews, cachedPaths]) => {
+    const maxDepth = 10;
+    const firstOnly = true;
+    const match = (node) => {
+        if (Array.isArray(node.reviews) && node.reviews.length) return 'reviews';
+        const list = node.list;
+        if (Array.isArray(list) && list.length && list[0] && typeof list[0] === 'object'
+            && ['rating', 'score', 'review'].some(k => k in list[0])) {
+            return 'list';
+        }
+        return null;
+    };
+''' + NUXT_FIND_LISTS_JS + '''
+    const found = lists.length ? lists[0] : [];
+    const items = found.slice(0, maxReviews ?? found.length).filter(item => item && typeof item === 'object').map(item => ({
+        id: item.id_str || item.id || null,
+        user_id: (item.user && item.user.id) || (item.author && item.author.id) || null,
+        rating: item.rating || (item.score ?? ''),
+        content: str(item.content, 300) || str(item.text, 300),
+        author: str(item.user && item.user.name, 50) || str(item.author && item.author.name, 50) || '未知',
+        created_time: item.created_time || item.created_at || null,
+        likes: item.likes_count || item.useful_count || 0,
+    }));
+    return { hit, paths, items };
+}'''
+
+NUXT_PROJECTION_JS = {
+    'topic': NUXT_TOPICS_PROJECTION_JS,
+    'review': NUXT_REVIEWS_PROJECTION_JS,
+}
+
+# DOM 回退提取：一次 evaluate 取回所有卡片的原始文本、候选字段和链接，解析规则在 Python 中运行。
+# 参数: [卡片选择器列表, 通用选择器, 数量上限, 文本字段, 属性字段]
+#   文本字段: 名称 -> 选择器（取第一个匹配元素的 innerText，未找到为 null）或选择器列表（逐个取）
+#   属性字段: 名称 -> [选择器, 属性名]
+DOM_CARDS_JS = '''([selectors, fallback, limit, textFields, attrFields]) => {
+    const first = (el, sel) => {
+        try { return el.querySelector(sel); } catch (e) { return null; }
+    };
+    const text = (el) => (el ? el.innerText : null);
+    let elements = [];
+    let used = null;
+    let isFallback = false;
+    for (const sel of selectors) {
+        try {
+            const found = document.querySelectorAll(sel);
+            if (found.length) {
+                elements = Array.from(found);
+                used = sel;
+                break;
+            }
+        } catch (e) {}
+    }
+    if (!elements.length && fallback) {
+        elements = Array.from(document.querySelectorAll(fallback));
+        used = fallback;
+        isFallback = true;
+    }
+    const cards = elements.slice(0, limit).map(el => {
+        const card = { text: el.innerText };
+        for (const [name, sel] of Object.entries(textFields)) {
+            card[name] = Array.isArray(sel) ? sel.map(s => text(first(el, s))) : text(first(el, sel));
+        }
+        for (const [name, [sel, attr]] of Object.entries(attrFields)) {
+            const found = first(el, sel);
+            card[name] = found ? found.getAttribute(attr) : null;
+        }
+        return card;
+    });
+    return { selector: used, fallback: isFallback, total: elements.length, cards };
+}'''
+
+TOPIC_CARD_SELECTORS = [
+    '.moment-card',
+    '.moment-list-item',
+    '[class*="moment-card"]',
+    '[class*="topic-item"]',
+    'article[class*="card"]',
+]
+TOPIC_TITLE_SELECTORS = [
+    'h2', 'h3', 'h4',
+    '.title', '[class*="title"]',
+    '.moment-card__title', '.moment-card__content',
+    '[class*="content"]', '[class*="text"]',
+    'p',
+]
+TOPIC_AUTHOR_SELECTORS = ['.author', '.user-name', '[class*="author"]', '[class*="user"]', '[class*="name"]']
+REVIEW_CARD_SELECTORS = [
+    '.review-item',
+    '.review-card',
+    '[class*="review"]',
+    'article[class*="review"]',
+]
+
+# 各信息流的卡片选择器（用于就绪判断和滚动加载）
+CARD_SELECTORS = {
+    'topic': ', '.join(TOPIC_CARD_SELECTORS),
+    'review': ', '.join(REVIEW_CARD_SELECTORS),
+}
+
+# 页面就绪判断：NUXT 数据已存在（nuxt 提取方式）、卡片数量达到目标，或卡片数量在 settleMs 内不再增长
+READY_JS = '''([selector, target, settleMs, checkNuxt]) => {
+    if (checkNuxt && window.__NUXT__) return 'nuxt';
+    const n = document.querySelectorAll(selector).length;
+    const now = Date.now();
+    const s = window.__tapmonReady || (window.__tapmonReady = { n: -1, t: now });
+    if (n !== s.n) {
+        s.n = n;
+        s.t = now;
+    }
+    if (target && n >= target) return 'target';
+    return n > 0 && now - s.t >= settleMs ? 'stable' : false;
+}'''
+
+COUNT_CARDS_JS = '''(selector) => document.querySelectorAll(selector).length'''
+SCROLL_BOTTOM_JS = 'window.scrollTo(0, document.body.scrollHeight)'
+
+# 滚动后卡片数量是否增长
+CARDS_GREW_JS = '''([selector, before]) => document.querySelectorAll(selector).length > before'''
+
+# 浏览器启动参数与上下文配置（同步/异步引擎共用）
+BROWSER_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+]
+CONTEXT_OPTIONS = {
+    'viewport': {'width': 1920, 'height': 1080},
+    'user_agent': USER_AGENT,
+    'locale': 'zh-CN',
+}
+# 存储后端: json=整体重写数据文件, sqlite=增量写入 SQLite 数据库
+STORES = ("json", "sqlite")
+
+# 数据提取方式: nuxt=读取页面 NUXT 状态, network=监听信息流 JSON 接口响应
+EXTRACT_MODES = ("nuxt", "network")
+
+# 信息流的量词和名称（用于输出）
+FEED_NAMES = {
+    'topic': ('个', '帖子'),
+    'review': ('条', '评价'),
+}
+
+# 信息流 JSON 接口的 URL 特征
+FEED_API_PATTERNS = {
+    'topic': re.compile(r'/webapiv\d*/.*(moment|feed|topic)'),
+    'review': re.compile(r'/webapiv\d*/.*review'),
+}
+
+STEALTH_JS = """
+    Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
+"""
+
+
+def _unflatten_devalue(values: list):
+    """还原 Nuxt 3 `__NUXT_DATA__` 使用的 devalue 扁平化格式"""
+    hydrated = {}
+
+    def hydrate(index):
+        if index == -1 or index == -2:
+            return None
+        if index in (-3, -4, -5):
+            return float({-3: 'nan', -4: 'inf', -5: '-inf'}[index])
+        if index == -6:
+            return 0
+        if index in hydrated:
+            return hydrated[index]
+        value = values[index]
+        if not isinstance(value, (dict, list)):
+            hydrated[index] = value
+        elif isinstance(value, dict):
+            obj = {}
+            hydrated[index] = obj
+            for k, v in value.items():
+                obj[k] = hydrate(v)
+        elif value and isinstance(value[0], str):
+            kind = value[0]
+            if kind in ('Reactive', 'ShallowReactive', 'Ref', 'ShallowRef'):
+                hydrated[index] = hydrate(value[1])
+            elif kind in ('Date', 'RegExp', 'BigInt', 'Object'):
+                # Object 为装箱的原始值 (new Number(1) 等)，与 Date 一样直接内联原始值
+                hydrated[index] = value[1]
+            elif kind == 'Set':
+                items = []
+                hydrated[index] = items
+                items.extend(hydrate(v) for v in value[1:])
+            elif kind == 'Map':
+                obj = {}
+                hydrated[index] = obj
+                for i in range(1, len(value) - 1, 2):
+                    obj[str(hydrate(value[i]))] = hydrate(value[i + 1])
+            elif kind == 'null':
+                obj = {}
+                hydrated[index] = obj
+                for i in range(1, len(value) - 1, 2):
+                    obj[value[i]] = hydrate(value[i + 1])
+            else:
+                hydrated[index] = None
+        else:
+            items = []
+            hydrated[index] = items
+            items.extend(hydrate(v) for v in value)
+        return hydrated[index]
+
+    return hydrate(0)
+
+
+def extract_nuxt_from_html(html: str) -> Optional[dict]:
+    """
+    从服务端渲染的 HTML 中提取 NUXT 状态
+
+    支持 Nuxt 3 的 `<script id="__NUXT_DATA__">` 以及 `window.__NUXT__=` 后跟 JSON 字面量的形式。
+    Nuxt 2 的函数式载荷 (`window.__NUXT__=(function(a,b){...}(...))`) 需要 JS 引擎执行，返回 None 交给浏览器处理。
+    """
+    if not html:
+        return None
+
+    match = re.search(r'<script[^>]*id=["\']__NUXT_DATA__["\'][^>]*>(.*?)</script>', html, re.S)
+    if match:
+        try:
+            values = json.loads(match.group(1))
+            if isinstance(values, list) and values:
+                data = _unflatten_devalue(values)
+                if isinstance(data, dict):
+                    return data
+        except Exception as e:
+            print(f"解析 __NUXT_DATA__ 失败: {e}")
+
+    match = re.search(r'window\.__NUXT__\s*=\s*', html)
+    if match:
+        try:
+            data, _ = json.JSONDecoder().raw_decode(html, match.end())
+            if isinstance(data, dict):
+                return data
+        except ValueError:
+            pass
+    return None
+
+
+# 请求拦截档位: lean=拦截图片/字体/媒体和第三方域名（监控默认）, full=不拦截（--visible 调试默认）
+ROUTE_PROFILES = {
+    'lean': {
+        'block_types': ('image', 'media', 'font', 'texttrack', 'manifest'),
+        'allow_domains': ('taptap.cn', 'taptap.com', 'tapimg.com', 'tapimg.net', 'taptapdada.com'),
+    },
+    'full': {
+        'block_types': (),
+        'allow_domains': None,
+    },
+}
+
+
+class RouteProfile:
+    """
+    浏览器请求拦截配置与统计
+
+    按资源类型和域名白名单决定是否中止请求，并统计每轮拦截的请求数。
+    被拦截请求的节省字节数按各资源类型的历史平均大小估算，平均值来自实际加载过的响应
+    （lean 档位下图片等类型从不加载，可先用 full 档位运行一次校准），保存在 sizes_file 中。
+    """
+
+    def __init__(self, name: str = 'lean', sizes_file: str = None):
+        if name not in ROUTE_PROFILES:
+            raise ValueError(f"不支持的拦截档位: {name}")
+        config = ROUTE_PROFILES[name]
+        self.name = name
+        self.block_types = set(config['block_types'])
+        self.allow_domains = config['allow_domains']
+        self.sizes_file = sizes_file
+        # 资源类型 -> [响应数, 总字节数]
+        self.type_sizes: Dict[str, List[int]] = {}
+        # 使用持久化浏览器配置时的缓存命中统计，随拦截统计一起输出
+        self.cache_stats: Optional[CacheStats] = None
+        self._load_sizes()
+        self._reset_cycle()
+
+    @property
+    def active(self) -> bool:
+        """是否需要安装拦截路由"""
+        return bool(self.block_types) or self.allow_domains is not None
+
+    def _load_sizes(self):
+        """加载各资源类型的历史平均大小"""
+        if self.sizes_file and os.path.exists(self.sizes_file):
+            try:
+                with open(self.sizes_file, 'r', encoding='utf-8') as f:
+                    self.type_sizes = json.load(f)
+            except Exception as e:
+                print(f"加载资源大小统计失败: {e}")
+
+    def _save_sizes(self):
+        """保存各资源类型的历史平均大小"""
+        if not self.sizes_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.sizes_file) or '.', exist_ok=True)
+            with open(self.sizes_file, 'w', encoding='utf-8') as f:
+                json.dump(self.type_sizes, f)
+        except Exception as e:
+            print(f"保存资源大小统计失败: {e}")
+
+    def _reset_cycle(self):
+        self.blocked: Dict[str, int] = {}
+        self.blocked_bytes_estimate = 0
+        self.loaded_requests = 0
+        self.loaded_bytes = 0
+
+    def _domain_allowed(self, url: str) -> bool:
+        if self.allow_domains is None:
+            return True
+        host = urllib.parse.urlsplit(url).hostname
+        if not host:
+            # data:/blob: 等非网络请求
+            return True
+        return any(host == d or host.endswith('.' + d) for d in self.allow_domains)
 
-class TapTapMonitor:
-    def __init__(self, app_id: str = "236096", headless: bool = True, data_file: str = None):
+    def block_reason(self, resource_type: str, url: str) -> Optional[str]:
+        """返回拦截原因，None 表示放行"""
+        if resource_type in self.block_types:
+            return resource_type
+        if not self._domain_allowed(url):
+            return 'third-party'
+        return None
+
+    def record_blocked(self, reason: str, resource_type: str):
+        """记录一次拦截"""
+        self.blocked[reason] = self.blocked.get(reason, 0) + 1
+        count, total = self.type_sizes.get(resource_type, (0, 0))
+        if count:
+            self.blocked_bytes_estimate += total // count
+
+    def record_response(self, resource_type: str, headers: Dict[str, str]):
+        """记录一次实际加载的响应（按 content-length 计）"""
+        try:
+            size = int(headers.get('content-length', 0))
+        except (TypeError, ValueError):
+            size = 0
+        self.loaded_requests += 1
+        self.loaded_bytes += size
+        if size:
+            entry = self.type_sizes.setdefault(resource_type, [0, 0])
+            entry[0] += 1
+            entry[1] += size
+
+    def report(self) -> Dict:
+        """输出并重置本轮拦截统计"""
+        stats = {
+            "profile": self.name,
+            "blocked_requests": sum(self.blocked.values()),
+            "blocked_by_reason": dict(self.blocked),
+            "saved_bytes_estimate": self.blocked_bytes_estimate,
+            "loaded_requests": self.loaded_requests,
+            "loaded_bytes": self.loaded_bytes,
+        }
+        if stats["blocked_requests"] or self.loaded_requests:
+            detail = ', '.join(f"{k} {v}" for k, v in sorted(self.blocked.items(), key=lambda kv: -kv[1]))
+            saved = f"{self.blocked_bytes_estimate / 1024:.0f}KB" if self.blocked_bytes_estimate else "未知"
+            print(f"🚫 请求拦截 [{self.name}]: 拦截 {stats['blocked_requests']} 个"
+                  f"{f' ({detail})' if detail else ''}，预计节省 {saved}；"
+                  f"实际加载 {self.loaded_requests} 个 / {self.loaded_bytes / 1024:.0f}KB")
+        if self.cache_stats is not None:
+            stats["cache"] = self.cache_stats.report()
+        self._save_sizes()
+        self._reset_cycle()
+        return stats
+
+
+class MonitorBase:
+    """
+    同步/异步监控器共用的部分：数据加载与保存、去重、解析、浏览器提取级联和结果输出
+
+    不直接操作浏览器；子类负责打开页面并执行 _extraction_cascade 产出的页面操作。
+    """
+
+    def __init__(self, app_id: str = "236096", headless: bool = True, data_file: str = None,
+                 engine: str = "browser", extract: str = "nuxt", route_profile: Union[str, RouteProfile] = None,
+                 debug: Optional[DebugCapture] = None, store: str = "json", db_file: str = None,
+                 max_feed_pages: int = 5, near_dup: float = 0, near_dup_wave: int = 5,
+                 lifecycle: Optional[BrowserLifecycle] = None, browser_endpoint: Optional[str] = None,
+                 profiles: Optional[BrowserProfiles] = None, metrics: Optional[Metrics] = None,
+                 notifier: Optional[DigestNotifier] = None, keyword_rules: Optional[KeywordRules] = None):
         """
         初始化 TapTap 监控器
         
@@ -21,255 +538,644 @@ class TapTapMonitor:
             app_id: 游戏ID (盲盒派对为236096)
             headless: 是否无头模式运行浏览器
             data_file: 数据存储文件路径
+            engine: 抓取引擎 (browser=浏览器渲染, http=直接请求页面解析 NUXT，失败时回退到浏览器)
+            extract: 浏览器中的数据提取方式 (nuxt=读取 NUXT 状态, network=监听信息流接口响应)
+            route_profile: 请求拦截档位 (lean/full)，默认无头模式用 lean，可见模式用 full；也可传入已创建的 RouteProfile
+            debug: 调试快照配置，默认只在解析结果为空时保存
+            store: 存储后端 (json=整体重写数据文件, sqlite=增量写入数据库)；数据库中还没有该游戏的记录时自动导入已有的数据文件
+            db_file: SQLite 数据库路径（默认: 数据文件所在目录下的 taptap.db）
+            max_feed_pages: 按最新排序翻页直到越过水位线时，最多额外加载的页数
+            near_dup: 近似重复检测的相似度阈值（0~1），新记录带上 near_dup 簇标签；0 表示关闭
+            near_dup_wave: 同一簇在一轮内新增多少条时提示疑似刷帖/刷评
+            lifecycle: 浏览器上下文回收策略，默认导航 200 次、运行 6 小时或渲染进程超过 1 GB 时回收
+            browser_endpoint: 浏览器守护进程的 CDP 地址，可连接时复用守护进程的浏览器，否则自行启动；None 表示总是自行启动
+            profiles: 持久化浏览器配置目录，设置后使用 launch_persistent_context 跨运行复用 HTTP 缓存（不连接守护进程）
+            metrics: 阶段耗时与计数指标，默认只在内存中统计
+            notifier: 钉钉摘要推送，每轮结束时把新内容合并为少量消息发送；None 表示不推送
+            keyword_rules: 关键词告警规则，命中的新记录带上 matches 字段；None 表示不匹配
         """
+        if engine not in ENGINES:
+            raise ValueError(f"不支持的抓取引擎: {engine}")
+        if extract not in EXTRACT_MODES:
+            raise ValueError(f"不支持的提取方式: {extract}")
+        if store not in STORES:
+            raise ValueError(f"不支持的存储后端: {store}")
         self.app_id = app_id
         self.base_url = "https://www.taptap.cn"
         self.headless = headless
-        self.browser: Optional[Browser] = None
-        self.page: Optional[Page] = None
+        self.engine = engine
+        self.extract = extract
+        self.session: Optional[requests.Session] = None
+        # 各等待步骤的实际耗时（秒），用于调优超时参数
+        self.wait_timings: Dict[str, deque] = {}
+        self._pending_waits: Dict[str, List[str]] = {}
         self.data_file = data_file or f"data/{app_id}_data.json"
+        self.db: Optional[SqliteStore] = None
+        if store == "sqlite":
+            self.db = SqliteStore(db_file or os.path.join(os.path.dirname(self.data_file) or '.', 'taptap.db'))
+        self.path_cache = NuxtPathCache(os.path.splitext(self.data_file)[0] + '_nuxt_paths.json')
+        self.watermarks = FeedWatermarks(os.path.splitext(self.data_file)[0] + '_watermarks.json')
+        self.near_dup: Optional[NearDupIndex] = None
+        if near_dup > 0:
+            self.near_dup = NearDupIndex(os.path.splitext(self.data_file)[0] + '_neardup.bin',
+                                         threshold=near_dup, wave_size=near_dup_wave)
+        self.max_feed_pages = max_feed_pages
+        self.lifecycle = lifecycle or BrowserLifecycle()
+        self.browser_endpoint = browser_endpoint
+        self.profiles = profiles
+        self.metrics = metrics or Metrics()
+        self.notifier = notifier
+        self.keyword_rules = keyword_rules
+        self.debug = debug or DebugCapture(os.path.join(os.path.dirname(self.data_file) or '.', 'debug'))
+        if isinstance(route_profile, RouteProfile):
+            self.route_profile = route_profile
+        else:
+            self.route_profile = RouteProfile(
+                route_profile or ('lean' if headless else 'full'),
+                sizes_file=os.path.join(os.path.dirname(self.data_file) or '.', 'route_sizes.json'),
+            )
+            if profiles is not None:
+                self.route_profile.cache_stats = CacheStats(self.route_profile)
         self._load_data()
         
     def _load_data(self):
-        """加载已存储的数据"""
-        self.existing_topics: Dict[str, Dict] = {}  # link -> topic
-        self.existing_reviews: Dict[str, Dict] = {}  # content_hash -> review
+        """加载去重状态（只读取索引或数据库计数，不加载完整历史数据）"""
+        # 尚未写入存储的新记录 (去重键, 记录)
+        self._pending_topics: List[Tuple[str, Dict]] = []
+        self._pending_reviews: List[Tuple[str, Dict]] = []
+        # 每次抓取到的互动数据 (去重键, 时间戳, 点赞数, 评论数)
+        self._pending_observations: Dict[str, List[Tuple[str, int, int, int]]] = {'topic': [], 'review': []}
+        self.index: Optional[DedupIndex] = None
+        self.engagement: Optional[EngagementLog] = None
+        self._stored_counts = {'topic': 0, 'review': 0}
+        
+        if self.db is not None:
+            # SQLite 以去重键为主键，新记录直接按主键查询，无需预先加载
+            try:
+                self._stored_counts['topic'], self._stored_counts['review'] = self.db.count(self.app_id)
+                print(f"数据库中已有 {self._stored_counts['topic']} 个帖子, {self._stored_counts['review']} 条评价")
+                if not any(self._stored_counts.values()) and os.path.exists(self.data_file):
+                    # 首次改用 SQLite 时导入已有的 JSON 数据，避免历史记录被当作新内容再次推送
+                    topics, reviews = import_json(self.db, self.data_file, self.app_id)
+                    self._stored_counts['topic'], self._stored_counts['review'] = topics, reviews
+                    print(f"已从 {self.data_file} 导入 {topics} 个帖子, {reviews} 条评价")
+            except Exception as e:
+                print(f"加载数据失败: {e}")
+            return
         
+        self.index = DedupIndex(os.path.splitext(self.data_file)[0] + '_dedup.idx')
+        self.engagement = EngagementLog(os.path.splitext(self.data_file)[0] + '_engagement.bin')
+        if self.index.open(self.data_file):
+            print(f"已加载去重索引: {self.index.count('topic')} 个帖子, {self.index.count('review')} 条评价")
+            return
+        
+        # 索引不存在或数据文件已被外部修改，解析一次数据文件重建索引
+        keys = {'topic': [], 'review': []}
+        aliases = {'review': []}
         if os.path.exists(self.data_file):
             try:
                 with open(self.data_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    for topic in data.get('topics', []):
-                        if topic.get('link'):
-                            self.existing_topics[topic['link']] = topic
-                    for review in data.get('reviews', []):
-                        # 用内容前100字符+作者作为唯一标识
-                        key = f"{review.get('content', '')[:100]}_{review.get('author', '')}"
-                        self.existing_reviews[key] = review
-                print(f"已加载 {len(self.existing_topics)} 个帖子, {len(self.existing_reviews)} 条评价")
+                keys['topic'] = [topic_key(t) for t in data.get('topics', []) if topic_key(t)]
+                keys['review'] = [review_key(r) for r in data.get('reviews', [])]
+                # 升级前保存的评价没有ID和用户ID，登记其旧版键和内容哈希键，之后以新键出现时仍能识别
+                aliases['review'] = [a for r in data.get('reviews', []) for a in review_aliases(r)]
             except Exception as e:
                 print(f"加载数据失败: {e}")
+                return
+        try:
+            self.index.build(self.data_file, keys, aliases)
+        except OSError as e:
+            print(f"重建去重索引失败: {e}")
+        print(f"已加载 {self.index.count('topic')} 个帖子, {self.index.count('review')} 条评价（已重建去重索引）")
                 
     def _save_data(self):
-        """保存数据到文件"""
+        """保存数据（SQLite 只插入新记录，JSON 合并新记录后整体重写）"""
+        self._flush_engagement()
+        if self.near_dup is not None:
+            try:
+                self.near_dup.flush()
+            except OSError as e:
+                print(f"保存近似重复索引失败: {e}")
+        if self.db is not None:
+            if self._pending_topics or self._pending_reviews:
+                topics, reviews = self.db.insert(self.app_id, self._pending_topics, self._pending_reviews)
+                self._pending_topics = []
+                self._pending_reviews = []
+                self._stored_counts['topic'] += topics
+                self._stored_counts['review'] += reviews
+                print(f"已写入数据库: {topics} 个帖子, {reviews} 条评价 ({self.db.db_path})")
+            return
+            
+        if not self._pending_topics and not self._pending_reviews and os.path.exists(self.data_file):
+            return
+            
         # 确保目录存在
         os.makedirs(os.path.dirname(self.data_file) if os.path.dirname(self.data_file) else '.', exist_ok=True)
         
+        # 完整历史只在有新记录需要写入时读取
+        history = {}
+        if os.path.exists(self.data_file):
+            try:
+                with open(self.data_file, 'r', encoding='utf-8') as f:
+                    history = json.load(f)
+            except Exception as e:
+                # 不覆盖无法解析的数据文件，新记录保留到下次保存
+                print(f"读取数据文件失败，本次不保存: {e}")
+                return
+        
         data = {
             "last_updated": datetime.now().isoformat(),
             "app_id": self.app_id,
-            "topics": list(self.existing_topics.values()),
-            "reviews": list(self.existing_reviews.values())
+            "topics": history.get('topics', []) + [t for _, t in self._pending_topics],
+            "reviews": history.get('reviews', []) + [r for _, r in self._pending_reviews]
         }
         
-        with open(self.data_file, 'w', encoding='utf-8') as f:
+        # 先写临时文件再替换，避免写入中途崩溃损坏数据文件
+        tmp_file = self.data_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.data_file)
+        self._pending_topics = []
+        self._pending_reviews = []
+        try:
+            self.index.flush(self.data_file)
+        except OSError as e:
+            print(f"保存去重索引失败（下次启动时重建）: {e}")
         print(f"数据已保存到: {self.data_file}")
         
+    def _flush_engagement(self):
+        """追加写入互动数据观测"""
+        for feed, observations in self._pending_observations.items():
+            if not observations:
+                continue
+            try:
+                if self.db is not None:
+                    self.db.append_engagement(self.app_id, feed, observations)
+                elif self.engagement is not None:
+                    self.engagement.append(feed, observations)
+            except Exception as e:
+                print(f"保存互动数据失败: {e}")
+            self._pending_observations[feed] = []
+            
+    def engagement_series(self, feed: str, record: Dict) -> List[Tuple[int, int, int]]:
+        """
+        查询帖子/评价的互动数据序列
+        
+        Args:
+            feed: 信息流 (topic/review)
+            record: 帖子或评价记录
+            
+        Returns:
+            [(时间戳, 点赞数, 评论数)]，按抓取时间排列
+        """
+        self._flush_engagement()
+        key = topic_key(record) if feed == 'topic' else review_key(record)
+        if self.db is not None:
+            return self.db.engagement_series(self.app_id, feed, key)
+        return self.engagement.series(feed, key) if self.engagement is not None else []
+        
+    def _close_store(self):
+        """关闭数据库连接和去重索引"""
+        if self.db is not None:
+            self.db.close()
+        if self.index is not None:
+            self.index.close()
+            
+    def _known_count(self, feed: str) -> int:
+        """已记录的帖子/评价数量"""
+        if self.index is not None:
+            return self.index.count(feed)
+        pending = self._pending_topics if feed == 'topic' else self._pending_reviews
+        return self._stored_counts[feed] + len(pending)
+        
+    def _add_new(self, feed: str, records: List[Dict], key_func, pending: List[Tuple[str, Dict]],
+                 alias_func=None) -> List[Dict]:
+        """
+        按去重键过滤出新记录并加入待写入列表，同时记录每条记录本次的互动数据
+        
+        Args:
+            alias_func: 返回记录的其他可能去重键，任一键已存在即视为已记录
+        """
+        keyed = [(key_func(record), record) for record in records]
+        keyed = [(key, record) for key, record in keyed if key]
+        now = int(time.time())
+        self._pending_observations[feed].extend(
+            (key, now, parse_count(record.get('likes')), parse_count(record.get('comments')))
+            for key, record in keyed
+        )
+        aliases = {key: alias_func(record) for key, record in keyed} if alias_func else {}
+        known = set(key for key, _ in pending)
+        if self.db is not None:
+            known |= self.db.existing_keys(
+                self.app_id, feed, [key for key, _ in keyed] + [a for keys in aliases.values() for a in keys])
+        is_known = lambda k: k in known or (self.index is not None and self.index.contains(feed, k))
+        new_records = []
+        migrated = {}
+        for key, record in keyed:
+            if is_known(key):
+                continue
+            alias = next((a for a in aliases.get(key, []) if is_known(a)), None)
+            if alias is not None:
+                # 此前以其他键保存的记录，改用新键登记，之后内容修改也能识别
+                migrated[alias] = key
+                known.add(key)
+                if self.index is not None:
+                    self.index.add(feed, key, alias=True)
+                continue
+            known.add(key)
+            if self.index is not None:
+                self.index.add(feed, key)
+                for alias in aliases.get(key, []):
+                    self.index.add(feed, alias, alias=True)
+            pending.append((key, record))
+            new_records.append(record)
+        if migrated and self.db is not None:
+            self.db.rekey(self.app_id, feed, migrated)
+        return new_records
+        
     def _add_new_topics(self, topics: List[Dict]) -> List[Dict]:
         """添加新帖子（去重）"""
-        new_topics = []
-        for topic in topics:
-            link = topic.get('link', '')
-            if link and link not in self.existing_topics:
-                self.existing_topics[link] = topic
-                new_topics.append(topic)
-        return new_topics
+        return self._add_new('topic', topics, topic_key, self._pending_topics)
         
     def _add_new_reviews(self, reviews: List[Dict]) -> List[Dict]:
         """添加新评价（去重）"""
-        new_reviews = []
-        for review in reviews:
-            key = f"{review.get('content', '')[:100]}_{review.get('author', '')}"
-            if key not in self.existing_reviews:
-                self.existing_reviews[key] = review
-                new_reviews.append(review)
-        return new_reviews
+        return self._add_new('review', reviews, review_key, self._pending_reviews, alias_func=review_aliases)
         
-    def _start_browser(self):
-        """启动浏览器"""
-        if self.browser is None:
-            self._playwright = sync_playwright().start()
-            self.browser = self._playwright.chromium.launch(
-                headless=self.headless,
-                args=[
-                    '--disable-blink-features=AutomationControlled',
-                    '--no-sandbox',
-                    '--disable-dev-shm-usage',
-                ]
-            )
-            context = self.browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                locale='zh-CN',
-            )
-            self.page = context.new_page()
-            # 隐藏自动化特征
-            self.page.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
-            """)
+    def _get_session(self) -> requests.Session:
+        """获取复用连接的 HTTP 会话"""
+        if self.session is None:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=1)
+            self.session.mount('https://', adapter)
+            self.session.mount('http://', adapter)
+            self.session.headers.update({
+                'User-Agent': USER_AGENT,
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                'Accept-Language': 'zh-CN,zh;q=0.9',
+            })
+        return self.session
+        
+    def _close_session(self):
+        """关闭 HTTP 会话"""
+        if self.session:
+            self.session.close()
+            self.session = None
             
-    def _close_browser(self):
-        """关闭浏览器"""
-        if self.browser:
-            self.browser.close()
-            self.browser = None
-            self.page = None
-            self._playwright.stop()
+    def _fetch_nuxt_http(self, url: str) -> Optional[dict]:
+        """不启动浏览器，直接下载服务端渲染页面并提取 NUXT 数据"""
+        try:
+            print(f"正在请求: {url}")
+            resp = self._get_session().get(url, timeout=15)
+            resp.raise_for_status()
+            data = extract_nuxt_from_html(resp.text)
+            if data is None:
+                print("页面中未找到可解析的 NUXT 数据，回退到浏览器")
+            return data
+        except Exception as e:
+            print(f"HTTP 请求失败: {e}，回退到浏览器")
+            return None
             
-    def _wait_for_content(self, timeout: int = 15000):
-        """等待页面内容加载"""
+    @contextmanager
+    def _timed_wait(self, feed: str, step: str):
+        """记录一个等待步骤的实际耗时"""
+        start = time.monotonic()
         try:
-            # 等待帖子卡片出现
-            self.page.wait_for_selector('.moment-card, .moment-list-item, [class*="moment"]', timeout=timeout)
-        except:
-            pass
-        # 额外等待确保内容渲染完成
-        time.sleep(2)
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            self.wait_timings.setdefault(f"{feed}.{step}", deque(maxlen=100)).append(elapsed)
+            self._pending_waits.setdefault(feed, []).append(f"{step}={elapsed:.2f}s")
+            # scroll1/scroll2... 合并为一个阶段
+            self.metrics.observe(elapsed, app_id=self.app_id, feed=feed, stage=step.rstrip('0123456789'))
+
+    def _timed_stage(self, feed: str, stage: str):
+        """记录一个非等待阶段（解析、DOM 提取、保存等）的耗时"""
+        return self.metrics.timer(app_id=self.app_id, feed=feed, stage=stage)
+            
+    def _report_waits(self, feed: str):
+        """输出本次抓取各等待步骤的耗时"""
+        steps = self._pending_waits.pop(feed, [])
+        if steps:
+            print(f"⏱ 等待耗时 [{feed}]: {' '.join(steps)}")
+            
+    def wait_summary(self) -> Dict[str, Dict[str, float]]:
+        """汇总各等待步骤的耗时统计 (次数/平均/最大，单位秒)"""
+        return {
+            step: {"count": len(values), "avg": sum(values) / len(values), "max": max(values)}
+            for step, values in self.wait_timings.items() if values
+        }
         
-    def _scroll_page(self, scrolls: int = 3):
-        """模拟滚动加载更多内容"""
-        for i in range(scrolls):
-            self.page.evaluate('window.scrollBy(0, 800)')
-            time.sleep(0.5)
-        # 滚回顶部
-        self.page.evaluate('window.scrollTo(0, 0)')
-        time.sleep(0.5)
+    def _ready_args(self, feed: str, target: int) -> list:
+        """构造 READY_JS 的参数"""
+        return [CARD_SELECTORS[feed], target, 500, self.extract == 'nuxt']
         
-    def fetch_topics(self, max_posts: int = 20, sort: str = "new") -> List[Dict]:
-        """
-        获取最新帖子
+    @staticmethod
+    def _is_feed_response(response, feed: str) -> bool:
+        """判断响应是否为指定信息流的 JSON 接口"""
+        try:
+            if response.request.resource_type not in ('xhr', 'fetch'):
+                return False
+            if 'json' not in response.headers.get('content-type', ''):
+                return False
+            return bool(FEED_API_PATTERNS[feed].search(response.url))
+        except Exception:
+            return False
+            
+    def _merge_items(self, feed: str, items: List[Dict], more: List[Dict]) -> List[Dict]:
+        """按去重键合并后续页的条目，保持信息流顺序"""
+        key_func = topic_key if feed == 'topic' else review_key
+        seen = set(key_func(item) for item in items)
+        merged = list(items)
+        for item in more:
+            key = key_func(item)
+            if key not in seen:
+                seen.add(key)
+                merged.append(item)
+        return merged
         
-        Args:
-            max_posts: 最大帖子数量
-            sort: 排序方式 (new=最新, hot=热门)
+    def _parse_captured(self, bodies: List[dict], feed: str, limit: Optional[int]) -> List[Dict]:
+        """解析捕获到的接口响应（可能包含滚动触发的多页数据）"""
+        if not bodies:
+            return []
+        if feed == 'topic':
+            # 帖子解析会收集所有 moment 列表并按链接去重
+            return self._parse_nuxt_topics({'pages': bodies}, limit, source=None)
+        reviews = []
+        seen = set()
+        for body in bodies:
+            for review in self._parse_nuxt_reviews(body, limit, source=None):
+                key = review_key(review)
+                if key not in seen:
+                    seen.add(key)
+                    reviews.append(review)
+        return reviews[:limit]
+        
+    def _record_extraction(self, feed: str, source: str, payload):
+        """记录成功提取所用的方式，并按采样率保存调试数据"""
+        self.metrics.inc('extract_path', app_id=self.app_id, feed=feed, path=source)
+        self._sample_debug(feed, source, payload)
+
+    def _sample_debug(self, feed: str, source: str, payload):
+        """按采样率保存成功抓取时解析的数据"""
+        if self.debug.should_sample():
+            self.debug.save(self.app_id, feed, {"source": source, "payload": payload}, 'sample')
+            
+    def _failure_snapshot(self, url: str, nuxt_state: Optional[str], cards: Optional[Dict]) -> str:
+        """组装解析结果为空时的快照（NUXT 原始状态保持为已序列化的字符串）"""
+        meta = json.dumps({"url": url, "captured_at": datetime.now().isoformat(), "dom_cards": cards},
+                          ensure_ascii=False, default=str)
+        return meta[:-1] + ',"nuxt":' + (nuxt_state or 'null') + '}'
+        
+    def _projection_args(self, feed: str, limit: Optional[int]) -> list:
+        """构造投影脚本参数（附带缓存的列表路径）"""
+        return [limit, self.path_cache.get(f"{feed}:nuxt")]
+        
+    def _projection_items(self, feed: str, result: Optional[Dict]) -> Optional[List[Dict]]:
+        """记录投影脚本的路径命中情况并返回投影字段"""
+        if result is None:
+            return None
+        self.path_cache.record(f"{feed}:nuxt", result.get('hit', False), result.get('paths', []))
+        return result.get('items', [])
+            
+    def _extract_http(self, feed: str, data: Optional[dict], limit: int,
+                      paging: bool) -> Tuple[List[Dict], bool]:
+        """
+        解析 HTTP 引擎下载的 NUXT 数据
         
         Returns:
-            帖子列表
+            (条目, 是否完成)；未解析到条目，或需要按水位线翻页但首屏未越过水位线时，交给浏览器继续抓取
         """
-        url = f"{self.base_url}/app/{self.app_id}/topic?sort={sort}"
+        if not data:
+            return [], False
+        with self._timed_stage(feed, 'parse'):
+            # 按水位线翻页时不截断首屏，否则排在 limit 之后的新条目会被跳过
+            items = self._parse_nuxt(feed, data, None if paging else limit, source='http')
+        if not items:
+            print(f"HTTP NUXT 数据中未解析到{FEED_NAMES[feed][1]}，回退到浏览器")
+            return [], False
+        print(f"从 HTTP NUXT 数据解析到 {self._describe(feed, items)}")
+        self._record_extraction(feed, 'http', data)
+        if not paging or self.watermarks.crossed(feed, items):
+            return items, True
+        print("HTTP 首屏未越过水位线，使用浏览器继续翻页")
+        return [], False
+        
+    def _extraction_cascade(self, feed: str, url: str, limit: int, responses: Optional[list], paging: bool):
+        """
+        在已打开并就绪的页面上依次尝试: 接口响应 -> 页面内 NUXT 投影 -> 完整 NUXT 状态 -> DOM 卡片
+        
+        同步和异步监控器共用这一个生成器：它产出页面操作，由各自的 _run_cascade 执行后把结果 send 回来，
+        操作抛出的异常通过 throw 传回；生成器的返回值即提取到的条目。操作:
+            ('scroll', 信息流, 次数, 目标数量, 是否等待接口响应) -> None
+            ('read', 响应列表) -> 响应体列表
+            ('evaluate', 脚本, 参数) -> 脚本返回值
+            ('call', 函数, *参数) -> 函数返回值（异步监控器放到线程池中执行）
         
+        Args:
+            responses: 监听器捕获的信息流接口响应（随滚动追加），None 表示未监听
+            paging: 是否按水位线继续翻页（仅限按最新排序）
+        """
+        name = FEED_NAMES[feed][1]
+        pager = responses if paging else None
+        # 按水位线翻页时不截断首屏：先在完整的首屏上判断是否越过水位线，再从第二页继续
+        first_page = None if paging else limit
+        
+        # 方法0: 从捕获的信息流接口响应中提取（滚动触发后续页）
+        if self.extract == 'network':
+            yield 'scroll', feed, 2, limit, True
+            bodies = yield 'read', list(responses)
+            print(f"捕获到 {len(bodies)} 个信息流接口响应")
+            with self._timed_stage(feed, 'parse'):
+                items = self._parse_captured(bodies, feed, first_page)
+            if items:
+                print(f"从接口响应解析到 {self._describe(feed, items)}")
+                self._record_extraction(feed, 'network', bodies)
+                return (yield from self._page_feed(feed, items, pager))
+            print(f"接口响应中未解析到{name}，回退到 NUXT 数据")
+        
+        # 方法1: 在页面内投影 NUXT 数据，只取回需要的字段
         try:
-            self._start_browser()
-            print(f"正在访问: {url}")
-            self.page.goto(url, wait_until='networkidle', timeout=30000)
-            
-            # 等待内容加载
-            self._wait_for_content()
-            
-            # 滚动加载更多
-            self._scroll_page(2)
-            
-            # 提取数据 - 尝试多种选择器
-            topics = []
-            
-            # 方法1: 尝试从 NUXT 数据中提取 (SPA 框架数据)
-            nuxt_data = self.page.evaluate('''() => {
-                if (window.__NUXT__) return JSON.stringify(window.__NUXT__);
-                return null;
-            }''')
-            
-            if nuxt_data:
-                try:
-                    data = json.loads(nuxt_data)
-                    print(f"发现 NUXT 数据，尝试解析...")
-                    # 调试：保存 NUXT 数据结构
-                    debug_file = '/tmp/taptap_nuxt_debug.json'
-                    with open(debug_file, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
-                    print(f"NUXT 数据已保存到: {debug_file}")
-                    topics = self._parse_nuxt_topics(data, max_posts)
-                    if topics:
-                        print(f"从 NUXT 数据解析到 {len(topics)} 个帖子")
-                        return topics
-                except Exception as e:
-                    print(f"解析 NUXT 数据失败: {e}")
-            
-            # 方法2: 从 DOM 中提取
-            print("尝试从 DOM 中提取帖子...")
-            topics = self._extract_topics_from_dom(max_posts)
-            
-            return topics
-            
+            with self._timed_stage(feed, 'evaluate'):
+                result = yield 'evaluate', NUXT_PROJECTION_JS[feed], self._projection_args(feed, first_page)
+            projected = self._projection_items(feed, result)
         except Exception as e:
-            print(f"获取帖子失败: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
-            
-    def _parse_nuxt_topics(self, data: dict, max_posts: int) -> List[Dict]:
-        """从 NUXT 数据中解析帖子"""
-        topics = []
+            print(f"页面内 NUXT 投影失败: {e}")
+            self.metrics.error(e, app_id=self.app_id, feed=feed, stage='evaluate')
+            projected = None
+        if projected:
+            with self._timed_stage(feed, 'parse'):
+                items = self._items_from_projection(feed, projected, first_page)
+            if items:
+                print(f"从 NUXT 投影解析到 {self._describe(feed, items)}")
+                self._record_extraction(feed, 'projection', projected)
+                return (yield from self._page_feed(feed, items, pager))
+        
+        # 方法2: 投影脚本失败时，读取完整 NUXT 数据在 Python 中解析
+        nuxt_state = None
+        if projected is None:
+            with self._timed_stage(feed, 'evaluate'):
+                nuxt_state = yield 'evaluate', NUXT_STATE_JS, None
+        if nuxt_state:
+            data, items = None, []
+            try:
+                data = json.loads(nuxt_state)
+                print("发现 NUXT 数据，尝试解析...")
+                with self._timed_stage(feed, 'parse'):
+                    items = self._parse_nuxt(feed, data, first_page)
+            except Exception as e:
+                print(f"解析 NUXT 数据失败: {e}")
+                self.metrics.error(e, app_id=self.app_id, feed=feed, stage='parse')
+            if items:
+                print(f"从 NUXT 数据解析到 {self._describe(feed, items)}")
+                self._record_extraction(feed, 'nuxt', data)
+                return (yield from self._page_feed(feed, items, pager))
+        
+        # 方法3: 从 DOM 中提取（先滚动加载更多卡片，多取一些以防解析失败）
+        print(f"尝试从 DOM 中提取{name}...")
+        with self._timed_stage(feed, 'dom'):
+            yield 'scroll', feed, 2, limit, False
+            cards = yield 'evaluate', DOM_CARDS_JS, self._dom_card_args(feed, limit * 2)
+        items = self._items_from_cards(feed, cards, limit)
+        if items:
+            self._record_extraction(feed, 'dom', cards)
+            return items
+        
+        # 解析结果为空，保存页面 NUXT 状态和 DOM 卡片用于排查
+        self.metrics.inc('extract_path', app_id=self.app_id, feed=feed, path='empty')
+        if nuxt_state is None:
+            try:
+                nuxt_state = yield 'evaluate', NUXT_STATE_JS, None
+            except Exception:
+                nuxt_state = None
+        yield 'call', self.debug.save, self.app_id, feed, self._failure_snapshot(url, nuxt_state, cards), 'empty'
+        return items
+        
+    def _page_feed(self, feed: str, items: List[Dict], responses: Optional[list]):
+        """
+        按最新排序继续滚动翻页，直到已加载的条目越过水位线或达到页数上限（生成器，操作同 _extraction_cascade）
         
-        def find_moment_lists(obj, depth=0):
-            """递归查找包含 moment 的列表"""
-            if depth > 15:
-                return []
-            results = []
-            if isinstance(obj, dict):
-                # 检查是否有 list 字段且包含 moment
-                if 'list' in obj and isinstance(obj['list'], list):
-                    if obj['list'] and isinstance(obj['list'][0], dict) and 'moment' in obj['list'][0]:
-                        results.append(obj['list'])
-                for v in obj.values():
-                    results.extend(find_moment_lists(v, depth + 1))
-            elif isinstance(obj, list):
-                for item in obj:
-                    results.extend(find_moment_lists(item, depth + 1))
-            return results
+        Args:
+            feed: 信息流 (topic/review)
+            items: 首屏解析到的条目
+            responses: 捕获的接口响应，翻页数据从新捕获的响应中解析；None 表示不翻页
+        """
+        if responses is None or self.watermarks.crossed(feed, items):
+            return items
+        pages = 0
+        while pages < self.max_feed_pages and not self.watermarks.crossed(feed, items):
+            read = len(responses)
+            yield 'scroll', feed, 1, 0, True
+            if len(responses) == read:
+                break
+            pages += 1
+            bodies = yield 'read', responses[read:]
+            more = self._parse_captured(bodies, feed, sys.maxsize)
+            items = self._merge_items(feed, items, more)
+        state = "已越过水位线" if self.watermarks.crossed(feed, items) else "未越过水位线"
+        print(f"水位线翻页: 额外加载 {pages} 页，共 {len(items)} 条 ({state})")
+        return items
+        
+    @staticmethod
+    def _describe(feed: str, items: List[Dict]) -> str:
+        """条目数量描述，如 "3 个帖子" """
+        unit, name = FEED_NAMES[feed]
+        return f"{len(items)} {unit}{name}"
+        
+    def _parse_nuxt(self, feed: str, data: dict, limit: Optional[int], source: Optional[str] = 'nuxt') -> List[Dict]:
+        """按信息流从 NUXT 数据中解析帖子或评价"""
+        if feed == 'topic':
+            return self._parse_nuxt_topics(data, limit, source)
+        return self._parse_nuxt_reviews(data, limit, source)
+        
+    def _items_from_projection(self, feed: str, projected: List[Dict], limit: Optional[int]) -> List[Dict]:
+        """按信息流由投影字段生成帖子或评价记录"""
+        if feed == 'topic':
+            return self._topics_from_projection(projected, limit)
+        return self._reviews_from_projection(projected)
+        
+    def _items_from_cards(self, feed: str, cards: Optional[Dict], limit: int) -> List[Dict]:
+        """按信息流解析批量取回的 DOM 卡片"""
+        if feed == 'topic':
+            return self._topics_from_cards(cards, limit)
+        return self._reviews_from_cards(cards, limit)
             
-        moment_lists = find_moment_lists(data)
+    def _find_nuxt_lists(self, data: dict, feed: str, source: Optional[str]) -> List[list]:
+        """查找帖子列表（全部）或评价列表（第一个），优先使用缓存的路径"""
+        match, max_depth, first_only = NUXT_LIST_RULES[feed]
+        if source is None:
+            return [items for _, items in find_lists(data, match, max_depth, first_only)]
+        return self.path_cache.find(data, f"{feed}:{source}", match, max_depth, first_only)
+        
+    def _parse_nuxt_topics(self, data: dict, max_posts: Optional[int], source: Optional[str] = 'nuxt') -> List[Dict]:
+        """
+        从 NUXT 数据中解析帖子
         
+        Args:
+            data: NUXT 状态（或结构相同的接口响应）
+            max_posts: 最大帖子数量，None 表示不限
+            source: 数据来源，用于区分列表路径缓存；None 表示不使用缓存
+        """
+        moment_lists = self._find_nuxt_lists(data, 'topic', source)
+        
+        projected = []
         for moment_list in moment_lists:
             for item in moment_list[:max_posts]:
                 try:
                     moment = item.get('moment', {})
-                    if not moment:
-                        continue
-                    
-                    # 提取帖子ID
-                    post_id = moment.get('id_str') or moment.get('id')
-                    
-                    # 提取标题和内容
-                    topic_data = moment.get('topic', {})
-                    title = topic_data.get('title', '')
-                    summary = topic_data.get('summary', '')
-                    content = summary or title
-                    
-                    # 提取作者
-                    author_data = moment.get('author', {}).get('user', {})
-                    author = author_data.get('name', '未知')
-                    
-                    # 提取时间
-                    created_time = moment.get('created_time') or moment.get('publish_time', 0)
-                    post_time = self._format_timestamp(created_time)
-                    
-                    # 提取统计
-                    stat = moment.get('stat', {})
-                    likes = str(stat.get('ups', 0))  # 点赞数是 ups
-                    comments = str(stat.get('comments', 0))
-                    
-                    # 生成链接
-                    link = f"{self.base_url}/moment/{post_id}" if post_id else ''
-                    
-                    topic = {
-                        "title": title[:150] if title else content[:150] or "（无标题）",
-                        "link": link,
-                        "author": author[:50],
-                        "time": post_time,
-                        "likes": likes,
-                        "comments": comments,
-                        "content_preview": content[:200] if content else '',
-                        "type": "topic",
-                        "fetched_at": datetime.now().isoformat()
-                    }
-                    
-                    if topic['title'] != "（无标题）":
-                        topics.append(topic)
-                        
+                    if moment:
+                        projected.append(self._project_moment(moment))
                 except Exception as e:
                     print(f"解析帖子项失败: {e}")
                     continue
+                    
+        return self._topics_from_projection(projected, max_posts)
+        
+    @staticmethod
+    def _project_moment(moment: dict) -> Dict:
+        """提取帖子需要保留的字段（与页面内投影脚本的输出一致）"""
+        topic_data = moment.get('topic') or {}
+        stat = moment.get('stat') or {}
+        author_data = (moment.get('author') or {}).get('user') or {}
+        return {
+            "id": moment.get('id_str') or moment.get('id'),
+            "title": topic_data.get('title') or '',
+            "summary": topic_data.get('summary') or '',
+            "author": author_data.get('name') or '未知',
+            "created_time": moment.get('created_time') or moment.get('publish_time', 0),
+            "ups": stat.get('ups', 0),  # 点赞数是 ups
+            "comments": stat.get('comments', 0),
+        }
+        
+    def _topics_from_projection(self, projected: List[Dict], max_posts: Optional[int]) -> List[Dict]:
+        """由投影字段生成帖子记录并去重"""
+        topics = []
+        for p in projected:
+            try:
+                post_id = p.get('id')
+                title = p.get('title') or ''
+                content = p.get('summary') or title
+                
+                topic = {
+                    "id": str(post_id) if post_id else None,
+                    "title": title[:150] if title else content[:150] or "（无标题）",
+                    "link": f"{self.base_url}/moment/{post_id}" if post_id else '',
+                    "author": (p.get('author') or '未知')[:50],
+                    "time": self._format_timestamp(p.get('created_time')),
+                    "timestamp": epoch_seconds(p.get('created_time')),
+                    "likes": str(p.get('ups') or 0),
+                    "comments": str(p.get('comments') or 0),
+                    "content_preview": content[:200] if content else '',
+                    "type": "topic",
+                    "fetched_at": datetime.now().isoformat()
+                }
+                
+                if topic['title'] != "（无标题）":
+                    topics.append(topic)
+                    
+            except Exception as e:
+                print(f"解析帖子项失败: {e}")
+                continue
         
         # 去重
         seen = set()
@@ -295,38 +1201,46 @@ class TapTapMonitor:
         except:
             return str(ts)
             
-    def _extract_topics_from_dom(self, max_posts: int) -> List[Dict]:
-        """从 DOM 中提取帖子"""
-        topics = []
-        
-        # 尝试多种选择器
-        selectors = [
-            '.moment-card',
-            '.moment-list-item', 
-            '[class*="moment-card"]',
-            '[class*="topic-item"]',
-            'article[class*="card"]',
+    def _dom_card_args(self, feed: str, limit: int) -> list:
+        """构造 DOM_CARDS_JS 的参数"""
+        if feed == 'topic':
+            return [
+                TOPIC_CARD_SELECTORS,
+                'div[class*="card"], div[class*="item"], article',
+                limit,
+                {
+                    'titles': TOPIC_TITLE_SELECTORS,
+                    'authors': TOPIC_AUTHOR_SELECTORS,
+                    'footer': '[class*="footer"], [class*="action"], [class*="stat"], [class*="interact"]',
+                },
+                {'href': ['a[href*="/moment/"], a[href*="/topic/"], a[href]', 'href']},
+            ]
+        return [
+            REVIEW_CARD_SELECTORS,
+            None,
+            limit,
+            {
+                'rating': '[class*="rating"], [class*="score"], [class*="star"]',
+                'content': '[class*="content"], [class*="text"], p',
+                'author': '[class*="author"], [class*="user"]',
+                'time': 'time, [class*="time"], [class*="date"]',
+            },
+            {},
         ]
         
-        elements = []
-        for selector in selectors:
-            try:
-                found = self.page.query_selector_all(selector)
-                if found:
-                    print(f"选择器 '{selector}' 找到 {len(found)} 个元素")
-                    elements = found
-                    break
-            except:
-                continue
-                
-        if not elements:
-            # 最后尝试: 获取所有可能包含帖子的元素
+    def _topics_from_cards(self, result: Optional[Dict], max_posts: int) -> List[Dict]:
+        """对批量取回的帖子卡片运行解析规则"""
+        if not result:
+            return []
+        if result.get('fallback'):
             print("尝试通用方法提取...")
-            elements = self.page.query_selector_all('div[class*="card"], div[class*="item"], article')
+        elif result.get('selector'):
+            print(f"选择器 '{result['selector']}' 找到 {result.get('total', 0)} 个元素")
             
-        for elem in elements[:max_posts * 2]:  # 多取一些以防解析失败
+        topics = []
+        for card in result.get('cards', []):
             try:
-                topic = self._parse_topic_element(elem)
+                topic = self._parse_topic_card(card)
                 if topic and topic.get('title'):
                     topics.append(topic)
                     if len(topics) >= max_posts:
@@ -336,11 +1250,11 @@ class TapTapMonitor:
                 
         return topics
         
-    def _parse_topic_element(self, elem) -> Optional[Dict]:
-        """解析单个帖子元素"""
+    def _parse_topic_card(self, card: Dict) -> Optional[Dict]:
+        """解析单个帖子卡片的原始数据"""
         try:
             # 获取文本内容
-            text = elem.inner_text()
+            text = card.get('text')
             if not text or len(text) < 10:
                 return None
             
@@ -348,23 +1262,14 @@ class TapTapMonitor:
             title = ''
             
             # 方法1: 查找特定的标题元素
-            title_selectors = [
-                'h2', 'h3', 'h4',
-                '.title', '[class*="title"]',
-                '.moment-card__title', '.moment-card__content',
-                '[class*="content"]', '[class*="text"]',
-                'p'
-            ]
-            for sel in title_selectors:
-                title_elem = elem.query_selector(sel)
-                if title_elem:
-                    candidate = title_elem.inner_text().strip()
-                    # 标题通常比时间字符串长
-                    if candidate and len(candidate) > 5 and not re.match(r'^\d+\s*(天|小时|分钟|秒|刚刚)', candidate):
-                        # 排除纯时间格式的文本
-                        if not re.match(r'^\d{4}/\d{1,2}/\d{1,2}$', candidate):
-                            title = candidate
-                            break
+            for candidate in card.get('titles', []):
+                candidate = (candidate or '').strip()
+                # 标题通常比时间字符串长
+                if candidate and len(candidate) > 5 and not re.match(r'^\d+\s*(天|小时|分钟|秒|刚刚)', candidate):
+                    # 排除纯时间格式的文本
+                    if not re.match(r'^\d{4}/\d{1,2}/\d{1,2}$', candidate):
+                        title = candidate
+                        break
                 
             # 方法2: 从文本行中提取最可能是标题的行
             if not title:
@@ -391,11 +1296,9 @@ class TapTapMonitor:
                     
             # 提取作者
             author = '未知'
-            author_selectors = ['.author', '.user-name', '[class*="author"]', '[class*="user"]', '[class*="name"]']
-            for sel in author_selectors:
-                author_elem = elem.query_selector(sel)
-                if author_elem:
-                    author_text = author_elem.inner_text().strip().split('\n')[0]
+            for author_text in card.get('authors', []):
+                if author_text is not None:
+                    author_text = author_text.strip().split('\n')[0]
                     # 作者名通常较短
                     if author_text and len(author_text) < 30:
                         author = author_text
@@ -413,11 +1316,9 @@ class TapTapMonitor:
                     
             # 提取链接
             link = ''
-            link_elem = elem.query_selector('a[href*="/moment/"], a[href*="/topic/"], a[href]')
-            if link_elem:
-                href = link_elem.get_attribute('href')
-                if href:
-                    link = href if href.startswith('http') else self.base_url + href
+            href = card.get('href')
+            if href:
+                link = href if href.startswith('http') else self.base_url + href
                     
             # 提取时间
             time_text = ''
@@ -439,9 +1340,8 @@ class TapTapMonitor:
             comments = '0'
             
             # 查找包含数字的元素
-            footer = elem.query_selector('[class*="footer"], [class*="action"], [class*="stat"], [class*="interact"]')
-            if footer:
-                footer_text = footer.inner_text()
+            footer_text = card.get('footer')
+            if footer_text is not None:
                 numbers = re.findall(r'\d+', footer_text)
                 if len(numbers) >= 1:
                     likes = numbers[0]
@@ -468,125 +1368,71 @@ class TapTapMonitor:
         except Exception as e:
             return None
             
-    def fetch_reviews(self, max_reviews: int = 20) -> List[Dict]:
+
+    def _parse_nuxt_reviews(self, data: dict, max_reviews: Optional[int], source: Optional[str] = 'nuxt') -> List[Dict]:
         """
-        获取最新评价
+        从 NUXT 数据中解析评价
         
         Args:
-            max_reviews: 最大评价数量
-        
-        Returns:
-            评价列表
+            data: NUXT 状态（或结构相同的接口响应）
+            max_reviews: 最大评价数量，None 表示不限
+            source: 数据来源，用于区分列表路径缓存；None 表示不使用缓存
         """
-        url = f"{self.base_url}/app/{self.app_id}/review"
+        lists = self._find_nuxt_lists(data, 'review', source)
+        items = lists[0] if lists else None
         
-        try:
-            self._start_browser()
-            print(f"正在访问: {url}")
-            self.page.goto(url, wait_until='networkidle', timeout=30000)
-            
-            self._wait_for_content()
-            self._scroll_page(2)
-            
-            reviews = []
-            
-            # 尝试从 NUXT 数据提取
-            nuxt_data = self.page.evaluate('''() => {
-                if (window.__NUXT__) return JSON.stringify(window.__NUXT__);
-                return null;
-            }''')
-            
-            if nuxt_data:
-                try:
-                    data = json.loads(nuxt_data)
-                    reviews = self._parse_nuxt_reviews(data, max_reviews)
-                    if reviews:
-                        print(f"从 NUXT 数据解析到 {len(reviews)} 条评价")
-                        return reviews
-                except Exception as e:
-                    print(f"解析 NUXT 评价数据失败: {e}")
-                    
-            # 从 DOM 提取
-            print("尝试从 DOM 中提取评价...")
-            reviews = self._extract_reviews_from_dom(max_reviews)
-            
-            return reviews
-            
-        except Exception as e:
-            print(f"获取评价失败: {e}")
-            return []
-            
-    def _parse_nuxt_reviews(self, data: dict, max_reviews: int) -> List[Dict]:
-        """从 NUXT 数据中解析评价"""
-        reviews = []
-        
-        def find_reviews(obj, depth=0):
-            if depth > 10:
-                return None
-            if isinstance(obj, dict):
-                if 'reviews' in obj and isinstance(obj['reviews'], list):
-                    return obj['reviews']
-                if 'list' in obj and isinstance(obj['list'], list):
-                    if obj['list'] and isinstance(obj['list'][0], dict):
-                        first = obj['list'][0]
-                        if any(k in first for k in ['rating', 'score', 'review']):
-                            return obj['list']
-                for v in obj.values():
-                    result = find_reviews(v, depth + 1)
-                    if result:
-                        return result
-            elif isinstance(obj, list):
-                for item in obj:
-                    result = find_reviews(item, depth + 1)
-                    if result:
-                        return result
-            return None
-            
-        items = find_reviews(data)
+        projected = []
+        for item in (items or [])[:max_reviews]:
+            try:
+                projected.append(self._project_review(item))
+            except Exception:
+                continue
+                
+        return self._reviews_from_projection(projected)
         
-        if items:
-            for item in items[:max_reviews]:
-                try:
-                    review = {
-                        "rating": str(item.get('rating') or item.get('score', '')),
-                        "content": (item.get('content') or item.get('text', ''))[:300],
-                        "author": item.get('user', {}).get('name', '') or item.get('author', {}).get('name', '未知'),
-                        "time": self._format_timestamp(item.get('created_time') or item.get('created_at')),
-                        "likes": str(item.get('likes_count') or item.get('useful_count') or 0),
-                        "type": "review",
-                        "fetched_at": datetime.now().isoformat()
-                    }
-                    if review['content']:
-                        reviews.append(review)
-                except Exception as e:
-                    continue
-                    
-        return reviews
+    @staticmethod
+    def _project_review(item: dict) -> Dict:
+        """提取评价需要保留的字段（与页面内投影脚本的输出一致）"""
+        return {
+            "id": item.get('id_str') or item.get('id'),
+            "user_id": (item.get('user') or {}).get('id') or (item.get('author') or {}).get('id'),
+            "rating": item.get('rating') or item.get('score', ''),
+            "content": (item.get('content') or item.get('text', ''))[:300],
+            "author": item.get('user', {}).get('name', '') or item.get('author', {}).get('name', '未知'),
+            "created_time": item.get('created_time') or item.get('created_at'),
+            "likes": item.get('likes_count') or item.get('useful_count') or 0,
+        }
         
-    def _extract_reviews_from_dom(self, max_reviews: int) -> List[Dict]:
-        """从 DOM 中提取评价"""
+    def _reviews_from_projection(self, projected: List[Dict]) -> List[Dict]:
+        """由投影字段生成评价记录"""
         reviews = []
-        
-        selectors = [
-            '.review-item',
-            '.review-card',
-            '[class*="review"]',
-            'article[class*="review"]',
-        ]
-        
-        elements = []
-        for selector in selectors:
+        for p in projected:
             try:
-                found = self.page.query_selector_all(selector)
-                if found:
-                    elements = found
-                    break
-            except:
+                review = {
+                    "id": str(p['id']) if p.get('id') else None,
+                    "user_id": str(p['user_id']) if p.get('user_id') else None,
+                    "rating": str(p.get('rating', '')),
+                    "content": (p.get('content') or '')[:300],
+                    "author": p.get('author') or '未知',
+                    "time": self._format_timestamp(p.get('created_time')),
+                    "timestamp": epoch_seconds(p.get('created_time')),
+                    "likes": str(p.get('likes') or 0),
+                    "type": "review",
+                    "fetched_at": datetime.now().isoformat()
+                }
+                if review['content']:
+                    reviews.append(review)
+            except Exception:
                 continue
                 
-        for elem in elements[:max_reviews * 2]:
+        return reviews
+        
+    def _reviews_from_cards(self, result: Optional[Dict], max_reviews: int) -> List[Dict]:
+        """对批量取回的评价卡片运行解析规则"""
+        reviews = []
+        for card in (result or {}).get('cards', []):
             try:
-                review = self._parse_review_element(elem)
+                review = self._parse_review_card(card)
                 if review and review.get('content'):
                     reviews.append(review)
                     if len(reviews) >= max_reviews:
@@ -596,42 +1442,34 @@ class TapTapMonitor:
                 
         return reviews
         
-    def _parse_review_element(self, elem) -> Optional[Dict]:
-        """解析单个评价元素"""
+    def _parse_review_card(self, card: Dict) -> Optional[Dict]:
+        """解析单个评价卡片的原始数据"""
         try:
-            text = elem.inner_text()
+            text = card.get('text')
             if not text or len(text) < 10:
                 return None
                 
             # 提取评分
             rating = ''
-            rating_elem = elem.query_selector('[class*="rating"], [class*="score"], [class*="star"]')
-            if rating_elem:
-                rating = rating_elem.inner_text().strip()
+            if card.get('rating') is not None:
+                rating = card['rating'].strip()
                 # 尝试提取数字
                 match = re.search(r'(\d+)', rating)
                 if match:
                     rating = match.group(1)
                     
             # 提取内容
-            content = ''
-            content_elem = elem.query_selector('[class*="content"], [class*="text"], p')
-            if content_elem:
-                content = content_elem.inner_text().strip()
+            content = (card.get('content') or '').strip()
             if not content:
                 content = text[:300]
                 
             # 提取作者
             author = '未知'
-            author_elem = elem.query_selector('[class*="author"], [class*="user"]')
-            if author_elem:
-                author = author_elem.inner_text().strip().split('\n')[0]
+            if card.get('author') is not None:
+                author = card['author'].strip().split('\n')[0]
                 
             # 提取时间
-            time_text = ''
-            time_elem = elem.query_selector('time, [class*="time"], [class*="date"]')
-            if time_elem:
-                time_text = time_elem.inner_text().strip()
+            time_text = (card.get('time') or '').strip()
                 
             return {
                 "rating": rating,
@@ -645,12 +1483,477 @@ class TapTapMonitor:
         except:
             return None
             
-    def monitor(self, interval_minutes: int = 30) -> Dict:
+
+    def _process_results(self, topics: Optional[List[Dict]],
+                         reviews: Optional[List[Dict]]) -> Tuple[List[Dict], List[Dict]]:
+        """去重、输出并保存一轮抓取结果，返回 (新帖子, 新评价)；None 表示本轮没有抓取该信息流"""
+        # 添加新数据并去重
+        new_topics = self._add_new_topics(topics) if topics is not None else []
+        new_reviews = self._add_new_reviews(reviews) if reviews is not None else []
+        self._match_keywords(new_topics, new_reviews)
+        self._label_near_duplicates(new_topics, new_reviews)
+
+        # 输出结果
+        if topics is None:
+            pass
+        elif new_topics:
+            print(f"\n🆕 新帖子 ({len(new_topics)} 个):")
+            for i, topic in enumerate(new_topics, 1):
+                print(f"\n{i}. {topic['title']}")
+                print(f"   作者: {topic['author']} | 时间: {topic['time']}")
+                print(f"   👍 {topic['likes']} | 💬 {topic['comments']}")
+                if topic['link']:
+                    print(f"   链接: {topic['link']}")
+                self._print_tags(topic)
+        else:
+            print(f"\n📱 无新帖子 (已记录 {self._known_count('topic')} 个)")
+
+        if reviews is None:
+            pass
+        elif new_reviews:
+            print(f"\n🆕 新评价 ({len(new_reviews)} 条):")
+            for i, review in enumerate(new_reviews, 1):
+                print(f"\n{i}. 评分: {review['rating']} | {review['author']}")
+                print(f"   {review['content'][:100]}{'...' if len(review['content']) > 100 else ''}")
+                self._print_tags(review)
+        else:
+            print(f"\n⭐ 无新评价 (已记录 {self._known_count('review')} 条)")
+
+        for feed, items, new in (('topic', topics, new_topics), ('review', reviews, new_reviews)):
+            if items is not None:
+                self._count_items(feed, items, new)
+
+        # 先写入推送发件箱再保存：保存前退出时，重启后重新入队的条目按幂等键忽略
+        if self.notifier is not None:
+            self.notifier.add(self.app_id, new_topics, new_reviews)
+
+        # 保存数据（没有新记录时只追加互动数据），保存后再推进水位线
+        with self._timed_stage('all', 'save'):
+            self._save_data()
+        if topics is not None:
+            self.watermarks.advance('topic', topics)
+        if reviews is not None:
+            self.watermarks.advance('review', reviews)
+
+        return new_topics, new_reviews
+        
+    def _match_keywords(self, new_topics: List[Dict], new_reviews: List[Dict]):
+        """按关键词规则匹配新记录，命中的规则写入记录的 matches 字段并计数"""
+        if self.keyword_rules is None:
+            return
+        for feed, records in (('topic', new_topics), ('review', new_reviews)):
+            if not records or not self.keyword_rules.annotate(feed, records):
+                continue
+            for record in records:
+                for match in record.get('matches', []):
+                    self.metrics.inc('keyword_matches', app_id=self.app_id, feed=feed, rule=match['rule'])
+
+    def _label_near_duplicates(self, new_topics: List[Dict], new_reviews: List[Dict]):
+        """为新记录标注近似重复簇，本轮某个簇新增较多时提示疑似刷帖/刷评"""
+        if self.near_dup is None:
+            return
+        for feed, records, key_func in (('topic', new_topics, topic_key), ('review', new_reviews, review_key)):
+            for record in records:
+                self.near_dup.label(feed, key_func(record), record)
+        for feed, cluster, added, size in self.near_dup.waves():
+            name = '帖子' if feed == 'topic' else '评价'
+            print(f"\n🚨 疑似刷{name}: 簇 {cluster} 本轮新增 {added} 条相似{name}（累计 {size} 条）")
+            self.metrics.inc('near_dup_waves', app_id=self.app_id, feed=feed)
+
+    @staticmethod
+    def _print_tags(record: Dict):
+        """输出关键词规则和近似重复标签"""
+        if record.get('matches'):
+            print("   🔔 命中规则: " + "，".join(
+                f"{m['rule']}({'/'.join(m['keywords'])})" if m['keywords'] else m['rule'] for m in record['matches']))
+        near_dup = record.get('near_dup')
+        if near_dup and near_dup['similarity']:
+            print(f"   ♻️ 近似重复: 簇 {near_dup['cluster']}，相似度 {near_dup['similarity']:.2f}，共 {near_dup['size']} 条")
+
+    def _count_items(self, feed: str, items: List[Dict], new: List[Dict]):
+        """记录抓取/新增/已记录条目数和新鲜度"""
+        labels = {'app_id': self.app_id, 'feed': feed}
+        self.metrics.inc('items', len(items), result='fetched', **labels)
+        self.metrics.inc('items', len(new), result='new', **labels)
+        self.metrics.inc('items', len(items) - len(new), result='deduped', **labels)
+        now = time.time()
+        if items:
+            self.metrics.set('last_fetch_timestamp_seconds', now, **labels)
+        if new:
+            self.metrics.set('last_new_item_timestamp_seconds', now, **labels)
+
+    def _flush_notifications(self):
+        """一轮结束时唤醒推送线程（不等待发送完成）"""
+        if self.notifier is not None:
+            self.notifier.flush()
+
+    def _process_feed(self, feed: str, items: List[Dict]) -> List[Dict]:
+        """处理单个信息流的抓取结果，返回新条目"""
+        if feed == 'topic':
+            return self._process_results(items, None)[0]
+        return self._process_results(None, items)[1]
+        
+    def _schedule_next(self, scheduler: AdaptiveScheduler, job: Tuple[str, str], new_items: int):
+        """记录信息流的新条目数并安排下次轮询"""
+        interval = scheduler.record(job, new_items)
+        print(f"📅 {job[0]}/{job[1]}: 新增 {new_items}，"
+              f"估计 {scheduler.rate_per_hour(job):.1f} 条/小时，{interval / 60:.1f} 分钟后再次轮询")
+
+
+class TapTapMonitor(MonitorBase):
+    """基于 playwright.sync_api 的监控器，帖子和评价在同一页面中依次抓取"""
+
+    def __init__(self, *args, **kwargs):
+        """初始化 TapTap 监控器（参数见 MonitorBase）"""
+        super().__init__(*args, **kwargs)
+        self.browser: Optional[Browser] = None
+        self.page: Optional[Page] = None
+        self._attached = False
+        self._persistent = None
+        self._active_capture = None
+        
+    def _start_browser(self):
+        """启动浏览器"""
+        if self.browser is None and self._persistent is None:
+            from playwright.sync_api import sync_playwright
+            self._playwright = sync_playwright().start()
+            if self.profiles:
+                self._persistent = self._launch_persistent()
+            else:
+                self.browser = self._connect_daemon()
+                self._attached = self.browser is not None
+            if self.browser is None and self._persistent is None:
+                self.browser = self._playwright.chromium.launch(
+                    headless=self.headless,
+                    args=BROWSER_ARGS
+                )
+            self.page = self._new_page()
+            self.lifecycle.reset()
+            
+    def _connect_daemon(self) -> Optional[Browser]:
+        """连接浏览器守护进程，不可达或连接失败时返回 None"""
+        if not self.browser_endpoint or not daemon_reachable(self.browser_endpoint):
+            return None
+        try:
+            browser = self._playwright.chromium.connect_over_cdp(self.browser_endpoint, timeout=10000)
+        except Exception as e:
+            print(f"连接浏览器守护进程失败，改为启动浏览器: {e}")
+            return None
+        print(f"🔗 已连接浏览器守护进程: {self.browser_endpoint}")
+        return browser
+
+    def _launch_persistent(self):
+        """使用持久化用户数据目录启动浏览器，返回其唯一的上下文"""
+        user_data_dir = self.profiles.acquire()
+        try:
+            context = self._playwright.chromium.launch_persistent_context(
+                user_data_dir,
+                headless=self.headless,
+                args=BROWSER_ARGS + self.profiles.launch_args(),
+                **CONTEXT_OPTIONS
+            )
+        except Exception:
+            self.profiles.release()
+            raise
+        self._install_routes(context)
+        print(f"💾 使用持久化浏览器配置: {user_data_dir}")
+        return context
+
+    def _watch_cache(self, page: Page):
+        """为页面开启 CDP 网络事件：统计缓存命中并按 URL 拦截请求"""
+        stats = self.route_profile.cache_stats
+        session = page.context.new_cdp_session(page)
+        for event, handler in stats.events().items():
+            session.on(event, handler)
+        session.send('Network.enable')
+        patterns = stats.blocked_patterns()
+        if patterns:
+            session.send('Network.setBlockedURLs', {'urls': patterns})
+
+    def _new_page(self) -> Page:
+        """创建新的上下文和页面（持久化配置下只创建页面）"""
+        if self._persistent is not None:
+            page = self._persistent.new_page()
+            self._watch_cache(page)
+        else:
+            context = self.browser.new_context(**CONTEXT_OPTIONS)
+            self._install_routes(context)
+            page = context.new_page()
+        # 隐藏自动化特征
+        page.add_init_script(STEALTH_JS)
+        return page
+        
+    def _maintain_browser(self):
+        """两轮抓取之间检查是否需要回收上下文，先创建好替换页面再关闭旧的"""
+        if self.browser is None and self._persistent is None:
+            return
+        # 连接守护进程时 Chromium 不是本进程的子进程，读不到它的内存，只按导航次数和存活时间回收
+        usage = None if self._attached else chromium_memory()
+        reason = self.lifecycle.recycle_reason(usage)
+        if not reason:
+            return
+        old_page = self.page
+        try:
+            replacement = self._new_page()
+            replacement.goto('about:blank')
+        except Exception as e:
+            print(f"创建替换页面失败，继续使用当前页面: {e}")
+            return
+        self.page = replacement
+        try:
+            # 持久化上下文不能替换，只关闭旧页面释放渲染进程
+            if self._persistent is not None:
+                old_page.close()
+            else:
+                old_page.context.close()
+        except Exception:
+            pass
+        self.lifecycle.reset()
+        self.lifecycle.recycles += 1
+        if self._attached:
+            print(f"♻️ 已回收浏览器上下文 ({reason})")
+        else:
+            print(f"♻️ 已回收浏览器上下文 ({reason})，回收前 {format_memory(usage)}，回收后 {format_memory(chromium_memory())}")
+            
+    def _install_routes(self, context):
+        """按拦截档位安装请求路由"""
+        profile = self.route_profile
+        if not profile.active:
+            return
+            
+        def handle(route):
+            request = route.request
+            reason = profile.block_reason(request.resource_type, request.url)
+            if reason:
+                profile.record_blocked(reason, request.resource_type)
+                route.abort()
+            else:
+                route.continue_()
+                
+        # 路由拦截会禁用 HTTP 缓存，持久化配置下改由 _watch_cache 按 URL 拦截
+        if self.profiles is None:
+            context.route('**/*', handle)
+        context.on('response', lambda r: profile.record_response(r.request.resource_type, r.headers))
+        
+    def _close_browser(self):
+        """关闭浏览器和 HTTP 会话（连接守护进程时只关闭自己的上下文，浏览器继续运行）"""
+        if self._persistent is not None:
+            try:
+                self._persistent.close()
+            finally:
+                self._persistent = None
+                self.page = None
+                self._playwright.stop()
+                self.profiles.release()
+        if self.browser:
+            if self._attached:
+                try:
+                    self.page.context.close()
+                except Exception:
+                    pass
+            else:
+                self.browser.close()
+            self.browser = None
+            self.page = None
+            self._playwright.stop()
+        self._close_session()
+            
+    def _wait_for_content(self, feed: str, target: int = 0, timeout: int = 15000):
+        """
+        等待页面内容就绪（NUXT 数据出现、卡片数达到目标或不再增长），不再固定休眠
+        
+        Args:
+            feed: 信息流 (topic/review)
+            target: 目标卡片数量，达到即视为就绪
+            timeout: 最长等待时间（毫秒）
+        """
+        with self._timed_wait(feed, 'ready'):
+            try:
+                self.page.wait_for_function(READY_JS, arg=self._ready_args(feed, target),
+                                            timeout=timeout, polling=100)
+            except Exception:
+                pass
+        
+    def _scroll_page(self, feed: str, scrolls: int = 3, target: int = 0, network: bool = False,
+                     step_timeout: int = 3000):
+        """
+        滚动加载更多内容，每一步等待真实信号，超时即认为没有更多内容
+        
+        Args:
+            feed: 信息流 (topic/review)
+            scrolls: 最多滚动次数
+            target: 卡片数量达到该值后不再滚动
+            network: 等待信息流接口响应（network 提取方式），否则等待卡片数量增长
+            step_timeout: 每一步的等待上限（毫秒）
+        """
+        selector = CARD_SELECTORS[feed]
+        for i in range(scrolls):
+            count = self.page.evaluate(COUNT_CARDS_JS, selector)
+            if target and count >= target:
+                break
+            with self._timed_wait(feed, f'scroll{i + 1}'):
+                try:
+                    if network:
+                        with self.page.expect_response(lambda r: self._is_feed_response(r, feed),
+                                                       timeout=step_timeout):
+                            self.page.evaluate(SCROLL_BOTTOM_JS)
+                    else:
+                        self.page.evaluate(SCROLL_BOTTOM_JS)
+                        self.page.wait_for_function(CARDS_GREW_JS, arg=[selector, count],
+                                                    timeout=step_timeout, polling=100)
+                except Exception:
+                    break
+        
+    def _start_capture(self, feed: str):
+        """开始监听信息流接口响应，返回捕获句柄"""
+        # 上一次抓取异常退出时可能遗留监听器
+        if self._active_capture:
+            self._stop_listening(self._active_capture)
+        responses = []
+        
+        def on_response(response):
+            if self._is_feed_response(response, feed):
+                responses.append(response)
+                
+        self.page.on('response', on_response)
+        self._active_capture = (on_response, responses)
+        return self._active_capture
+        
+    def _stop_listening(self, capture):
+        """移除接口响应监听器"""
+        try:
+            self.page.remove_listener('response', capture[0])
+        except Exception:
+            pass
+        self._active_capture = None
+        
+    def _read_bodies(self, responses) -> List[dict]:
+        """读取接口响应体"""
+        bodies = []
+        for response in responses:
+            try:
+                bodies.append(response.json())
+            except Exception as e:
+                print(f"读取接口响应失败 ({response.url}): {e}")
+        return bodies
+        
+    def _evaluate_dom_cards(self, feed: str, limit: int) -> Optional[Dict]:
+        """一次 evaluate 取回页面上所有卡片的原始数据"""
+        return self.page.evaluate(DOM_CARDS_JS, self._dom_card_args(feed, limit))
+        
+    def _extract_topics_from_dom(self, max_posts: int) -> List[Dict]:
+        """从 DOM 中提取帖子"""
+        # 多取一些以防解析失败
+        return self._topics_from_cards(self._evaluate_dom_cards('topic', max_posts * 2), max_posts)
+        
+    def _extract_reviews_from_dom(self, max_reviews: int) -> List[Dict]:
+        """从 DOM 中提取评价"""
+        return self._reviews_from_cards(self._evaluate_dom_cards('review', max_reviews * 2), max_reviews)
+        
+    def _page_op(self, op: str, *args):
+        """执行提取级联产出的一个页面操作"""
+        if op == 'scroll':
+            feed, scrolls, target, network = args
+            return self._scroll_page(feed, scrolls, target=target, network=network)
+        if op == 'read':
+            return self._read_bodies(args[0])
+        if op == 'evaluate':
+            return self.page.evaluate(*args)
+        return args[0](*args[1:])
+        
+    def _run_cascade(self, cascade) -> List[Dict]:
+        """驱动提取级联直到返回条目"""
+        result, error = None, None
+        while True:
+            try:
+                op = cascade.send(result) if error is None else cascade.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            result, error = None, None
+            try:
+                result = self._page_op(*op)
+            except Exception as e:
+                error = e
+                
+    def _fetch_feed(self, feed: str, url: str, limit: int, paging: bool = False) -> List[Dict]:
+        """
+        抓取一个信息流（HTTP NUXT -> 浏览器提取级联）
+        
+        Args:
+            paging: 是否按水位线继续翻页（仅限按最新排序）
+        """
+        if self.engine == "http":
+            items, done = self._extract_http(feed, self._fetch_nuxt_http(url), limit, paging)
+            if done:
+                return items
+        
+        capture = None
+        try:
+            self._start_browser()
+            if self.extract == 'network' or paging:
+                capture = self._start_capture(feed)
+            print(f"正在访问: {url}")
+            with self._timed_wait(feed, 'goto'):
+                self.lifecycle.record_navigation()
+                self.page.goto(url, wait_until='domcontentloaded', timeout=30000)
+            
+            # 等待内容加载
+            self._wait_for_content(feed, limit)
+            responses = capture[1] if capture is not None else None
+            return self._run_cascade(self._extraction_cascade(feed, url, limit, responses, paging))
+        finally:
+            if capture is not None:
+                self._stop_listening(capture)
+            self._report_waits(feed)
+            
+    def fetch_topics(self, max_posts: int = 20, sort: str = "new") -> List[Dict]:
+        """
+        获取最新帖子
+        
+        Args:
+            max_posts: 最大帖子数量
+            sort: 排序方式 (new=最新, hot=热门)
+        
+        Returns:
+            帖子列表
+        """
+        url = f"{self.base_url}/app/{self.app_id}/topic?sort={sort}"
+        try:
+            # 只有按最新排序时才按水位线翻页
+            return self._fetch_feed('topic', url, max_posts, paging=sort == "new")
+        except Exception as e:
+            print(f"获取帖子失败: {e}")
+            self.metrics.error(e, app_id=self.app_id, feed='topic', stage='fetch')
+            import traceback
+            traceback.print_exc()
+            return []
+            
+    def fetch_reviews(self, max_reviews: int = 20, sort: str = "new") -> List[Dict]:
+        """
+        获取最新评价
+        
+        Args:
+            max_reviews: 最大评价数量
+            sort: 排序方式 (new=最新, hot=热门)
+        
+        Returns:
+            评价列表
+        """
+        url = f"{self.base_url}/app/{self.app_id}/review?sort={sort}"
+        try:
+            return self._fetch_feed('review', url, max_reviews, paging=sort == "new")
+        except Exception as e:
+            print(f"获取评价失败: {e}")
+            self.metrics.error(e, app_id=self.app_id, feed='review', stage='fetch')
+            return []
+            
+    def monitor(self, interval_minutes: int = 30, scheduler: Optional[AdaptiveScheduler] = None) -> Dict:
         """
         执行监控任务
         
         Args:
             interval_minutes: 监控间隔（分钟）
+            scheduler: 自适应调度器，传入时按各信息流的新内容速率分别轮询，不再固定间隔同时抓取
         
         Returns:
             监控结果
@@ -658,47 +1961,28 @@ class TapTapMonitor:
         print(f"开始监控 TapTap 社区 (游戏ID: {self.app_id})，间隔 {interval_minutes} 分钟...")
         
         try:
-            while True:
-                print(f"\n{'='*20} {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} {'='*20}")
-                
-                # 获取数据
-                topics = self.fetch_topics(10)
-                reviews = self.fetch_reviews(10)
+            if scheduler is not None and interval_minutes > 0:
+                self._monitor_adaptive(scheduler)
+            else:
+                while True:
+                    print(f"\n{'='*20} {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} {'='*20}")
                 
-                # 添加新数据并去重
-                new_topics = self._add_new_topics(topics)
-                new_reviews = self._add_new_reviews(reviews)
+                    # 获取数据
+                    topics = self.fetch_topics(10)
+                    reviews = self.fetch_reviews(10)
                 
-                # 输出结果
-                if new_topics:
-                    print(f"\n🆕 新帖子 ({len(new_topics)} 个):")
-                    for i, topic in enumerate(new_topics, 1):
-                        print(f"\n{i}. {topic['title']}")
-                        print(f"   作者: {topic['author']} | 时间: {topic['time']}")
-                        print(f"   👍 {topic['likes']} | 💬 {topic['comments']}")
-                        if topic['link']:
-                            print(f"   链接: {topic['link']}")
-                else:
-                    print(f"\n📱 无新帖子 (已记录 {len(self.existing_topics)} 个)")
+                    self._process_results(topics, reviews)
+                    self.route_profile.report()
+                    self.metrics.end_cycle(app_ids=[self.app_id])
+                    self._flush_notifications()
+                    self._maintain_browser()
                     
-                if new_reviews:
-                    print(f"\n🆕 新评价 ({len(new_reviews)} 条):")
-                    for i, review in enumerate(new_reviews, 1):
-                        print(f"\n{i}. 评分: {review['rating']} | {review['author']}")
-                        print(f"   {review['content'][:100]}{'...' if len(review['content']) > 100 else ''}")
-                else:
-                    print(f"\n⭐ 无新评价 (已记录 {len(self.existing_reviews)} 条)")
-                    
-                # 保存数据
-                if new_topics or new_reviews:
-                    self._save_data()
-                    
-                # 等待下一次监控
-                if interval_minutes > 0:
-                    print(f"\n⏳ 等待 {interval_minutes} 分钟后继续...")
-                    time.sleep(interval_minutes * 60)
-                else:
-                    break
+                    # 等待下一次监控
+                    if interval_minutes > 0:
+                        print(f"\n⏳ 等待 {interval_minutes} 分钟后继续...")
+                        time.sleep(interval_minutes * 60)
+                    else:
+                        break
                     
         except KeyboardInterrupt:
             print("\n\n✋ 监控已停止")
@@ -706,8 +1990,659 @@ class TapTapMonitor:
             self._close_browser()
             # 最后保存一次
             self._save_data()
+            self._close_store()
             
         return {"status": "completed", "last_run": datetime.now().isoformat()}
+        
+    def _monitor_adaptive(self, scheduler: AdaptiveScheduler):
+        """按自适应调度分别轮询帖子和评价"""
+        fetchers = {'topic': lambda: self.fetch_topics(10), 'review': lambda: self.fetch_reviews(10)}
+        for feed in fetchers:
+            scheduler.add((self.app_id, feed))
+        while True:
+            wait = scheduler.wait_time()
+            if wait > 0:
+                print(f"\n⏳ {wait / 60:.1f} 分钟后轮询下一个信息流...")
+                time.sleep(wait)
+            for job in scheduler.pop_due():
+                feed = job[1]
+                print(f"\n{'='*20} {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} {feed} {'='*20}")
+                new_items = self._process_feed(feed, fetchers[feed]())
+                self._schedule_next(scheduler, job, len(new_items))
+                self.route_profile.report()
+                self.metrics.end_cycle(app_ids=[self.app_id], jobs=[feed])
+            self._flush_notifications()
+            self._maintain_browser()
+
+
+class AsyncBrowserPool:
+    """
+    多个异步监控器共享的浏览器与页面池
+
+    同一时间最多 max_pages 个页面在工作（全局并发上限），
+    所有发往 www.taptap.cn 的请求之间至少间隔 min_request_interval 秒。
+    """
+
+    def __init__(self, headless: bool = True, max_pages: int = 4, min_request_interval: float = 1.0,
+                 route_profile: Optional[RouteProfile] = None, lifecycle: Optional[BrowserLifecycle] = None,
+                 browser_endpoint: Optional[str] = None, profiles: Optional[BrowserProfiles] = None):
+        self.headless = headless
+        self.lifecycle = lifecycle or BrowserLifecycle()
+        self.browser_endpoint = browser_endpoint
+        self._attached = False
+        self.profiles = profiles
+        self.route_profile = route_profile or RouteProfile('lean' if headless else 'full')
+        if profiles is not None and self.route_profile.cache_stats is None:
+            self.route_profile.cache_stats = CacheStats(self.route_profile)
+        self.max_pages = max(1, max_pages)
+        self.min_request_interval = min_request_interval
+        self.browser: Optional[AsyncBrowser] = None
+        self.context: Optional[AsyncBrowserContext] = None
+        self._idle_pages: List[AsyncPage] = []
+        self._in_use = 0
+        self._semaphore = asyncio.Semaphore(self.max_pages)
+        self._start_lock = asyncio.Lock()
+        self._throttle_lock = asyncio.Lock()
+        self._last_request = 0.0
+
+    async def start(self):
+        """启动浏览器（并发调用时只启动一次）"""
+        async with self._start_lock:
+            if self.context is None:
+                from playwright.async_api import async_playwright
+                self._playwright = await async_playwright().start()
+                if self.profiles:
+                    self.context = await self._launch_persistent()
+                    self.lifecycle.reset()
+                    return
+                self.browser = await self._connect_daemon()
+                self._attached = self.browser is not None
+                if self.browser is None:
+                    self.browser = await self._playwright.chromium.launch(
+                        headless=self.headless,
+                        args=BROWSER_ARGS
+                    )
+                self.context = await self._new_context()
+                self.lifecycle.reset()
+
+    async def _connect_daemon(self) -> Optional[AsyncBrowser]:
+        """连接浏览器守护进程，不可达或连接失败时返回 None"""
+        if not self.browser_endpoint or not await asyncio.to_thread(daemon_reachable, self.browser_endpoint):
+            return None
+        try:
+            browser = await self._playwright.chromium.connect_over_cdp(self.browser_endpoint, timeout=10000)
+        except Exception as e:
+            print(f"连接浏览器守护进程失败，改为启动浏览器: {e}")
+            return None
+        print(f"🔗 已连接浏览器守护进程: {self.browser_endpoint}")
+        return browser
+
+    async def _launch_persistent(self) -> AsyncBrowserContext:
+        """使用持久化用户数据目录启动浏览器，返回其唯一的上下文"""
+        user_data_dir = await asyncio.to_thread(self.profiles.acquire)
+        try:
+            context = await self._playwright.chromium.launch_persistent_context(
+                user_data_dir,
+                headless=self.headless,
+                args=BROWSER_ARGS + self.profiles.launch_args(),
+                **CONTEXT_OPTIONS
+            )
+        except Exception:
+            self.profiles.release()
+            raise
+        await self._install_routes(context)
+        await context.add_init_script(STEALTH_JS)
+        print(f"💾 使用持久化浏览器配置: {user_data_dir}")
+        return context
+
+    async def _new_page(self) -> AsyncPage:
+        """在当前上下文中创建页面，持久化配置下开启缓存统计和按 URL 拦截"""
+        page = await self.context.new_page()
+        stats = self.route_profile.cache_stats
+        if self.profiles and stats is not None:
+            session = await self.context.new_cdp_session(page)
+            for event, handler in stats.events().items():
+                session.on(event, handler)
+            await session.send('Network.enable')
+            patterns = stats.blocked_patterns()
+            if patterns:
+                await session.send('Network.setBlockedURLs', {'urls': patterns})
+        return page
+
+    async def _new_context(self) -> AsyncBrowserContext:
+        """创建新的上下文"""
+        context = await self.browser.new_context(**CONTEXT_OPTIONS)
+        await self._install_routes(context)
+        # 隐藏自动化特征
+        await context.add_init_script(STEALTH_JS)
+        return context
+
+    async def maintain(self):
+        """没有页面在工作时检查是否需要回收上下文，先创建好新上下文和页面再关闭旧的"""
+        if self.context is None or self._in_use:
+            return
+        # 连接守护进程时 Chromium 不是本进程的子进程，读不到它的内存，只按导航次数和存活时间回收
+        usage = None if self._attached else await asyncio.to_thread(chromium_memory)
+        reason = self.lifecycle.recycle_reason(usage)
+        if not reason:
+            return
+        if self.browser is None:
+            # 持久化上下文不能替换，只关闭空闲页面释放渲染进程
+            pages, self._idle_pages = self._idle_pages, []
+            for page in pages:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            self.lifecycle.reset()
+            self.lifecycle.recycles += 1
+            after = await asyncio.to_thread(chromium_memory)
+            print(f"♻️ 已回收浏览器页面 ({reason})，回收前 {format_memory(usage)}，回收后 {format_memory(after)}")
+            return
+        try:
+            context = await self._new_context()
+            page = await context.new_page()
+        except Exception as e:
+            print(f"创建替换上下文失败，继续使用当前上下文: {e}")
+            return
+        if self._in_use:
+            # 创建期间有页面被借出，下次再回收
+            await context.close()
+            return
+        old_context, self.context, self._idle_pages = self.context, context, [page]
+        try:
+            await old_context.close()
+        except Exception:
+            pass
+        self.lifecycle.reset()
+        self.lifecycle.recycles += 1
+        if self._attached:
+            print(f"♻️ 已回收浏览器上下文 ({reason})")
+            return
+        after = await asyncio.to_thread(chromium_memory)
+        print(f"♻️ 已回收浏览器上下文 ({reason})，回收前 {format_memory(usage)}，回收后 {format_memory(after)}")
+
+    async def _install_routes(self, context: AsyncBrowserContext):
+        """按拦截档位安装请求路由"""
+        profile = self.route_profile
+        if not profile.active:
+            return
+
+        async def handle(route):
+            request = route.request
+            reason = profile.block_reason(request.resource_type, request.url)
+            if reason:
+                profile.record_blocked(reason, request.resource_type)
+                await route.abort()
+            else:
+                await route.continue_()
+
+        # 路由拦截会禁用 HTTP 缓存，持久化配置下改由 _new_page 按 URL 拦截
+        if self.profiles is None:
+            await context.route('**/*', handle)
+        context.on('response', lambda r: profile.record_response(r.request.resource_type, r.headers))
+
+    @asynccontextmanager
+    async def page(self):
+        """借出一个页面，用完自动归还到池中"""
+        async with self._semaphore:
+            await self.start()
+            page = None
+            while self._idle_pages:
+                candidate = self._idle_pages.pop()
+                if not candidate.is_closed():
+                    page = candidate
+                    break
+            if page is None:
+                page = await self._new_page()
+            context = self.context
+            self._in_use += 1
+            try:
+                yield page
+            finally:
+                self._in_use -= 1
+                if not page.is_closed() and context is self.context:
+                    self._idle_pages.append(page)
+
+    async def throttle(self):
+        """保证对 TapTap 的请求之间有最小间隔"""
+        async with self._throttle_lock:
+            wait = self._last_request + self.min_request_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_request = time.monotonic()
+
+    async def close(self):
+        """关闭浏览器（连接守护进程时只关闭自己的上下文）"""
+        if self.context is not None and self.browser is None:
+            try:
+                await self.context.close()
+            finally:
+                self.context = None
+                self._idle_pages = []
+                await self._playwright.stop()
+                self.profiles.release()
+        if self.browser:
+            if self._attached:
+                try:
+                    await self.context.close()
+                except Exception:
+                    pass
+            else:
+                await self.browser.close()
+            self.browser = None
+            self.context = None
+            self._idle_pages = []
+            await self._playwright.stop()
+
+
+class AsyncTapTapMonitor(MonitorBase):
+    """
+    基于 playwright.async_api 的异步监控器
+
+    帖子和评价在同一浏览器内各占一个页面，通过 asyncio.gather 并发抓取，
+    一轮耗时约等于较慢的那个页面。数据加载、解析、去重和保存与 TapTapMonitor 共用 MonitorBase。
+    传入共享的 AsyncBrowserPool 时，多个游戏可以复用同一个浏览器。
+
+    嵌入其他 asyncio 服务时用 async with 或在结束时 await close()，以保存新记录并释放浏览器和存储。
+    """
+
+    def __init__(self, *args, pool: Optional[AsyncBrowserPool] = None, **kwargs):
+        """
+        Args:
+            pool: 共享的浏览器页面池，None 时自行创建（close 时一并关闭）；
+                  传入时改用池的拦截配置和回收策略。其余参数见 MonitorBase
+        """
+        if pool is not None:
+            kwargs.update(route_profile=pool.route_profile, lifecycle=pool.lifecycle)
+        super().__init__(*args, **kwargs)
+        self._owns_pool = pool is None
+        self.pool = pool or AsyncBrowserPool(headless=self.headless, max_pages=2, min_request_interval=0,
+                                             route_profile=self.route_profile, lifecycle=self.lifecycle,
+                                             browser_endpoint=self.browser_endpoint, profiles=self.profiles)
+
+    async def __aenter__(self) -> AsyncTapTapMonitor:
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """关闭浏览器（仅限自有页面池）和 HTTP 会话，保存未写入的记录并关闭存储"""
+        try:
+            if self._owns_pool:
+                await self.pool.close()
+            self._close_session()
+        finally:
+            self._save_data()
+            self._close_store()
+
+    async def _wait_for_content(self, page: AsyncPage, feed: str, target: int = 0, timeout: int = 15000):
+        """等待页面内容就绪（NUXT 数据出现、卡片数达到目标或不再增长）"""
+        with self._timed_wait(feed, 'ready'):
+            try:
+                await page.wait_for_function(READY_JS, arg=self._ready_args(feed, target),
+                                             timeout=timeout, polling=100)
+            except Exception:
+                pass
+
+    async def _scroll_page(self, page: AsyncPage, feed: str, scrolls: int = 3, target: int = 0,
+                           network: bool = False, step_timeout: int = 3000):
+        """滚动加载更多内容，每一步等待接口响应或卡片数量增长，超时即停止"""
+        selector = CARD_SELECTORS[feed]
+        for i in range(scrolls):
+            count = await page.evaluate(COUNT_CARDS_JS, selector)
+            if target and count >= target:
+                break
+            with self._timed_wait(feed, f'scroll{i + 1}'):
+                try:
+                    if network:
+                        async with page.expect_response(lambda r: self._is_feed_response(r, feed),
+                                                        timeout=step_timeout):
+                            await page.evaluate(SCROLL_BOTTOM_JS)
+                    else:
+                        await page.evaluate(SCROLL_BOTTOM_JS)
+                        await page.wait_for_function(CARDS_GREW_JS, arg=[selector, count],
+                                                     timeout=step_timeout, polling=100)
+                except Exception:
+                    break
+
+    async def _read_bodies(self, responses) -> List[dict]:
+        """读取接口响应体"""
+        bodies = []
+        for response in responses:
+            try:
+                bodies.append(await response.json())
+            except Exception as e:
+                print(f"读取接口响应失败 ({response.url}): {e}")
+        return bodies
+
+    async def _page_op(self, page: AsyncPage, op: str, *args):
+        """执行提取级联产出的一个页面操作（触发接口请求的滚动先经过页面池限速）"""
+        if op == 'scroll':
+            feed, scrolls, target, network = args
+            if network:
+                await self.pool.throttle()
+            return await self._scroll_page(page, feed, scrolls, target=target, network=network)
+        if op == 'read':
+            return await self._read_bodies(args[0])
+        if op == 'evaluate':
+            return await page.evaluate(*args)
+        return await asyncio.to_thread(*args)
+
+    async def _run_cascade(self, page: AsyncPage, cascade) -> List[Dict]:
+        """驱动提取级联直到返回条目"""
+        result, error = None, None
+        while True:
+            try:
+                op = cascade.send(result) if error is None else cascade.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            result, error = None, None
+            try:
+                result = await self._page_op(page, *op)
+            except Exception as e:
+                error = e
+
+    async def _fetch_feed(self, feed: str, url: str, limit: int, paging: bool = False) -> List[Dict]:
+        """
+        抓取一个信息流（HTTP NUXT -> 浏览器提取级联）
+
+        Args:
+            paging: 是否按水位线继续翻页（仅限按最新排序）
+        """
+        if self.engine == "http":
+            await self.pool.throttle()
+            # requests 是同步的，放到线程池中避免阻塞事件循环
+            data = await asyncio.to_thread(self._fetch_nuxt_http, url)
+            items, done = self._extract_http(feed, data, limit, paging)
+            if done:
+                return items
+
+        async with self.pool.page() as page:
+            responses = []
+
+            def on_response(response):
+                if self._is_feed_response(response, feed):
+                    responses.append(response)
+
+            listening = self.extract == 'network' or paging
+            if listening:
+                page.on('response', on_response)
+            try:
+                await self.pool.throttle()
+                print(f"正在访问: {url}")
+                with self._timed_wait(feed, 'goto'):
+                    self.pool.lifecycle.record_navigation()
+                    await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+                await self._wait_for_content(page, feed, limit)
+                cascade = self._extraction_cascade(feed, url, limit, responses if listening else None, paging)
+                return await self._run_cascade(page, cascade)
+            finally:
+                if listening:
+                    page.remove_listener('response', on_response)
+                self._report_waits(feed)
+
+    async def fetch_topics(self, max_posts: int = 20, sort: str = "new") -> List[Dict]:
+        """获取最新帖子"""
+        url = f"{self.base_url}/app/{self.app_id}/topic?sort={sort}"
+        try:
+            return await self._fetch_feed('topic', url, max_posts, paging=sort == "new")
+        except Exception as e:
+            print(f"获取帖子失败: {e}")
+            self.metrics.error(e, app_id=self.app_id, feed='topic', stage='fetch')
+            return []
+
+    async def fetch_reviews(self, max_reviews: int = 20, sort: str = "new") -> List[Dict]:
+        """获取最新评价"""
+        url = f"{self.base_url}/app/{self.app_id}/review?sort={sort}"
+        try:
+            return await self._fetch_feed('review', url, max_reviews, paging=sort == "new")
+        except Exception as e:
+            print(f"获取评价失败: {e}")
+            self.metrics.error(e, app_id=self.app_id, feed='review', stage='fetch')
+            return []
+
+    async def fetch_all(self, max_items: int = 10) -> Tuple[List[Dict], List[Dict]]:
+        """并发获取帖子和评价，返回 (帖子, 评价)"""
+        topics, reviews = await asyncio.gather(
+            self.fetch_topics(max_items),
+            self.fetch_reviews(max_items),
+        )
+        return topics, reviews
+
+    async def monitor(self, interval_minutes: int = 30, scheduler: Optional[AdaptiveScheduler] = None) -> Dict:
+        """
+        执行监控任务（异步）
+
+        Args:
+            interval_minutes: 监控间隔（分钟）
+            scheduler: 自适应调度器，传入时帖子和评价按各自的新内容速率分别轮询
+
+        Returns:
+            监控结果
+        """
+        print(f"开始监控 TapTap 社区 (游戏ID: {self.app_id})，间隔 {interval_minutes} 分钟 [异步引擎]...")
+
+        try:
+            if scheduler is not None and interval_minutes > 0:
+                await run_adaptive_schedule(scheduler, [self], self.pool)
+            else:
+                while True:
+                    print(f"\n{'='*20} {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} {'='*20}")
+
+                    topics, reviews = await self.fetch_all(10)
+                    self._process_results(topics, reviews)
+                    self.pool.route_profile.report()
+                    self.metrics.end_cycle(app_ids=[self.app_id])
+                    self._flush_notifications()
+                    await self.pool.maintain()
+
+                    if interval_minutes > 0:
+                        print(f"\n⏳ 等待 {interval_minutes} 分钟后继续...")
+                        await asyncio.sleep(interval_minutes * 60)
+                    else:
+                        break
+
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            print("\n\n✋ 监控已停止")
+        finally:
+            await self.close()
+
+        return {"status": "completed", "last_run": datetime.now().isoformat()}
+
+
+async def run_adaptive_schedule(scheduler: AdaptiveScheduler, monitors: List[AsyncTapTapMonitor],
+                                pool: AsyncBrowserPool):
+    """
+    按自适应调度轮询多个 (游戏, 信息流)，同时到期的任务并发抓取（并发数受页面池限制）
+
+    Args:
+        scheduler: 自适应调度器
+        monitors: 异步监控器
+        pool: 共享的页面池，每批任务结束后输出拦截统计并检查是否需要回收上下文
+    """
+    by_app = {m.app_id: m for m in monitors}
+    for monitor in monitors:
+        for feed in ('topic', 'review'):
+            scheduler.add((monitor.app_id, feed))
+
+    async def poll(job: Tuple[str, str]) -> List[Dict]:
+        monitor = by_app[job[0]]
+        fetch = monitor.fetch_topics if job[1] == 'topic' else monitor.fetch_reviews
+        items = await fetch(10)
+        print(f"\n---------- 游戏 {job[0]} / {job[1]} ----------")
+        return monitor._process_feed(job[1], items)
+
+    while True:
+        wait = scheduler.wait_time()
+        if wait > 0:
+            print(f"\n⏳ {wait / 60:.1f} 分钟后轮询下一个信息流...")
+            await asyncio.sleep(wait)
+        jobs = scheduler.pop_due()
+        if not jobs:
+            continue
+        print(f"\n{'='*20} {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} {'='*20}")
+        results = await asyncio.gather(*(poll(job) for job in jobs), return_exceptions=True)
+        for job, result in zip(jobs, results):
+            if isinstance(result, Exception):
+                print(f"游戏 {job[0]} {job[1]} 监控失败: {result}")
+                by_app[job[0]].metrics.error(result, app_id=job[0], feed=job[1], stage='cycle')
+                result = []
+            by_app[job[0]]._schedule_next(scheduler, job, len(result))
+        pool.route_profile.report()
+        monitors[0].metrics.end_cycle(app_ids=sorted({job[0] for job in jobs}), jobs=[job[1] for job in jobs])
+        monitors[0]._flush_notifications()
+        await pool.maintain()
+
+
+class MultiAppMonitor:
+    """
+    在一个进程中监控多个游戏
+
+    所有游戏共享一个浏览器和有界页面池，每个游戏保留自己的数据文件和去重状态。
+    """
+
+    def __init__(self, app_ids: List[str], headless: bool = True, data_file: str = None,
+                 engine: str = "browser", extract: str = "nuxt", route_profile: str = None,
+                 debug: Optional[DebugCapture] = None, store: str = "json", db_file: str = None,
+                 max_feed_pages: int = 5, near_dup: float = 0, near_dup_wave: int = 5,
+                 lifecycle: Optional[BrowserLifecycle] = None, max_pages: int = 4, min_request_interval: float = 1.0,
+                 browser_endpoint: Optional[str] = None, profiles: Optional[BrowserProfiles] = None,
+                 metrics: Optional[Metrics] = None, notifier: Optional[DigestNotifier] = None,
+                 keyword_rules: Optional[KeywordRules] = None):
+        """
+        Args:
+            app_ids: 游戏ID列表
+            headless: 是否无头模式运行浏览器
+            data_file: 数据文件路径模板，可包含 {app_id}（默认: data/{app_id}_data.json）
+            engine: 抓取引擎
+            extract: 浏览器中的数据提取方式
+            route_profile: 请求拦截档位 (lean/full)
+            debug: 调试快照配置（各游戏共享，快照按游戏ID分目录）
+            store: 存储后端 (json/sqlite)，sqlite 时各游戏共用一个数据库
+            db_file: SQLite 数据库路径
+            max_feed_pages: 按水位线翻页时最多额外加载的页数
+            near_dup: 近似重复检测的相似度阈值，0 表示关闭（各游戏分别建索引）
+            near_dup_wave: 同一簇在一轮内新增多少条时提示疑似刷帖/刷评
+            lifecycle: 共享浏览器的上下文回收策略
+            max_pages: 同时工作的页面数上限
+            min_request_interval: 对 TapTap 的两次请求之间的最小间隔（秒）
+            browser_endpoint: 浏览器守护进程的 CDP 地址，None 表示总是自行启动浏览器
+            profiles: 持久化浏览器配置目录，设置后共享浏览器跨运行复用 HTTP 缓存
+            metrics: 各游戏共享的指标
+            notifier: 各游戏共享的钉钉摘要推送，每轮所有游戏的新内容合并发送
+            keyword_rules: 各游戏共享的关键词告警规则
+        """
+        if data_file and len(app_ids) > 1 and '{app_id}' not in data_file:
+            raise ValueError("监控多个游戏时 --data-file 必须包含 {app_id} 占位符")
+        data_dir = os.path.dirname(data_file.format(app_id='')) if data_file else 'data'
+        self.metrics = metrics or Metrics()
+        self.notifier = notifier
+        self.pool = AsyncBrowserPool(
+            headless=headless, max_pages=max_pages, min_request_interval=min_request_interval,
+            route_profile=RouteProfile(route_profile or ('lean' if headless else 'full'),
+                                       sizes_file=os.path.join(data_dir or '.', 'route_sizes.json')),
+            lifecycle=lifecycle,
+            browser_endpoint=browser_endpoint,
+            profiles=profiles,
+        )
+        self.monitors: List[AsyncTapTapMonitor] = [
+            AsyncTapTapMonitor(
+                app_id=app_id,
+                headless=headless,
+                data_file=data_file.format(app_id=app_id) if data_file else None,
+                engine=engine,
+                extract=extract,
+                debug=debug,
+                store=store,
+                db_file=db_file,
+                max_feed_pages=max_feed_pages,
+                near_dup=near_dup,
+                near_dup_wave=near_dup_wave,
+                pool=self.pool,
+                metrics=self.metrics,
+                notifier=notifier,
+                keyword_rules=keyword_rules,
+            )
+            for app_id in app_ids
+        ]
+
+    async def _run_cycle(self, monitor: AsyncTapTapMonitor) -> Tuple[List[Dict], List[Dict]]:
+        """抓取单个游戏并处理结果"""
+        topics, reviews = await monitor.fetch_all(10)
+        print(f"\n---------- 游戏 {monitor.app_id} ----------")
+        return monitor._process_results(topics, reviews)
+
+    async def monitor(self, interval_minutes: int = 30, scheduler: Optional[AdaptiveScheduler] = None) -> Dict:
+        """
+        执行监控任务
+
+        Args:
+            interval_minutes: 监控间隔（分钟）
+            scheduler: 自适应调度器，传入时每个 (游戏, 信息流) 按各自的新内容速率轮询
+
+        Returns:
+            监控结果
+        """
+        app_ids = ', '.join(m.app_id for m in self.monitors)
+        print(f"开始监控 {len(self.monitors)} 个游戏 ({app_ids})，"
+              f"页面池 {self.pool.max_pages}，间隔 {interval_minutes} 分钟...")
+
+        try:
+            if scheduler is not None and interval_minutes > 0:
+                await run_adaptive_schedule(scheduler, self.monitors, self.pool)
+            else:
+                while True:
+                    print(f"\n{'='*20} {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} {'='*20}")
+
+                    results = await asyncio.gather(
+                        *(self._run_cycle(m) for m in self.monitors),
+                        return_exceptions=True,
+                    )
+                    for monitor, result in zip(self.monitors, results):
+                        if isinstance(result, Exception):
+                            print(f"游戏 {monitor.app_id} 监控失败: {result}")
+                            self.metrics.error(result, app_id=monitor.app_id, feed='all', stage='cycle')
+                    self.pool.route_profile.report()
+                    self.metrics.end_cycle(app_ids=[m.app_id for m in self.monitors])
+                    if self.notifier is not None:
+                        self.notifier.flush()
+                    await self.pool.maintain()
+
+                    if interval_minutes > 0:
+                        print(f"\n⏳ 等待 {interval_minutes} 分钟后继续...")
+                        await asyncio.sleep(interval_minutes * 60)
+                    else:
+                        break
+
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            print("\n\n✋ 监控已停止")
+        finally:
+            await self.pool.close()
+            for monitor in self.monitors:
+                await monitor.close()
+
+        return {"status": "completed", "last_run": datetime.now().isoformat()}
+
+
+def parse_app_ids(values: List[str], ids_file: str = None) -> List[str]:
+    """
+    解析游戏ID列表
+
+    values 中每一项可以是逗号分隔的多个ID；ids_file 每行一个ID，# 开头为注释。
+    """
+    app_ids = []
+    for value in values or []:
+        app_ids.extend(v.strip() for v in value.split(','))
+    if ids_file:
+        with open(ids_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    app_ids.append(line)
+    # 去重并保持顺序
+    return list(dict.fromkeys(a for a in app_ids if a))
 
 
 def main():
@@ -715,25 +2650,174 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description="TapTap 社区监控 (Playwright版)")
+    parser.add_argument("command", nargs='?', choices=("monitor", "serve-browser"), default="monitor",
+                        help="monitor=监控（默认），serve-browser=启动常驻浏览器守护进程供监控连接")
     parser.add_argument("--interval", type=int, default=30, 
                         help="监控间隔（分钟），0表示只运行一次")
-    parser.add_argument("--app-id", type=str, default="236096", 
-                        help="游戏ID（默认：236096为盲盒派对）")
+    parser.add_argument("--schedule", choices=("adaptive", "fixed"), default="adaptive",
+                        help="轮询方式: adaptive=按各信息流新内容速率分别调整间隔, fixed=固定间隔同时抓取（默认: adaptive）")
+    parser.add_argument("--min-interval", type=float, default=None,
+                        help="自适应轮询的最小间隔（分钟，默认: --interval 的 1/3）")
+    parser.add_argument("--max-interval", type=float, default=None,
+                        help="自适应轮询的最大间隔（分钟，默认: --interval 的 4 倍）")
+    parser.add_argument("--jitter", type=float, default=0.1,
+                        help="自适应轮询间隔的随机抖动比例（默认: 0.1）")
+    parser.add_argument("--app-id", type=str, nargs='+', default=None,
+                        help="游戏ID，可传多个或用逗号分隔（默认：236096为盲盒派对）")
+    parser.add_argument("--app-ids-file", type=str, default=None,
+                        help="游戏ID列表文件，每行一个")
     parser.add_argument("--data-file", type=str, default=None,
-                        help="数据存储文件路径（默认: data/{app_id}_data.json）")
+                        help="数据存储文件路径，多个游戏时需包含 {app_id}（默认: data/{app_id}_data.json）")
+    parser.add_argument("--store", choices=STORES, default=None,
+                        help="存储后端: json=整体重写数据文件, sqlite=WAL 模式数据库增量写入"
+                             "（默认: 持续监控或多个游戏时 sqlite，单次运行时 json）")
+    parser.add_argument("--db-file", type=str, default=None,
+                        help="SQLite 数据库路径（默认: data/taptap.db）")
+    parser.add_argument("--max-feed-pages", type=int, default=5,
+                        help="按最新排序翻页直到越过上次的水位线，每个信息流最多额外加载的页数（默认: 5）")
+    parser.add_argument("--near-dup", type=float, default=0,
+                        help="近似重复检测的相似度阈值 0~1，新记录标注 MinHash 相似簇，0 表示关闭（建议: 0.5，默认: 0）")
+    parser.add_argument("--near-dup-wave", type=int, default=5,
+                        help="同一相似簇在一轮内新增多少条时提示疑似刷帖/刷评（默认: 5）")
+    parser.add_argument("--recycle-after", type=int, default=200,
+                        help="浏览器上下文累计导航多少次后回收，0 表示不限（默认: 200）")
+    parser.add_argument("--recycle-minutes", type=float, default=360,
+                        help="浏览器上下文运行多少分钟后回收，0 表示不限（默认: 360）")
+    parser.add_argument("--recycle-rss-mb", type=float, default=1024,
+                        help="渲染进程内存超过多少 MB 时回收上下文，0 表示不检查（默认: 1024）")
+    parser.add_argument("--browser-endpoint", type=str, nargs='?', const=DEFAULT_ENDPOINT, default=None,
+                        help=f"连接浏览器守护进程的 CDP 地址，可连接时复用，否则自行启动浏览器；不带地址时为 {DEFAULT_ENDPOINT}"
+                             f"（默认: 不连接，serve-browser 默认监听 {DEFAULT_ENDPOINT}）")
+    parser.add_argument("--profile-dir", type=str, default=None,
+                        help="持久化浏览器配置根目录，设置后跨运行复用 HTTP 缓存，每个进程独占其中一个 worker-N 目录（默认: 不使用）")
+    parser.add_argument("--profile-max-mb", type=float, default=512,
+                        help="单个浏览器配置目录的大小上限（MB），超过时启动前清理缓存（默认: 512）")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="在本机该端口提供 Prometheus 格式的 /metrics 接口，0 表示关闭（默认: 0）")
+    parser.add_argument("--metrics-file", type=str, default=None,
+                        help="每轮指标 JSON 行的追加文件，传空字符串关闭（默认: 数据目录下的 metrics.jsonl）")
+    parser.add_argument("--notify", action="store_true",
+                        help="每轮把新内容合并为摘要推送到钉钉（需配置 DINGTALK_WEBHOOK / DINGTALK_SECRET）")
+    parser.add_argument("--notify-rate", type=float, default=20,
+                        help="钉钉机器人每分钟最多发送的消息数（默认: 20）")
+    parser.add_argument("--rules", type=str, default=None,
+                        help="关键词告警规则文件（JSON），命中的新记录带上 matches 字段并在推送中标出，修改后自动重新加载（默认: 不使用）")
     parser.add_argument("--headless", action="store_true", default=True,
                         help="无头模式运行（默认开启）")
     parser.add_argument("--visible", action="store_true",
                         help="显示浏览器窗口（调试用）")
+    parser.add_argument("--engine", choices=ENGINES, default="browser",
+                        help="抓取引擎: browser=浏览器渲染, http=直接解析页面 NUXT 数据，缺失时自动回退浏览器（默认: browser）")
+    parser.add_argument("--extract", choices=EXTRACT_MODES, default="nuxt",
+                        help="浏览器中的数据提取方式: nuxt=读取 NUXT 状态, network=监听信息流接口响应并随滚动翻页（默认: nuxt）")
+    parser.add_argument("--route-profile", choices=tuple(ROUTE_PROFILES), default=None,
+                        help="请求拦截档位: lean=拦截图片/字体/媒体和第三方域名, full=不拦截（默认: 无头 lean，--visible 时 full）")
+    parser.add_argument("--debug-capture", action="store_true",
+                        help="每次抓取都保存调试快照（默认只在解析结果为空时保存）")
+    parser.add_argument("--debug-sample-rate", type=float, default=None,
+                        help="成功抓取时保存调试快照的采样率 0~1")
+    parser.add_argument("--debug-dir", type=str, default=None,
+                        help="调试快照目录（默认: 数据文件所在目录下的 debug/）")
+    parser.add_argument("--debug-keep", type=int, default=20,
+                        help="每个游戏/信息流保留的快照数量（默认: 20）")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="使用异步引擎，帖子和评价并发抓取")
+    parser.add_argument("--max-pages", type=int, default=4,
+                        help="监控多个游戏时共享浏览器的页面池大小（默认: 4）")
+    parser.add_argument("--min-request-interval", type=float, default=1.0,
+                        help="监控多个游戏时对 TapTap 的最小请求间隔，单位秒（默认: 1.0）")
     
     args = parser.parse_args()
     
-    monitor = TapTapMonitor(
-        app_id=args.app_id, 
+    if args.command == "serve-browser":
+        serve_browser(args.browser_endpoint or DEFAULT_ENDPOINT, headless=not args.visible, args=BROWSER_ARGS)
+        return
+    
+    app_ids = parse_app_ids(args.app_id, args.app_ids_file) or ["236096"]
+    if args.store is None:
+        # JSON 后端每次保存都要读取并重写完整历史，长期运行只用 SQLite 增量写入
+        args.store = "sqlite" if args.interval > 0 or len(app_ids) > 1 else "json"
+    sample_rate = args.debug_sample_rate if args.debug_sample_rate is not None else (1.0 if args.debug_capture else 0.0)
+    debug_dir = args.debug_dir or os.path.join(
+        os.path.dirname(args.data_file.format(app_id='')) if args.data_file else 'data', 'debug')
+    debug = DebugCapture(debug_dir, sample_rate=sample_rate, keep=args.debug_keep)
+    lifecycle = BrowserLifecycle(args.recycle_after, args.recycle_minutes, args.recycle_rss_mb)
+    profiles = BrowserProfiles(args.profile_dir, max_mb=args.profile_max_mb) if args.profile_dir else None
+    metrics_file = args.metrics_file if args.metrics_file is not None else os.path.join(
+        os.path.dirname(args.data_file.format(app_id='')) if args.data_file else 'data', 'metrics.jsonl')
+    metrics = Metrics(metrics_file or None)
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    notifier = None
+    if args.notify:
+        from notifier import create_notifier
+        notifier = create_notifier(
+            os.path.join(os.path.dirname(args.data_file.format(app_id='')) if args.data_file else 'data', 'outbox.db'),
+            args.notify_rate,
+        )
+        # 退出前等待后台线程发完发件箱中到期的条目
+        import atexit
+        atexit.register(notifier.close)
+    keyword_rules = KeywordRules(args.rules) if args.rules else None
+    scheduler = None
+    if args.schedule == "adaptive" and args.interval > 0:
+        scheduler = AdaptiveScheduler(
+            args.interval * 60,
+            min_interval=args.min_interval * 60 if args.min_interval else None,
+            max_interval=args.max_interval * 60 if args.max_interval else None,
+            jitter=args.jitter,
+        )
+    if len(app_ids) > 1:
+        multi = MultiAppMonitor(
+            app_ids=app_ids,
+            headless=not args.visible,
+            data_file=args.data_file,
+            engine=args.engine,
+            extract=args.extract,
+            route_profile=args.route_profile,
+            debug=debug,
+            store=args.store,
+            db_file=args.db_file,
+            max_feed_pages=args.max_feed_pages,
+            near_dup=args.near_dup,
+            near_dup_wave=args.near_dup_wave,
+            lifecycle=lifecycle,
+            max_pages=args.max_pages,
+            min_request_interval=args.min_request_interval,
+            browser_endpoint=args.browser_endpoint or None,
+            profiles=profiles,
+            metrics=metrics,
+            notifier=notifier,
+            keyword_rules=keyword_rules,
+        )
+        asyncio.run(multi.monitor(interval_minutes=args.interval, scheduler=scheduler))
+        return
+    
+    monitor_cls = AsyncTapTapMonitor if args.use_async else TapTapMonitor
+    monitor = monitor_cls(
+        app_id=app_ids[0], 
         headless=not args.visible,
-        data_file=args.data_file
+        data_file=args.data_file.format(app_id=app_ids[0]) if args.data_file else None,
+        engine=args.engine,
+        extract=args.extract,
+        route_profile=args.route_profile,
+        debug=debug,
+        store=args.store,
+        db_file=args.db_file,
+        max_feed_pages=args.max_feed_pages,
+        near_dup=args.near_dup,
+        near_dup_wave=args.near_dup_wave,
+        lifecycle=lifecycle,
+        browser_endpoint=args.browser_endpoint or None,
+        profiles=profiles,
+        metrics=metrics,
+        notifier=notifier,
+        keyword_rules=keyword_rules,
     )
-    monitor.monitor(interval_minutes=args.interval)
+    if args.use_async:
+        asyncio.run(monitor.monitor(interval_minutes=args.interval, scheduler=scheduler))
+    else:
+        monitor.monitor(interval_minutes=args.interval, scheduler=scheduler)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+信息流水位线 - 记录每个信息流已见过的最新条目（ID 和发布时间）
+
+按最新排序翻页时，只要已加载的条目还没有越过水位线就继续翻页，越过后立即停止。
+置顶内容发布时间较早但排在最前，因此只用已加载的最后一条判断是否越过。
+"""
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+def epoch_seconds(ts) -> Optional[int]:
+    """将秒/毫秒时间戳或 ISO 时间字符串转换为秒级时间戳"""
+    if not ts:
+        return None
+    if isinstance(ts, (int, float)):
+        return int(ts / 1000 if ts > 1e12 else ts)
+    try:
+        return int(datetime.fromisoformat(str(ts).replace('Z', '+00:00')).timestamp())
+    except ValueError:
+        return None
+
+
+class FeedWatermarks:
+    def __init__(self, path_file: str = None):
+        """
+        Args:
+            path_file: 持久化文件路径，None 表示只保存在内存中
+        """
+        self.path_file = path_file
+        self.marks: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self):
+        if self.path_file and os.path.exists(self.path_file):
+            try:
+                with open(self.path_file, 'r', encoding='utf-8') as f:
+                    self.marks = json.load(f)
+            except Exception as e:
+                print(f"加载水位线失败: {e}")
+
+    def _save(self):
+        if not self.path_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path_file) or '.', exist_ok=True)
+            tmp_file = self.path_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.marks, f, ensure_ascii=False)
+            os.replace(tmp_file, self.path_file)
+        except Exception as e:
+            print(f"保存水位线失败: {e}")
+
+    def get(self, feed: str) -> Optional[Dict]:
+        """信息流的水位线 {"id", "timestamp", "updated_at"}，尚未建立时返回 None"""
+        return self.marks.get(feed)
+
+    def crossed(self, feed: str, items: List[Dict]) -> bool:
+        """
+        按信息流顺序排列的条目是否已越过水位线
+
+        没有水位线（首次运行）时视为已越过，只抓取首屏建立水位线。
+        """
+        mark = self.get(feed)
+        if not mark:
+            return True
+        if not items:
+            return False
+        if mark.get('id') and any(item.get('id') == mark['id'] for item in items):
+            return True
+        last = items[-1].get('timestamp')
+        return bool(last and mark.get('timestamp') and last <= mark['timestamp'])
+
+    def advance(self, feed: str, items: List[Dict]) -> bool:
+        """
+        用本轮条目中最新的一条推进水位线（只前进不后退）
+
+        Returns:
+            水位线是否变化
+        """
+        dated = [item for item in items if item.get('timestamp')]
+        if not dated:
+            return False
+        newest = max(dated, key=lambda item: item['timestamp'])
+        mark = self.get(feed) or {}
+        if mark.get('timestamp') and newest['timestamp'] <= mark['timestamp']:
+            return False
+        self.marks[feed] = {
+            "id": newest.get('id'),
+            "timestamp": newest['timestamp'],
+            "updated_at": datetime.now().isoformat(),
+        }
+        self._save()
+        return True